@@ -1,32 +1,39 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-import os
-from dotenv import load_dotenv
+from sqlalchemy import DateTime, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from database import get_db
+from cache import make_cache
+from database import get_async_db, get_async_sessionmaker, get_db
 import models
+from settings import get_settings
 
-load_dotenv()
+settings = get_settings()
 
-SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 10080))
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
+# Verified token -> user id, and user id -> column snapshot. Set AUTH_CACHE_URL
+# to a redis:// URL to share entries between workers.
+AUTH_CACHE_URL = settings.auth_cache_url
+AUTH_CACHE_TTL = settings.auth_cache_ttl
+AUTH_CACHE_SIZE = settings.auth_cache_size
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+token_cache = make_cache(AUTH_CACHE_URL, "auth:token", AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+user_cache = make_cache(AUTH_CACHE_URL, "auth:user", AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
 
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+# Never cache credentials alongside the profile
+_SNAPSHOT_EXCLUDE = {"password_hash"}
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -36,26 +43,113 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_user_id(token: str) -> int:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+        user_id = int(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+    # Never outlive the token itself
+    ttl = min(token_cache.ttl, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        token_cache.set(key, user_id, ttl=ttl)
+    return user_id
+
+
+def _snapshot(user: models.User) -> dict:
+    snap = {}
+    for col in models.User.__table__.columns:
+        if col.key in _SNAPSHOT_EXCLUDE:
+            continue
+        value = getattr(user, col.key)
+        snap[col.key] = value.isoformat() if isinstance(value, datetime) else value
+    return snap
+
+
+def _from_snapshot(snap: dict) -> models.User:
+    values = {}
+    for col in models.User.__table__.columns:
+        if col.key in snap:
+            value = snap[col.key]
+            if value is not None and isinstance(col.type, DateTime):
+                value = datetime.fromisoformat(value)
+            values[col.key] = value
+    user = models.User(**values)
+    # Persistent-but-unloaded: attaches to the request session without a SELECT,
+    # and anything not in the snapshot (password_hash, relationships) lazy-loads.
+    make_transient_to_detached(user)
+    return user
+
+
+def invalidate_user(user_id: int):
+    """Drop a cached user snapshot; call after any change to the users row."""
+    user_cache.delete(user_id)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+    user_id = _decode_user_id(token)
+    snap = user_cache.get(user_id)
+    if snap is not None:
+        user = _from_snapshot(snap)
+        db.add(user)
+        return user
+
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None:
+        raise _credentials_exception()
+    user_cache.set(user_id, _snapshot(user))
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    user_id = _decode_user_id(token)
+    snap = user_cache.get(user_id)
+    if snap is not None:
+        user = _from_snapshot(snap)
+        db.add(user)
+        return user
 
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+    user = await db.scalar(select(models.User).where(models.User.id == user_id))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    user_cache.set(user_id, _snapshot(user))
     return user
 
 
+async def get_stream_user_id(
+    token: Optional[str] = Depends(oauth2_scheme_optional), access_token: Optional[str] = None
+) -> int:
+    """
+    User id for long-lived streams. Browsers' EventSource can't send headers,
+    so the token may also come as `?access_token=`. Uses its own short-lived
+    session: a stream must not pin a connection for its whole lifetime.
+    """
+    async with get_async_sessionmaker()() as db:
+        user = await get_current_user_async(token or access_token or "", db)
+        return user.id
+
+
+def auth_cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+
 def require_provider(current_user: models.User = Depends(get_current_user)) -> models.User:
     if current_user.role != "provider":
         raise HTTPException(status_code=403, detail="Only providers can perform this action")
@@ -0,0 +1,86 @@
+"""
+Requests/sec of the async notification routes against the old sync path.
+
+    cd backend
+    python -m benchmarks.async_vs_sync --concurrency 64 --duration 10
+
+Serves the real app plus a copy of the previous sync `unread-count`
+implementation (sync session, threadpool) from one uvicorn worker, seeds a
+temporary SQLite database, and drives both with the same load.
+
+On SQLite the two are close in raw throughput, since aiosqlite still runs
+each connection on a thread; the async path's advantage is that waiting
+requests cost an event-loop task instead of a threadpool worker.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import Depends
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import migrate
+from benchmarks.loadgen import Server, run
+
+if os.getenv("BENCH_SERVE"):
+    # Imported by uvicorn inside the server process
+    import models
+    from auth import get_current_user
+    from database import get_db
+    from main import app
+
+    @app.get("/bench/sync-unread-count")
+    def sync_unread_count(
+        current_user: models.User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+    ):
+        count = db.query(models.Notification).filter(
+            models.Notification.user_id == current_user.id,
+            models.Notification.is_read == False,
+        ).count()
+        return {"count": count}
+
+
+def _seed(url: str, notifications: int) -> str:
+    import models
+    from auth import create_access_token
+
+    engine = create_engine(url)
+    migrate.upgrade(engine, configure_logger=False)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Bench", "email": "bench@example.com", "password_hash": "x", "role": "user"},
+        ])
+        conn.execute(models.Notification.__table__.insert(), [
+            {"user_id": 1, "title": "t", "message": "m", "is_read": i % 3 == 0} for i in range(notifications)
+        ])
+    engine.dispose()
+    return create_access_token({"sub": "1", "role": "user"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="async vs sync notification routes")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--notifications", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        token = _seed(url, args.notifications)
+        headers = {"Authorization": f"Bearer {token}"}
+        env = {"DATABASE_URL": url, "BENCH_SERVE": "1"}
+        with Server("benchmarks.async_vs_sync:app", env) as server:
+            print(f"{'path':>34} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for label, path in [("sync (threadpool)", "/bench/sync-unread-count"),
+                                ("async (AsyncSession)", "/notifications/unread-count")]:
+                result = asyncio.run(run(server.base_url, path, args.concurrency, args.duration, headers))
+                print(f"{label:>34} {result.rps:>9.1f} {result.percentile(50):>8.1f} "
+                      f"{result.percentile(99):>8.1f} {result.errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
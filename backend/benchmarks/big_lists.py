@@ -0,0 +1,167 @@
+"""
+Compression and NDJSON streaming for the big list routes.
+
+    cd backend
+    python -m benchmarks.big_lists --rows 20000
+
+Seeds a temporary SQLite database with `--rows` services, bookings and
+reviews for one provider, then:
+
+  1. serves it with uvicorn and fetches a 100-row page of each big list with
+     Accept-Encoding identity, gzip and br: bytes on the wire and median time;
+  2. fetches each whole listing both as JSON pages (following X-Next-Cursor)
+     and as one NDJSON stream: time to the first byte and to the last;
+  3. in-process, the peak Python memory (tracemalloc) of encoding the whole
+     booking list by loading every row first, vs by `pagination.stream_rows`.
+"""
+import argparse
+import gzip
+import http.client
+import os
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+ROUTES = [("/services/", None), ("/bookings/provider", "provider"), ("/reviews/provider/1", None)]
+
+
+def _get(conn, path: str, headers: dict, first_byte: bool = False):
+    """(status, headers, body, seconds to first body byte or None)."""
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    first = None
+    if first_byte:
+        head = response.read(1)
+        first = perf_counter()
+        body = head + response.read()
+    else:
+        body = response.read()
+    return response.status, response, body, first
+
+
+def _median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+
+def wire_sizes(conn, auth: dict, repeat: int):
+    print(f"{'route (100 rows)':>22} {'encoding':>9} {'bytes':>9} {'median ms':>10}")
+    for path, role in ROUTES:
+        for encoding in ("identity", "gzip", "br"):
+            headers = {**auth.get(role, {}), "Accept-Encoding": encoding}
+            samples, size = [], 0
+            for _ in range(repeat):
+                start = perf_counter()
+                status, response, body, _ = _get(conn, path + "?limit=100", headers)
+                samples.append(perf_counter() - start)
+                assert status == 200, (path, status)
+                size = len(body)
+            got = response.getheader("content-encoding") or "identity"
+            print(f"{path:>22} {got:>9} {size:>9} {_median_ms(samples):>10.2f}")
+
+
+def whole_listings(conn, auth: dict, repeat: int):
+    print(f"\n{'whole listing':>22} {'as':>9} {'rows':>9} {'first ms':>10} {'last ms':>9}")
+    for path, role in ROUTES:
+        headers = {**auth.get(role, {}), "Accept-Encoding": "gzip"}
+        paged, paged_first, rows = [], [], 0
+        for _ in range(repeat):
+            start, cursor, rows = perf_counter(), None, 0
+            while True:
+                query = "?limit=100" + (f"&cursor={cursor}" if cursor else "")
+                status, response, body, first = _get(conn, path + query, headers, first_byte=rows == 0)
+                if rows == 0:
+                    paged_first.append(first - start)
+                rows += 100
+                cursor = response.getheader("x-next-cursor")
+                if not cursor:
+                    break
+            paged.append(perf_counter() - start)
+
+        streamed, streamed_first = [], []
+        for _ in range(repeat):
+            start = perf_counter()
+            status, response, body, first = _get(
+                conn, path, {**headers, "Accept": "application/x-ndjson"}, first_byte=True)
+            streamed.append(perf_counter() - start)
+            streamed_first.append(first - start)
+        lines = len(http_decode(body, response.getheader("content-encoding")).splitlines())
+        print(f"{path:>22} {'pages':>9} {'~' + str(rows):>9} {_median_ms(paged_first):>10.1f} {_median_ms(paged):>9.1f}")
+        print(f"{'':>22} {'ndjson':>9} {lines:>9} {_median_ms(streamed_first):>10.1f} {_median_ms(streamed):>9.1f}")
+
+
+def http_decode(body: bytes, encoding) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "br":
+        import brotli
+        return brotli.decompress(body)
+    return body
+
+
+def peak_memory(rows: int):
+    import database
+    import fastjson
+    import models
+    from pagination import PageParams, stream_rows
+    from routers.bookings import BOOKING_PAGE_KEYS, _booking_out_rows
+
+    def load_all(db):
+        items = [row[0] for row in _booking_out_rows(db).filter(models.Booking.provider_id == 1).all()]
+        return sum(len(fastjson.dumps(item)) + 1 for item in items)
+
+    def streamed(db):
+        query = _booking_out_rows(db).filter(models.Booking.provider_id == 1)
+        page = PageParams(limit=1, cursor=None)
+        return sum(len(fastjson.dumps(item)) + 1 for batch in stream_rows(query, page, BOOKING_PAGE_KEYS)
+                   for item in batch)
+
+    print(f"\n{'bookings encoded':>22} {'rows':>9} {'peak MiB':>10} {'ms':>9}")
+    for label, fn in (("all rows loaded", load_all), ("stream_rows", streamed)):
+        db = database.SessionLocal()
+        tracemalloc.start()
+        start = perf_counter()
+        size = fn(db)
+        elapsed = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        db.close()
+        print(f"{label:>22} {rows:>9} {peak / 2 ** 20:>10.1f} {elapsed * 1000:>9.0f}   ({size} bytes)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000, help="services, bookings and reviews to seed")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {"DATABASE_URL": f"sqlite:///{Path(tmp) / 'big_lists.db'}", "OUTBOX_WORKER": "0",
+               "PASSWORD_HASH_WORKERS": "0", "FAST_JSON": os.environ.get("FAST_JSON", "on")}
+        os.environ.update(env)
+        import database
+        import migrate
+        from auth import create_access_token
+        from benchmarks.loadgen import Server
+        from benchmarks.serialization import _seed
+
+        migrate.upgrade(configure_logger=False)
+        _seed(database.engine, args.rows)
+        auth = {"provider": {"Authorization": f"Bearer {create_access_token({'sub': '1', 'role': 'provider'})}"}}
+
+        print(f"FAST_JSON={env['FAST_JSON']}, {args.rows} rows\n")
+        with Server("main:app", env, port=args.port) as server:
+            conn = http.client.HTTPConnection("127.0.0.1", server.port)
+            wire_sizes(conn, auth, args.repeat)
+            whole_listings(conn, auth, args.repeat)
+            conn.close()
+        peak_memory(args.rows)
+        database.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
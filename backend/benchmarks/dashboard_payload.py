@@ -0,0 +1,105 @@
+"""
+Bytes and time per request of the booking lists against their dashboard rows.
+
+    cd backend
+    python -m benchmarks.dashboard_payload --bookings 2000 --limit 100
+
+Seeds a temporary SQLite database with one provider and one user who share
+`--bookings` bookings (every completed one reviewed; profiles with a bio and
+avatar, as real ones have), then fetches one page of each endpoint in-process
+and reports the body size and median time of `--repeat` requests.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+from datetime import date, time, timedelta
+from pathlib import Path
+from time import perf_counter
+
+STATUSES = ["pending", "accepted", "ongoing", "completed", "rejected"]
+BIO = "Licensed plumber with 12 years of experience in residential repairs. " * 3
+
+
+def _seed(engine, n: int):
+    import models
+
+    rng = random.Random(3)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Bench Provider", "email": "p@example.com", "password_hash": "x", "role": "provider",
+             "location": "Pune", "mobile": "9999999999", "bio": BIO, "avatar_url": "https://cdn.example.com/a/1.webp"},
+            {"id": 2, "name": "Bench User", "email": "u@example.com", "password_hash": "x", "role": "user",
+             "location": "Mumbai", "mobile": "8888888888", "bio": BIO, "avatar_url": "https://cdn.example.com/a/2.webp"},
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": s, "provider_id": 1, "service_name": f"Service {s}", "description": BIO,
+             "min_price": 100 * s, "category": "Plumbing"} for s in range(1, 6)
+        ])
+        bookings, reviews = [], []
+        start = date.today() - timedelta(days=n)
+        for i in range(1, n + 1):
+            status = rng.choice(STATUSES)
+            bookings.append({
+                "id": i, "user_id": 2, "provider_id": 1, "service_id": rng.randint(1, 5),
+                "problem_description": "Kitchen sink leaking under the cabinet",
+                # One booking per day keeps the active-slot index happy
+                "booking_date": start + timedelta(days=i), "booking_time": time(10), "status": status,
+            })
+            if status == "completed":
+                reviews.append({"booking_id": i, "user_id": 2, "provider_id": 1,
+                                "rating": rng.randint(1, 5), "feedback": "Quick and tidy work."})
+        conn.execute(models.Booking.__table__.insert(), bookings)
+        conn.execute(models.Review.__table__.insert(), reviews)
+
+
+def _measure(client, path: str, token: str, limit: int, repeat: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    samples, size = [], 0
+    for _ in range(repeat):
+        t0 = perf_counter()
+        response = client.get(path, params={"limit": limit}, headers=headers)
+        samples.append(perf_counter() - t0)
+        response.raise_for_status()
+        size = len(response.content)
+    return size, statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100, help="page size requested")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'dashboard.db'}"
+        os.environ["OUTBOX_WORKER"] = "0"
+        from fastapi.testclient import TestClient
+
+        import database
+        import migrate
+        from auth import create_access_token
+        from main import app
+
+        migrate.upgrade(configure_logger=False)
+        _seed(database.engine, args.bookings)
+        tokens = {
+            "provider": create_access_token({"sub": "1", "role": "provider"}),
+            "user": create_access_token({"sub": "2", "role": "user"}),
+        }
+        client = TestClient(app)
+        print(f"{'endpoint':>28} {'bytes':>9} {'median ms':>10}")
+        for role in ("provider", "user"):
+            results = {}
+            for path in (f"/bookings/{role}", f"/bookings/{role}/dashboard"):
+                results[path] = _measure(client, path, tokens[role], args.limit, args.repeat)
+                print(f"{path:>28} {results[path][0]:>9} {results[path][1]:>10.2f}")
+            (full_bytes, full_ms), (slim_bytes, slim_ms) = results.values()
+            print(f"{'':>28} {slim_bytes / full_bytes:>8.0%} {slim_ms / full_ms:>10.0%}  of the full response")
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Synthetic marketplace data at a configurable scale.
+
+    cd backend
+    python -m benchmarks.datagen --scale medium --database-url sqlite:///./bench.db
+    python -m benchmarks.datagen --scale small --users 2000 --bookings-per-user 20 ...
+
+Fills a migrated database with users and providers spread over the cities of
+the gazetteer, services, weekly availability, a year of bookings in every
+status, reviews of most completed bookings (provider ratings kept in step),
+and notifications. The same `--seed` always gives the same rows, so runs of
+`benchmarks.marketplace` are comparable.
+
+Rows go in with multi-row Core inserts, which skip the ORM's mapper events:
+coordinates and geohashes are written here, and the search index is kept by
+its database triggers. Every account's password is PASSWORD.
+"""
+import argparse
+import csv
+import random
+from dataclasses import dataclass, field, replace
+from datetime import datetime, time, timedelta
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine
+
+import geo
+import migrate
+import models
+from passwords import hash_sync
+
+PASSWORD = "benchmark-password"
+BATCH = 5000
+
+CATEGORIES = {
+    "Plumbing": ["Leak repair", "Tap installation", "Drain unblocking", "Water heater service"],
+    "Electrical": ["Wiring check", "Fan installation", "Switchboard repair", "Inverter setup"],
+    "Cleaning": ["Deep home cleaning", "Sofa shampooing", "Kitchen degreasing", "Bathroom cleaning"],
+    "Carpentry": ["Furniture assembly", "Door repair", "Custom shelving", "Bed repair"],
+    "Painting": ["Wall painting", "Texture painting", "Waterproofing", "Wood polishing"],
+    "AC Service": ["AC servicing", "Gas refill", "AC installation", "AC repair"],
+    "Pest Control": ["Cockroach control", "Termite treatment", "Bed bug treatment", "Mosquito control"],
+    "Appliance Repair": ["Washing machine repair", "Fridge repair", "Microwave repair", "RO purifier service"],
+}
+# Share of past bookings in each final status; future ones are pending or accepted
+PAST_STATUSES = (("completed", 0.75), ("rejected", 0.15), ("disputed", 0.05), ("ongoing", 0.05))
+HOURS = range(9, 18)
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    providers: int
+    services_per_provider: int
+    bookings_per_user: int
+    reviewed_share: float          # of completed bookings
+    notifications_per_user: int
+
+
+SCALES = {
+    "small": Scale(users=1000, providers=100, services_per_provider=4, bookings_per_user=6,
+                   reviewed_share=0.7, notifications_per_user=10),
+    "medium": Scale(users=10_000, providers=1000, services_per_provider=5, bookings_per_user=8,
+                    reviewed_share=0.7, notifications_per_user=20),
+    "large": Scale(users=100_000, providers=10_000, services_per_provider=5, bookings_per_user=10,
+                   reviewed_share=0.7, notifications_per_user=30),
+}
+
+
+@dataclass
+class Dataset:
+    """Ids a load test needs to make valid requests against the generated rows."""
+    users: List[int] = field(default_factory=list)
+    providers: List[int] = field(default_factory=list)
+    services: Dict[int, List[int]] = field(default_factory=dict)         # provider -> its services
+    cities: List[str] = field(default_factory=list)
+    pending: List[Tuple[int, int]] = field(default_factory=list)         # (provider, booking)
+    reviewable: List[Tuple[int, int]] = field(default_factory=list)      # (user, completed unreviewed booking)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _cities() -> List[Tuple[str, float, float]]:
+    with open(geo.GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        return [(row["name"], float(row["latitude"]), float(row["longitude"])) for row in csv.DictReader(f)]
+
+
+def _insert(conn, table, rows: List[dict]):
+    for start in range(0, len(rows), BATCH):
+        conn.execute(table.insert(), rows[start:start + BATCH])
+
+
+def _people(rng, first_id: int, count: int, role: str, cities, password_hash: str, since: datetime) -> List[dict]:
+    rows = []
+    for i in range(first_id, first_id + count):
+        name, lat, lng = rng.choice(cities)
+        # Spread people around the city centre, as real addresses are
+        lat, lng = lat + rng.uniform(-0.08, 0.08), lng + rng.uniform(-0.08, 0.08)
+        rows.append({
+            "id": i, "name": f"{role.title()} {i}", "email": f"{role}{i}@example.com",
+            "mobile": f"9{rng.randrange(10 ** 9):09d}", "password_hash": password_hash, "role": role,
+            "location": name, "bio": f"{role.title()} based in {name}." if role == "provider" else None,
+            "avatar_url": None, "created_at": since + timedelta(seconds=rng.randrange(180 * 86400)),
+            "latitude": lat, "longitude": lng, "geohash": geo.geohash(lat, lng),
+            "rating_sum": 0.0, "rating_count": 0, "avg_rating": 0.0,
+        })
+    return rows
+
+
+def generate(engine, scale: Scale, seed: int = 42) -> Dataset:
+    """Insert `scale`'s worth of rows into an empty, migrated database."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = now.date()
+    since = now - timedelta(days=365)
+    cities = _cities()
+    password_hash = hash_sync(PASSWORD, 4)   # cheap rounds: login is not what's being measured
+    data = Dataset(cities=sorted({name for name, _, _ in cities}))
+
+    users = _people(rng, 1, scale.users, "user", cities, password_hash, since)
+    providers = _people(rng, scale.users + 1, scale.providers, "provider", cities, password_hash, since)
+    data.users = [u["id"] for u in users]
+    data.providers = [p["id"] for p in providers]
+
+    services = []
+    for provider in providers:
+        for category in rng.sample(sorted(CATEGORIES), min(scale.services_per_provider, len(CATEGORIES))):
+            service_id = len(services) + 1
+            name = rng.choice(CATEGORIES[category])
+            services.append({
+                "id": service_id, "provider_id": provider["id"], "service_name": f"{name} in {provider['location']}",
+                "description": f"{name} by a verified professional. Fixed visit charge, parts extra.",
+                "min_price": float(round(rng.lognormvariate(6.4, 0.8))), "category": category, "image_url": None,
+                "created_at": provider["created_at"] + timedelta(days=rng.randrange(30)),
+            })
+            data.services.setdefault(provider["id"], []).append(service_id)
+
+    availability = []
+    for provider in providers:
+        day_off = rng.randrange(7)
+        availability += [
+            {"provider_id": provider["id"], "day_of_week": day, "start_time": time(9), "end_time": time(18)}
+            for day in range(7) if day != day_off
+        ]
+
+    bookings, taken = [], set()
+    statuses, weights = zip(*PAST_STATUSES)
+    for user in users:
+        for _ in range(scale.bookings_per_user):
+            provider_id = rng.choice(data.providers)
+            future = rng.random() < 0.2
+            status = rng.choice(("pending", "accepted")) if future else rng.choices(statuses, weights)[0]
+            booking_date = today + timedelta(days=rng.randrange(1, 30)) if future \
+                else today - timedelta(days=rng.randrange(1, 365))
+            slot = (provider_id, booking_date, rng.choice(HOURS))
+            if status in models.ACTIVE_BOOKING_STATUSES:
+                if slot in taken:      # the unique index allows one active booking per slot
+                    continue
+                taken.add(slot)
+            booking_id = len(bookings) + 1
+            created = min(now, datetime.combine(booking_date, time()) - timedelta(days=rng.randrange(1, 10))) \
+                if not future else now - timedelta(days=rng.randrange(1, 10))
+            bookings.append({
+                "id": booking_id, "user_id": user["id"], "provider_id": provider_id,
+                "service_id": rng.choice(data.services[provider_id]),
+                "problem_description": "Needs a visit this week.", "booking_date": booking_date,
+                "booking_time": time(slot[2]), "status": status, "created_at": created,
+            })
+            if status == "pending":
+                data.pending.append((provider_id, booking_id))
+
+    reviews, by_provider = [], {}
+    for booking in bookings:
+        if booking["status"] != "completed":
+            continue
+        if rng.random() >= scale.reviewed_share:
+            data.reviewable.append((booking["user_id"], booking["id"]))
+            continue
+        rating = float(rng.choices((5, 4, 3, 2, 1), (50, 30, 10, 5, 5))[0])
+        reviews.append({
+            "booking_id": booking["id"], "user_id": booking["user_id"], "provider_id": booking["provider_id"],
+            "rating": rating, "feedback": rng.choice((None, "Quick and tidy.", "Arrived late, good work.",
+                                                      "Would book again.")),
+            "created_at": datetime.combine(booking["booking_date"], time(20)),
+        })
+        total, count = by_provider.get(booking["provider_id"], (0.0, 0))
+        by_provider[booking["provider_id"]] = (total + rating, count + 1)
+    for provider in providers:
+        total, count = by_provider.get(provider["id"], (0.0, 0))
+        provider.update(rating_sum=total, rating_count=count, avg_rating=round(total / count, 2) if count else 0.0)
+
+    notifications = [
+        {"user_id": user_id, "title": "Booking update", "message": "Your booking status changed.",
+         "is_read": rng.random() < 0.8, "created_at": now - timedelta(minutes=rng.randrange(60 * 24 * 90))}
+        for user_id in data.users for _ in range(scale.notifications_per_user)
+    ]
+
+    with engine.begin() as conn:
+        _insert(conn, models.User.__table__, users + providers)
+        _insert(conn, models.Service.__table__, services)
+        _insert(conn, models.ProviderAvailability.__table__, availability)
+        _insert(conn, models.Booking.__table__, bookings)
+        _insert(conn, models.Review.__table__, reviews)
+        _insert(conn, models.Notification.__table__, notifications)
+    data.counts = {"users": len(users), "providers": len(providers), "services": len(services),
+                   "bookings": len(bookings), "reviews": len(reviews), "notifications": len(notifications)}
+    return data
+
+
+def scale_from_args(args) -> Scale:
+    """`--scale`, with any of the per-field options overriding it."""
+    overrides = {name: getattr(args, name) for name in Scale.__dataclass_fields__
+                 if getattr(args, name, None) is not None}
+    return replace(SCALES[args.scale], **overrides)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    for name, spec in Scale.__dataclass_fields__.items():
+        parser.add_argument("--" + name.replace("_", "-"), dest=name, type=spec.type, default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", required=True, help="an empty database; it is migrated first")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    migrate.upgrade(engine, configure_logger=False)
+    start = perf_counter()
+    data = generate(engine, scale_from_args(args), args.seed)
+    engine.dispose()
+    print(", ".join(f"{count} {name}" for name, count in data.counts.items()) +
+          f" in {perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Facet counts for service search: in-memory bitset index vs GROUP BY.
+
+    cd backend
+    python -m benchmarks.facet_counts --sizes 10000,100000,1000000
+
+Each size gets a fresh SQLite file in a temp directory, with one provider
+per 20 services. For a few filter combinations it times the counts that
+`/services/search` returns (total, per category, per price bucket, per
+minimum rating, each facet under the other filters) computed by GROUP BY
+queries, and the same counts from `facets.FacetIndex`. Also reports the
+time to load the index and to apply one changed service to it.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import Integer, and_, case, create_engine, func, select, true
+
+import facets
+import models
+
+CATEGORIES = ["Plumbing", "Electrical", "Cleaning", "Carpentry", "Painting", "AC Service",
+              "Pest Control", "Appliance Repair"]
+FILTERS = [
+    {},
+    {"category": "Plumbing"},
+    {"price_min": 300, "price_below": 1200},
+    {"category": "Cleaning", "price_below": 800, "min_rating": 4},
+]
+
+
+def _populate(engine, n: int):
+    rng = random.Random(42)
+    models.Base.metadata.create_all(bind=engine)
+    providers = max(1, n // 20)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": p, "name": f"Provider {p}", "email": f"p{p}@example.com", "password_hash": "x",
+             "role": "provider", "avg_rating": round(rng.uniform(0, 5), 2) if rng.random() < 0.8 else 0.0}
+            for p in range(1, providers + 1)
+        ])
+        for start in range(1, n + 1, 10_000):
+            conn.execute(models.Service.__table__.insert(), [
+                {"id": i, "provider_id": rng.randint(1, providers), "service_name": f"Service {i}",
+                 "min_price": round(rng.lognormvariate(6.5, 0.9)), "category": rng.choice(CATEGORIES)}
+                for i in range(start, min(n, start + 9_999) + 1)
+            ])
+
+
+def _group_by_counts(conn, category=None, price_min=None, price_below=None, min_rating=None) -> dict:
+    Service, User = models.Service, models.User
+    by = {
+        "category": Service.category == category if category else true(),
+        "price": and_(Service.min_price >= (price_min or 0),
+                      Service.min_price < price_below if price_below is not None else true()),
+        "rating": User.avg_rating >= min_rating if min_rating else true(),
+    }
+
+    def where(skip):
+        return and_(*(condition for name, condition in by.items() if name != skip))
+
+    base = select(func.count()).select_from(Service).join(User, User.id == Service.provider_id)
+    bucket = case(*((Service.min_price >= edge, i) for i, edge in reversed(list(enumerate(facets.PRICE_BUCKET_EDGES)))),
+                  else_=0)
+    stars = func.min(func.cast(User.avg_rating, Integer), 4)
+    return {
+        "total": conn.execute(base.where(where(None))).scalar(),
+        "category": conn.execute(base.add_columns(Service.category).where(where("category"))
+                                 .group_by(Service.category)).all(),
+        "price": conn.execute(base.add_columns(bucket).where(where("price")).group_by(bucket)).all(),
+        "rating": conn.execute(base.add_columns(stars).where(where("rating")).group_by(stars)).all(),
+    }
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated service counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'services':>10} {'filters':>44} {'GROUP BY ms':>12} {'index ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(s) for s in args.sizes.split(",")):
+            engine = create_engine(f"sqlite:///{Path(tmp) / f'facets_{n}.db'}")
+            _populate(engine, n)
+            with engine.connect() as conn:
+                query = select(models.Service.id, models.Service.category, models.Service.min_price,
+                               models.User.avg_rating).join(
+                    models.User, models.User.id == models.Service.provider_id)
+                start = time.perf_counter()
+                index = facets.FacetIndex(conn.execute(query).all())
+                load_ms = (time.perf_counter() - start) * 1000
+
+                for filters in FILTERS:
+                    sql_ms = _median_ms(lambda: _group_by_counts(conn, **filters), args.repeat)
+                    index_ms = _median_ms(lambda: index.counts(**filters), args.repeat)
+                    label = ", ".join(f"{k}={v}" for k, v in filters.items()) or "(none)"
+                    print(f"{n:>10} {label:>44} {sql_ms:>12.2f} {index_ms:>9.3f}")
+
+            update_ms = _median_ms(lambda: index.add(n // 2, "Plumbing", 450.0, 4.2), args.repeat)
+            print(f"{n:>10} {'index load ' + f'{load_ms:.0f} ms, one update {update_ms:.3f} ms':>44}\n")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Radius search over providers against the old location substring filter.
+
+    cd backend
+    python -m benchmarks.geo_search --providers 100000
+
+Seeds a temporary SQLite database with `--providers` providers scattered
+around the gazetteer's places (Gaussian jitter of a few km, so cities have
+realistic clusters), located the way geo.py locates them. Then, for a few
+places, times one page (the nearest 50, or for ILIKE the newest 50) of the
+`location=<place>` filter and of `near=<place>` at several radii, and shows
+how many providers matched the filter or, for `near`, the covering geohash
+cells (the rows it reads), and the plan SQLite picked.
+"""
+import argparse
+import random
+import statistics
+from collections import Counter
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+import geo
+import migrate
+import models
+
+# Places with many, some and no providers around them (the last is a full scan for ILIKE)
+CITIES = ("Pune", "Mumbai", "Guwahati", "Nowhere")
+PAGE = 50
+
+
+def _populate(engine, n: int):
+    rng = random.Random(11)
+    places = list(geo._gazetteer().items())
+    rows = []
+    for i in range(1, n + 1):
+        name, (lat, lng) = rng.choice(places)
+        lat += rng.gauss(0, 0.08)
+        lng += rng.gauss(0, 0.08)
+        rows.append({"id": i, "name": f"Provider {i}", "email": f"p{i}@example.com", "password_hash": "x",
+                     "role": "provider", "location": f"Sector {i % 40}, {name.title()}",
+                     "latitude": lat, "longitude": lng, "geohash": geo.geohash(lat, lng)})
+    with engine.begin() as conn:
+        for start in range(0, n, 5000):
+            conn.execute(models.User.__table__.insert(), rows[start:start + 5000])
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _time(db: Session, stmt, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = perf_counter()
+        db.execute(stmt).all()
+        samples.append(perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def _plan(db: Session, stmt) -> str:
+    compiled = stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    steps = Counter(row[3] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+                    if not row[3].startswith("INDEX "))
+    return "; ".join(f"{n}x {step}" if n > 1 else step for step, n in steps.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--providers", type=int, default=100_000)
+    parser.add_argument("--radii", default="5,25,100", help="comma-separated radii in km")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    user = models.User
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'geo.db'}")
+        migrate.upgrade(engine, configure_logger=False)
+        t0 = perf_counter()
+        _populate(engine, args.providers)
+        print(f"seeded {args.providers} providers in {perf_counter() - t0:.1f}s\n")
+
+        print(f"{'query':>28} {'read':>11} {'median ms':>10}  plan")
+        with Session(engine) as db:
+            for city in CITIES:
+                like = user.location.ilike(f"%{city}%")
+                considered = db.scalar(select(func.count()).where(user.role == "provider", like))
+                stmt = (select(user).where(user.role == "provider", like)
+                        .order_by(user.created_at.desc(), user.id.desc()).limit(PAGE))
+                print(f"{f'location={city}':>28} {considered:>11} {_time(db, stmt, args.repeat):>10.2f}  "
+                      f"{_plan(db, stmt)}")
+                origin = geo.geocode(city)
+                if origin is None:
+                    continue
+                for radius in (float(r) for r in args.radii.split(",")):
+                    in_radius, distance_sq = geo.providers_within(*origin, radius)
+                    in_cells = in_radius.clauses[0]
+                    considered = db.scalar(select(func.count()).where(in_cells))
+                    stmt = select(user).where(in_radius).order_by(distance_sq, user.id).limit(PAGE)
+                    print(f"{f'near={city} {radius:g}km':>28} {considered:>11} "
+                          f"{_time(db, stmt, args.repeat):>10.2f}  {_plan(db, stmt)}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
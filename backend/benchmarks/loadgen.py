@@ -0,0 +1,125 @@
+"""
+Minimal asyncio HTTP/1.1 load generator (stdlib only).
+
+Each virtual client keeps one keep-alive connection open and sends requests
+back to back, so throughput is bounded by the server rather than by
+connection setup.
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass
+class Result:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rps(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+
+async def _read_response(reader) -> Tuple[int, Dict[str, str], bytes]:
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", ""):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunks.append((await reader.readexactly(size + 2))[:size])
+            if size == 0:
+                break
+        body = b"".join(chunks)
+    else:
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, body
+
+
+async def fetch(reader, writer, host: str, method: str, path: str,
+                headers: Optional[Dict[str, str]] = None, body: bytes = b"") -> Tuple[int, Dict[str, str], bytes]:
+    """Send one request on an open connection; (status, lower-cased headers, raw body)."""
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    return await _read_response(reader)
+
+
+async def request(reader, writer, host: str, method: str, path: str,
+                  headers: Optional[Dict[str, str]] = None, body: bytes = b"") -> int:
+    return (await fetch(reader, writer, host, method, path, headers, body))[0]
+
+
+async def run(base_url: str, path: str, concurrency: int, duration: float,
+              headers: Optional[Dict[str, str]] = None, method: str = "GET", body: bytes = b"") -> Result:
+    """Hammer one endpoint with `concurrency` clients for `duration` seconds."""
+    parts = urlsplit(base_url)
+    result = Result()
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status = await request(reader, writer, parts.netloc, method, path, headers, body)
+                if status >= 400:
+                    result.errors += 1
+                else:
+                    result.latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+class Server:
+    """Run `uvicorn <app>` in a subprocess for the duration of a `with` block."""
+
+    def __init__(self, app: str, env: Dict[str, str], port: int = 8765, workers: int = 1):
+        self.app, self.env, self.port, self.workers = app, env, port, workers
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            env={**os.environ, **self.env},
+        )
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(self.base_url + "/health", timeout=1)
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.proc.kill()
+        raise RuntimeError("server did not start")
+
+    def __exit__(self, *exc):
+        self.proc.send_signal(signal.SIGINT)
+        self.proc.wait(timeout=10)
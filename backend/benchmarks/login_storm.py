@@ -0,0 +1,103 @@
+"""
+Login throughput, and the latency of everything else during a login storm.
+
+    cd backend
+    python -m benchmarks.login_storm --logins 64 --probes 8 --duration 10
+
+Serves the real app plus a copy of the previous login (sync route, bcrypt
+inline on the threadpool) from one uvicorn worker against a temporary
+SQLite database. For each login path, `--logins` clients log in back to back
+while `--probes` clients call `/users/me`; a run with no logins gives the
+baseline for the probe. Reports login req/s and p99, how many logins were
+refused with 503 (PASSWORD_HASH_MAX_PENDING), and the probe's p50/p99.
+
+With the inline path the probe waits behind bcrypt for threadpool workers
+and CPU; with the pool it should stay near the baseline while login
+throughput is capped at about PASSWORD_HASH_WORKERS cores' worth.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import migrate
+from benchmarks.loadgen import Result, Server, run
+
+PASSWORD = "correct horse battery staple"
+
+if os.getenv("BENCH_SERVE"):
+    # Imported by uvicorn inside the server process
+    import models
+    import schemas
+    from database import get_db
+    from main import app
+    from passwords import verify_sync
+
+    @app.post("/bench/inline-login")
+    def inline_login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+        user = db.query(models.User).filter(models.User.email == credentials.email).first()
+        if not user or not verify_sync(credentials.password, user.password_hash)[0]:
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        return {"user_id": user.id}
+
+
+def _seed(url: str, rounds: int) -> str:
+    import models
+    from auth import create_access_token
+    from passwords import hash_sync
+
+    engine = create_engine(url)
+    migrate.upgrade(engine, configure_logger=False)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Bench", "email": "bench@example.com",
+             "password_hash": hash_sync(PASSWORD, rounds), "role": "user"},
+        ])
+    engine.dispose()
+    return create_access_token({"sub": "1", "role": "user"})
+
+
+async def _storm(base_url: str, login_path: str, args, token: str):
+    body = json.dumps({"email": "bench@example.com", "password": PASSWORD}).encode()
+    probe = run(base_url, "/users/me", args.probes, args.duration, {"Authorization": f"Bearer {token}"})
+    if not login_path:
+        return Result(), await probe
+    logins = run(base_url, login_path, args.logins, args.duration,
+                 {"Content-Type": "application/json"}, method="POST", body=body)
+    return await asyncio.gather(logins, probe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--probes", type=int, default=8, help="concurrent /users/me clients")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS")
+    parser.add_argument("--workers", type=int, default=None, help="PASSWORD_HASH_WORKERS (default: app default)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        token = _seed(url, args.rounds)
+        env = {"DATABASE_URL": url, "BENCH_SERVE": "1", "BCRYPT_ROUNDS": str(args.rounds), "OUTBOX_WORKER": "0"}
+        if args.workers is not None:
+            env["PASSWORD_HASH_WORKERS"] = str(args.workers)
+        with Server("benchmarks.login_storm:app", env) as server:
+            print(f"{'login path':>22} {'login/s':>8} {'p99 ms':>8} {'refused':>8} "
+                  f"{'probe/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+            for label, path in [("none (baseline)", None),
+                                ("inline (threadpool)", "/bench/inline-login"),
+                                ("process pool", "/auth/login")]:
+                logins, probe = asyncio.run(_storm(server.base_url, path, args, token))
+                print(f"{label:>22} {logins.rps:>8.1f} {logins.percentile(99):>8.1f} {logins.errors:>8} "
+                      f"{probe.rps:>8.1f} {probe.percentile(50):>8.1f} {probe.percentile(99):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Marketplace traffic against a local uvicorn, with stored baselines.
+
+    cd backend
+    python -m benchmarks.marketplace                   # compare with the stored baseline, if any
+    python -m benchmarks.marketplace --save-baseline   # record (or replace) it
+    python -m benchmarks.marketplace --scale medium --clients 32 --duration 60 --workers 2
+
+Generates a database with `benchmarks.datagen` (same seed, same rows), serves
+it with uvicorn, and has `--clients` virtual users, each on its own
+keep-alive connection, run scenarios back to back, picked at random by
+SCENARIOS weight:
+
+    search          /services/search: text, category, price, rating or near
+                    filters, sometimes followed to the next page
+    browse          a provider's profile, services, reviews, rating and slots
+    book            a provider's free slots, then POST /bookings/ for one
+    accept          a provider's dashboard, then accept a pending booking
+    review          a user's dashboard, then review a completed booking
+    notifications   the unread count, and now and then the list
+
+The outbox worker runs as usual, so bookings and reviews raise notifications
+in the background. Requests after the `--warmup` seconds are reported per
+scenario and per request: count, errors, p50/p95/p99 latency (ms) and rate.
+A 409 from booking a slot another client just took is an expected outcome,
+not an error.
+
+Baselines live in benchmarks/baselines/, one per scale, client count and
+worker count. A scenario regresses when its p95 is more than `--tolerance`
+(default 25%) and 2 ms over the baseline, or its rate is more than
+`--tolerance` under it; any regression makes the exit status 1. Latency
+depends on the machine, so compare against a baseline recorded on the same
+kind of machine (the file says where it came from).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine
+
+import migrate
+from benchmarks import datagen
+from benchmarks.loadgen import Result, Server, fetch
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SCENARIOS = {"search": 35, "browse": 25, "notifications": 25, "book": 8, "accept": 4, "review": 3}
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+# What a browser sends; bodies that are read get decoded
+ACCEPT_ENCODING = "gzip, br" if brotli else "gzip"
+SEARCH_TERMS = ["leak", "ac repair", "cleaning", "painting", "termite", "fridge", "wiring", "sofa", "door"]
+P95_FLOOR_MS = 2.0
+
+
+@lru_cache(maxsize=None)
+def _token(user_id: int, role: str) -> str:
+    from auth import create_access_token
+    return create_access_token({"sub": str(user_id), "role": role})
+
+
+def _json(headers: Dict[str, str], body: bytes):
+    encoding = headers.get("content-encoding")
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "br":
+        body = brotli.decompress(body)
+    return json.loads(body)
+
+
+class Client:
+    """One virtual user: a connection, and the stats it adds to."""
+
+    def __init__(self, base_url: str, data: datagen.Dataset, rng: random.Random, stats: "Stats"):
+        self.host = base_url.split("//")[1]
+        self.data, self.rng, self.stats = data, rng, stats
+
+    async def open(self):
+        host, port = self.host.split(":")
+        self.reader, self.writer = await asyncio.open_connection(host, int(port))
+
+    def close(self):
+        self.writer.close()
+
+    async def call(self, label: str, method: str, path: str, token: Optional[str] = None, body=None,
+                   expected=(200,)):
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = b""
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            payload = json.dumps(body).encode()
+        start = perf_counter()
+        status, response_headers, raw = await fetch(self.reader, self.writer, self.host, method, path,
+                                                    headers, payload)
+        self.stats.record(self.stats.requests, f"{method} {label}", perf_counter() - start, status in expected)
+        return status, response_headers, raw
+
+    # ── Scenarios: return False when there was nothing to do ──────────────────
+
+    async def search(self):
+        rng, params = self.rng, {"limit": 20}
+        kind = rng.random()
+        if kind < 0.3:
+            params["search"] = rng.choice(SEARCH_TERMS)
+        elif kind < 0.55:
+            params["category"] = rng.choice(sorted(datagen.CATEGORIES))
+        elif kind < 0.7:
+            params["price_min"], params["price_below"] = rng.choice([(0, 500), (250, 1000), (1000, 5000)])
+        elif kind < 0.85:
+            params["min_rating"] = rng.choice((3, 4))
+        else:
+            params["near"], params["radius_km"] = rng.choice(self.data.cities), 15
+        query = "&".join(f"{k}={v}".replace(" ", "%20") for k, v in params.items())
+        status, headers, _ = await self.call("/services/search", "GET", f"/services/search?{query}")
+        cursor = headers.get("x-next-cursor")
+        if status == 200 and cursor and rng.random() < 0.2:
+            await self.call("/services/search", "GET", f"/services/search?{query}&cursor={cursor}")
+        return True
+
+    async def browse(self):
+        pid = self.rng.choice(self.data.providers)
+        await self.call("/users/{id}", "GET", f"/users/{pid}")
+        await self.call("/services/provider/{id}", "GET", f"/services/provider/{pid}")
+        await self.call("/reviews/provider/{id}", "GET", f"/reviews/provider/{pid}?limit=20")
+        await self.call("/reviews/provider/{id}/avg", "GET", f"/reviews/provider/{pid}/avg")
+        await self.call("/availability/{id}/slots", "GET", f"/availability/{pid}/slots")
+        return True
+
+    async def book(self):
+        uid, pid = self.rng.choice(self.data.users), self.rng.choice(self.data.providers)
+        start = date.today() + timedelta(days=1)
+        status, headers, raw = await self.call("/availability/{id}/slots", "GET",
+                                               f"/availability/{pid}/slots?from={start.isoformat()}")
+        slots = _json(headers, raw) if status == 200 else []
+        if not slots:
+            return False
+        slot = self.rng.choice(slots)
+        body = {"service_id": self.rng.choice(self.data.services[pid]), "provider_id": pid,
+                "booking_date": slot["date"], "booking_time": slot["start_time"],
+                "problem_description": "Benchmark booking"}
+        status, headers, raw = await self.call("/bookings/", "POST", "/bookings/", _token(uid, "user"), body,
+                                               expected=(200, 409))
+        if status == 200:
+            self.data.pending.append((pid, _json(headers, raw)["id"]))
+        return True
+
+    def _take(self, items):
+        if not items:
+            return None
+        i = self.rng.randrange(len(items))
+        items[i], items[-1] = items[-1], items[i]
+        return items.pop()
+
+    async def accept(self):
+        taken = self._take(self.data.pending)
+        if taken is None:
+            return False
+        pid, booking_id = taken
+        token = _token(pid, "provider")
+        await self.call("/bookings/provider/dashboard", "GET", "/bookings/provider/dashboard?limit=20", token)
+        await self.call("/bookings/{id}/status", "PUT", f"/bookings/{booking_id}/status", token,
+                        {"status": "accepted"})
+        return True
+
+    async def review(self):
+        taken = self._take(self.data.reviewable)
+        if taken is None:
+            return False
+        uid, booking_id = taken
+        token = _token(uid, "user")
+        await self.call("/bookings/user/dashboard", "GET", "/bookings/user/dashboard?limit=20", token)
+        await self.call("/reviews/", "POST", "/reviews/", token,
+                        {"booking_id": booking_id, "rating": self.rng.choice((5, 5, 4, 4, 3, 1)),
+                         "feedback": "Benchmark review"})
+        return True
+
+    async def notifications(self):
+        token = _token(self.rng.choice(self.data.users), "user")
+        await self.call("/notifications/unread-count", "GET", "/notifications/unread-count", token)
+        if self.rng.random() < 0.25:
+            await self.call("/notifications/", "GET", "/notifications/", token)
+        return True
+
+
+class Stats:
+    def __init__(self):
+        self.scenarios: Dict[str, Result] = {}
+        self.requests: Dict[str, Result] = {}
+        self.skipped: Dict[str, int] = {}
+        self.recording = False
+
+    def record(self, table: Dict[str, Result], label: str, seconds: float, ok: bool):
+        if not self.recording:
+            return
+        result = table.setdefault(label, Result())
+        if ok:
+            result.latencies.append(seconds)
+        else:
+            result.errors += 1
+
+
+async def _run(base_url: str, data: datagen.Dataset, args) -> Stats:
+    stats = Stats()
+    names, weights = zip(*SCENARIOS.items())
+
+    async def virtual_user(index: int, deadline: float):
+        client = Client(base_url, data, random.Random(args.seed * 1000 + index), stats)
+        await client.open()
+        try:
+            while perf_counter() < deadline:
+                name = client.rng.choices(names, weights)[0]
+                start = perf_counter()
+                errors_before = sum(r.errors for r in stats.requests.values())
+                done = await getattr(client, name)()
+                if not done:
+                    if stats.recording:
+                        stats.skipped[name] = stats.skipped.get(name, 0) + 1
+                    continue
+                ok = sum(r.errors for r in stats.requests.values()) == errors_before
+                stats.record(stats.scenarios, name, perf_counter() - start, ok)
+        finally:
+            client.close()
+
+    async def recorder():
+        await asyncio.sleep(args.warmup)
+        stats.recording = True
+
+    deadline = perf_counter() + args.warmup + args.duration
+    await asyncio.gather(recorder(), *(virtual_user(i, deadline) for i in range(args.clients)))
+    for table in (stats.scenarios, stats.requests):
+        for result in table.values():
+            result.elapsed = args.duration
+    return stats
+
+
+def summarize(table: Dict[str, Result]) -> dict:
+    return {
+        label: {"count": len(r.latencies), "errors": r.errors, "p50": round(r.percentile(50), 2),
+                "p95": round(r.percentile(95), 2), "p99": round(r.percentile(99), 2), "per_s": round(r.rps, 2)}
+        for label, r in sorted(table.items())
+    }
+
+
+def _print_table(title: str, rows: dict, baseline: Optional[dict] = None):
+    extra = f" {'base p95':>9} {'base /s':>8}" if baseline is not None else ""
+    print(f"\n{title:<34} {'count':>7} {'errors':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'per s':>8}{extra}")
+    for label, row in rows.items():
+        line = (f"{label:<34} {row['count']:>7} {row['errors']:>6} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+                f"{row['p99']:>8.1f} {row['per_s']:>8.1f}")
+        if baseline is not None:
+            base = baseline.get(label)
+            line += f" {base['p95']:>9.1f} {base['per_s']:>8.1f}" if base else f" {'-':>9} {'-':>8}"
+        print(line)
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Regressions of `current` against `baseline`, as messages."""
+    problems = []
+    for name, base in baseline["scenarios"].items():
+        now = current["scenarios"].get(name)
+        if now is None:
+            problems.append(f"{name}: not run")
+            continue
+        if now["p95"] > base["p95"] * (1 + tolerance) and now["p95"] - base["p95"] > P95_FLOOR_MS:
+            problems.append(f"{name}: p95 {now['p95']:.1f} ms, baseline {base['p95']:.1f} ms")
+        if now["per_s"] < base["per_s"] * (1 - tolerance):
+            problems.append(f"{name}: {now['per_s']:.1f}/s, baseline {base['per_s']:.1f}/s")
+        if now["errors"] > base["errors"]:
+            problems.append(f"{name}: {now['errors']} errors, baseline {base['errors']}")
+    base_total, now_total = baseline["total"]["per_s"], current["total"]["per_s"]
+    if now_total < base_total * (1 - tolerance):
+        problems.append(f"throughput {now_total:.1f} req/s, baseline {base_total:.1f} req/s")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    datagen.add_scale_arguments(parser)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds run before measuring")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--database-url", help="an empty database to fill (default: a scratch SQLite file)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", type=Path, help="baseline file (default: by scale, clients and workers)")
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    scale = datagen.scale_from_args(args)
+    baseline_path = args.baseline or BASELINE_DIR / f"marketplace-{args.scale}-c{args.clients}-w{args.workers}.json"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{Path(tmp) / 'marketplace.db'}"
+        engine = create_engine(url)
+        migrate.upgrade(engine, configure_logger=False)
+        data = datagen.generate(engine, scale, args.seed)
+        engine.dispose()
+        print(", ".join(f"{count} {name}" for name, count in data.counts.items()))
+
+        env = {"DATABASE_URL": url, "AUTO_MIGRATE": "0", "PASSWORD_HASH_WORKERS": "0"}
+        with Server("main:app", env, port=args.port, workers=args.workers) as server:
+            stats = asyncio.run(_run(server.base_url, data, args))
+
+    requests = summarize(stats.requests)
+    total = Result(latencies=[x for r in stats.requests.values() for x in r.latencies],
+                   errors=sum(r.errors for r in stats.requests.values()), elapsed=args.duration)
+    current = {
+        "recorded": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count(), "fast_json": os.getenv("FAST_JSON", "off")},
+        "config": {"scale": args.scale, "seed": args.seed, "clients": args.clients, "workers": args.workers,
+                   "duration": args.duration, **data.counts},
+        "scenarios": summarize(stats.scenarios),
+        "requests": requests,
+        "total": summarize({"total": total})["total"],
+        "skipped": stats.skipped,
+    }
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() and not args.save_baseline else None
+    _print_table("scenario (ms)", current["scenarios"], baseline and baseline["scenarios"])
+    _print_table("request (ms)", requests, baseline and baseline["requests"])
+    _print_table("all requests (ms)", {"total": current["total"]}, baseline and {"total": baseline["total"]})
+    if stats.skipped:
+        print("\nskipped (nothing left to do): " + ", ".join(f"{k} {v}" for k, v in stats.skipped.items()))
+
+    if args.json:
+        args.json.write_text(json.dumps(current, indent=2) + "\n")
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"\nbaseline saved to {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"\nno baseline at {baseline_path}; record one with --save-baseline")
+        return 0
+
+    print(f"\nbaseline: {baseline_path.name}, recorded {baseline['recorded']} on {baseline['machine']['platform']}, "
+          f"{baseline['machine']['cpus']} CPUs")
+    problems = compare(baseline, current, args.tolerance)
+    for problem in problems:
+        print("REGRESSION " + problem)
+    if not problems:
+        print(f"no regressions (tolerance {args.tolerance:.0%})")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
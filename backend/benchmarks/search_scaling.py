@@ -0,0 +1,102 @@
+"""
+Service search latency as the catalogue grows: FTS index vs ILIKE scan.
+
+    cd backend
+    python -m benchmarks.search_scaling --sizes 1000,10000,100000,1000000
+
+Each size gets a fresh SQLite file in a temp directory. The query terms are
+planted in a fixed number of services at every size, so the FTS column
+measures index lookups and should stay roughly flat while ILIKE grows
+linearly with row count.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+from search import LikeSearch, ensure_search_index, get_search_backend
+
+WORDS = [
+    "pipe", "leak", "repair", "wiring", "switch", "fan", "paint", "wall", "deep",
+    "clean", "sofa", "carpet", "termite", "ac", "gas", "refill", "door", "lock",
+    "tap", "geyser", "install", "fridge", "washing", "machine", "tile", "grout",
+]
+QUERIES = ["chimney", "borewell", "solar", "waterproofing", "inverter"]
+HITS_PER_QUERY = 50
+
+
+def _populate(engine, n: int):
+    rng = random.Random(42)
+    planted = {i: rng.choice(QUERIES) for i in rng.sample(range(1, n + 1), min(n, HITS_PER_QUERY * len(QUERIES)))}
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Bench Provider", "email": "bench@example.com",
+             "password_hash": "x", "role": "provider"},
+        ])
+        batch = []
+        for i in range(1, n + 1):
+            batch.append({
+                "id": i,
+                "provider_id": 1,
+                "service_name": " ".join(rng.choices(WORDS, k=3)).title(),
+                "description": " ".join(rng.choices(WORDS, k=12) + [planted.get(i, "")]).strip(),
+                "min_price": rng.randint(100, 5000),
+                "category": rng.choice(["Plumbing", "Electrical", "Cleaning", "Painting"]),
+            })
+            if len(batch) == 10_000:
+                conn.execute(models.Service.__table__.insert(), batch)
+                batch.clear()
+        if batch:
+            conn.execute(models.Service.__table__.insert(), batch)
+    # Build the index after the bulk load (the same path an existing DB takes)
+    with engine.begin() as conn:
+        ensure_search_index(conn)
+
+
+def _time_query(engine, backend, raw: str, limit: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            hits = backend.matches(raw)
+            start = time.perf_counter()
+            (
+                db.query(models.Service)
+                .join(hits, hits.c.service_id == models.Service.id)
+                .order_by(hits.c.rank, models.Service.id)
+                .limit(limit)
+                .all()
+            )
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated catalogue sizes (add 1000000 for the full run)")
+    parser.add_argument("--limit", type=int, default=20, help="rows fetched per query (one results page)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'services':>10} {'backend':>18} {'median ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(s) for s in args.sizes.split(",")):
+            engine = create_engine(f"sqlite:///{Path(tmp) / f'search_{n}.db'}")
+            _populate(engine, n)
+            for backend in (get_search_backend(engine), LikeSearch()):
+                ms = statistics.mean(
+                    _time_query(engine, backend, q, args.limit, args.repeat) for q in QUERIES
+                )
+                print(f"{n:>10} {backend.name:>18} {ms:>10.2f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Serialisation cost per response schema, and the FAST_JSON routes end to end.
+
+    cd backend
+    python -m benchmarks.serialization --rows 100
+    python -m benchmarks.serialization --schemas-only
+
+For every response model in `schemas.py` (the `*Out` and `*Row` classes)
+builds `--rows` sample rows, nested models filled in, and reports the
+microseconds per row of:
+
+    attrs->json   what FastAPI does with ORM objects: validate from
+                  attributes with the list's TypeAdapter, then dump_json
+    dict->json    FAST_JSON=check: validate row dicts, then dump_json
+    dict->bytes   FAST_JSON=on: encode row dicts (orjson if installed)
+
+Then seeds a temporary SQLite database and calls each route that has a
+FAST_JSON path with it off and on, reporting the median request time and
+failing (exit status 1) if the two bodies differ.
+"""
+import argparse
+import inspect
+import os
+import statistics
+import sys
+import tempfile
+import typing
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from typing import List
+
+from pydantic import BaseModel
+
+import fastjson
+import schemas
+from settings import get_settings
+
+TEXT = "Licensed plumber with 12 years of experience in residential repairs."
+
+
+def _response_models():
+    return [
+        cls for name, cls in inspect.getmembers(schemas, inspect.isclass)
+        if issubclass(cls, BaseModel) and cls.__module__ == schemas.__name__ and name.endswith(("Out", "Row"))
+    ]
+
+
+def _sample_value(annotation, depth: int):
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union:
+        return _sample_value(args[0], depth)
+    if typing.get_origin(annotation) is typing.Annotated:
+        return _sample_value(args[0], depth)
+    if typing.get_origin(annotation) in (list, List):
+        return [_sample_value(args[0], depth) for _ in range(3)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _sample(annotation, depth + 1) if depth < 3 else None
+    return {int: 42, float: 4.5, bool: True, str: TEXT, datetime: datetime(2026, 10, 18, 9, 30, 15, 123456),
+            date: date(2026, 10, 18), time: time(10, 30)}.get(annotation, TEXT)
+
+
+def _sample(schema, depth: int = 0) -> dict:
+    return {name: _sample_value(field.annotation, depth) for name, field in schema.model_fields.items()}
+
+
+def _as_attrs(value):
+    """Nested dicts as attribute objects, like ORM instances."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _as_attrs(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_as_attrs(v) for v in value]
+    return value
+
+
+def _as_row(schema, value: dict) -> dict:
+    """What `fastjson.row_of` hands back: JSON serializers already applied."""
+    row = dict(value)
+    for name, field in schema.model_fields.items():
+        serializer = fastjson.json_serializer(field)
+        if serializer and row[name] is not None:
+            row[name] = serializer(row[name])
+        elif isinstance(row[name], dict):
+            row[name] = _as_row(fastjson._nested_model(field), row[name])
+    return row
+
+
+def _per_row_us(fn, rows: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        samples.append(perf_counter() - start)
+    return statistics.median(samples) / rows * 1e6
+
+
+def schema_costs(rows: int, repeat: int):
+    encoder = "orjson" if fastjson.orjson else "pydantic-core"
+    print(f"{'schema':>22} {'attrs->json':>12} {'dict->json':>11} {'dict->bytes':>12}   us/row, bytes by {encoder}")
+    for schema in _response_models():
+        adapter = fastjson.adapter(List[schema])
+        sample = _sample(schema)
+        objects = [_as_attrs(sample) for _ in range(rows)]
+        dicts = [sample] * rows
+        fast_rows = [_as_row(schema, sample)] * rows
+        attrs_us = _per_row_us(lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)),
+                               rows, repeat)
+        dict_us = _per_row_us(lambda: adapter.dump_json(adapter.validate_python(dicts)), rows, repeat)
+        fast_us = _per_row_us(lambda: fastjson.dumps(fast_rows), rows, repeat)
+        print(f"{schema.__name__:>22} {attrs_us:>12.2f} {dict_us:>11.2f} {fast_us:>12.2f}")
+
+
+def _seed(engine, n: int):
+    import models
+
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Bench Provider", "email": "p@example.com", "password_hash": "x", "role": "provider",
+             "location": "Pune", "mobile": "9999999999", "bio": TEXT, "avatar_url": "https://cdn.example.com/a/1.webp",
+             "avg_rating": 4.2, "rating_count": n // 4},
+            {"id": 2, "name": "Bench User", "email": "u@example.com", "password_hash": "x", "role": "user",
+             "location": "Mumbai", "mobile": None, "bio": TEXT, "avatar_url": None, "avg_rating": 0.0,
+             "rating_count": 0},
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": s, "provider_id": 1, "service_name": f"Service {s}", "description": TEXT,
+             "min_price": 99.5 * s, "category": "Plumbing"} for s in range(1, n + 1)
+        ])
+        start = date.today() - timedelta(days=n)
+        conn.execute(models.Booking.__table__.insert(), [
+            {"id": i, "user_id": 2, "provider_id": 1, "service_id": i, "problem_description": "Sink leaking",
+             "booking_date": start + timedelta(days=i), "booking_time": time(10, 30),
+             "status": "completed" if i % 2 else "pending"} for i in range(1, n + 1)
+        ])
+        conn.execute(models.Review.__table__.insert(), [
+            {"booking_id": i, "user_id": 2, "provider_id": 1, "rating": 1 + i % 5, "feedback": "Tidy work."}
+            for i in range(1, n + 1, 2)
+        ])
+
+
+def routes(n: int, limit: int, repeat: int) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'serialization.db'}"
+        os.environ["OUTBOX_WORKER"] = "0"
+        get_settings.cache_clear()   # read before the environment was set, by importing fastjson
+        from fastapi.testclient import TestClient
+
+        import database
+        import migrate
+        import response_cache
+        from auth import create_access_token
+        from main import app
+
+        migrate.upgrade(configure_logger=False)
+        _seed(database.engine, n)
+        provider = {"Authorization": f"Bearer {create_access_token({'sub': '1', 'role': 'provider'})}"}
+        user = {"Authorization": f"Bearer {create_access_token({'sub': '2', 'role': 'user'})}"}
+        client = TestClient(app)
+
+        failures = 0
+        print(f"\n{'route':>28} {'off ms':>8} {'on ms':>8} {'bytes':>8}")
+        for path, headers in [("/services/", {}), ("/services/?search=service", {}),
+                              ("/services/search?min_rating=4", {}), ("/reviews/provider/1", {}),
+                              ("/bookings/user", user), ("/bookings/provider", provider)]:
+            timings, bodies = {}, {}
+            for mode in ("off", "on"):
+                fastjson.configure(mode)
+                samples = []
+                for _ in range(repeat):
+                    response_cache.store.clear()   # time the route, not the response cache
+                    start = perf_counter()
+                    response = client.get(path, params={"limit": limit}, headers=headers)
+                    samples.append(perf_counter() - start)
+                    response.raise_for_status()
+                timings[mode] = statistics.median(samples) * 1000
+                bodies[mode] = (response.json(), response.headers.get("x-next-cursor"))
+            same = bodies["off"] == bodies["on"]
+            failures += not same
+            print(f"{path:>28} {timings['off']:>8.2f} {timings['on']:>8.2f} {len(response.content):>8}"
+                  f"{'' if same else '  BODIES DIFFER'}")
+        database.engine.dispose()
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100, help="rows per response (schemas) / page size (routes)")
+    parser.add_argument("--seed-rows", type=int, default=500, help="services, bookings and reviews to seed")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--schemas-only", action="store_true")
+    args = parser.parse_args()
+
+    schema_costs(args.rows, args.repeat)
+    if args.schemas_only:
+        return 0
+    failures = routes(args.seed_rows, args.rows, args.repeat)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
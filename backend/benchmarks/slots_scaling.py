@@ -0,0 +1,99 @@
+"""
+Free-slot computation for providers with a long booking history.
+
+    cd backend
+    python -m benchmarks.slots_scaling --bookings 1000,5000,20000
+
+Each size gets a fresh SQLite file with one provider whose bookings are
+spread over the surrounding two years, plus weekly availability windows and
+a sprinkling of holidays. Reports the median time of `free_slots()` for a
+31-day window and how many statements it sent; the statement count should
+stay at 1 and the time should track the bookings inside the window, not the
+provider's whole history.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+import migrate
+import models
+from slots import free_slots
+
+STATUSES = ["pending", "accepted", "ongoing", "completed", "rejected"]
+
+
+def _populate(engine, n: int, today: date):
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Bench Provider", "email": "p@example.com", "password_hash": "x", "role": "provider"},
+            {"id": 2, "name": "Bench User", "email": "u@example.com", "password_hash": "x", "role": "user"},
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": 1, "provider_id": 1, "service_name": "Bench", "min_price": 100, "category": "Bench"},
+        ])
+        conn.execute(models.ProviderAvailability.__table__.insert(), [
+            {"provider_id": 1, "day_of_week": d, "start_time": time(8), "end_time": time(20)} for d in range(6)
+        ])
+        taken = set()
+        rows = []
+        while len(rows) < n:
+            day = today + timedelta(days=rng.randint(-365, 365))
+            at = time(rng.randint(8, 19), rng.choice([0, 30]))
+            status = rng.choice(STATUSES)
+            # Only one active booking per slot (ux_bookings_active_slot)
+            if status in models.ACTIVE_BOOKING_STATUSES:
+                if (day, at) in taken:
+                    continue
+                taken.add((day, at))
+            rows.append({
+                "user_id": 2, "provider_id": 1, "service_id": 1,
+                "booking_date": day, "booking_time": at, "status": status,
+            })
+        conn.execute(models.Booking.__table__.insert(), rows)
+        conn.execute(models.CalendarEvent.__table__.insert(), [
+            {"provider_id": 1, "title": "Day off", "event_type": "holiday",
+             "start_datetime": datetime.combine(today + timedelta(days=d), time()), "end_datetime": None}
+            for d in range(-365, 365, 17)
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bookings", default="1000,5000,20000", help="comma-separated booking counts")
+    parser.add_argument("--days", type=int, default=31, help="length of the queried range")
+    parser.add_argument("--duration", type=int, default=30, help="slot length in minutes")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    today = date.today()
+    start, end = today, today + timedelta(days=args.days - 1)
+    print(f"{'bookings':>10} {'slots':>7} {'statements':>11} {'median ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(s) for s in args.bookings.split(",")):
+            engine = create_engine(f"sqlite:///{Path(tmp) / f'slots_{n}.db'}")
+            migrate.upgrade(engine, configure_logger=False)
+            _populate(engine, n, today)
+
+            statements = []
+            event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+            samples = []
+            for _ in range(args.repeat):
+                statements.clear()
+                with Session(engine) as db:
+                    t0 = perf_counter()
+                    slots = free_slots(db, 1, start, end, args.duration)
+                    samples.append(perf_counter() - t0)
+            print(f"{n:>10} {len(slots):>7} {len(statements):>11} {statistics.median(samples) * 1000:>10.2f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Cold-start time of the API, with an import-time breakdown.
+
+    cd backend
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --breakdown 25
+
+Each run is a fresh interpreter (as on a new serverless instance or
+container) against a temporary, already-migrated SQLite database. Reports the
+median time to import `main`, to finish the lifespan startup, and to answer
+the first `/health`, with AUTO_MIGRATE on and off. `--breakdown N` also
+prints the N slowest modules imported directly by `main` (from
+`python -X importtime`), with cumulative and self time.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+import migrate
+
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient   # not part of a real start
+t2 = time.perf_counter()
+with TestClient(main.app) as client:
+    t3 = time.perf_counter()
+    client.get("/health").raise_for_status()
+    t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "startup": t3 - t2, "first request": t4 - t3}))
+"""
+
+
+def _env(url: str, auto_migrate: bool) -> dict:
+    return {**os.environ, "DATABASE_URL": url, "AUTO_MIGRATE": "1" if auto_migrate else "0", "OUTBOX_WORKER": "0"}
+
+
+def _probe(env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", _PROBE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _breakdown(env: dict, top: int):
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         env=env, capture_output=True, text=True, check=True).stderr
+    # A module is listed after everything it imported, which is indented one
+    # level (two spaces) deeper
+    subtree, total = [], 0
+    for line in err.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2].rstrip()
+        if not name.startswith("  "):
+            if name.strip() == "main":
+                total = cumulative_us
+                break
+            subtree = []
+        elif len(name) - len(name.lstrip()) == 3:   # imported by main itself
+            subtree.append((cumulative_us, self_us, name.strip()))
+    print(f"\nimport main: {total / 1000:.1f} ms; slowest imports:")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in sorted(subtree, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--breakdown", type=int, default=0, metavar="N", help="show the N slowest direct imports of main")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'startup.db'}"
+        engine = create_engine(url)
+        migrate.upgrade(engine, configure_logger=False)
+        engine.dispose()
+
+        print(f"{'AUTO_MIGRATE':>12} {'import ms':>10} {'startup ms':>11} {'first req ms':>13} {'total ms':>9}")
+        for auto_migrate in (True, False):
+            env = _env(url, auto_migrate)
+            _probe(env)   # warm the bytecode cache, as a built image would have it
+            runs = [_probe(env) for _ in range(args.runs)]
+            median = {k: statistics.median(r[k] for r in runs) * 1000 for k in runs[0]}
+            print(f"{'on' if auto_migrate else 'off':>12} {median['import']:>10.1f} {median['startup']:>11.1f} "
+                  f"{median['first request']:>13.1f} {sum(median.values()):>9.1f}")
+
+        if args.breakdown:
+            _breakdown(_env(url, False), args.breakdown)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Small caching primitives shared by the app.
+
+`TTLCache` is a bounded, thread-safe, in-process LRU with per-entry expiry.
+`RedisCache` has the same interface on top of any Redis-compatible client
+(`get`, `set(..., ex=)`, `delete`), so several workers can share entries.
+Both count hits and misses for the metrics endpoints.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class TTLCache(_Counters):
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "size": len(self._data), "maxsize": self.maxsize, **super().stats()}
+
+
+class RedisCache(_Counters):
+    """JSON values under `prefix`; the client owns eviction (set a maxmemory policy)."""
+
+    def __init__(self, client, prefix: str, ttl: float = 60.0):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str, ttl: float = 60.0) -> "RedisCache":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("A redis:// cache URL needs the `redis` package (pip install redis)")
+        return cls(redis.Redis.from_url(url), prefix, ttl)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        seconds = max(1, int(self.ttl if ttl is None else ttl))
+        self.client.set(self._key(key), json.dumps(value), ex=seconds)
+
+    def delete(self, key: Hashable):
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", **super().stats()}
+
+
+def make_cache(url: Optional[str], prefix: str, maxsize: int, ttl: float):
+    """In-process cache unless `url` points at Redis."""
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache.from_url(url, prefix, ttl)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
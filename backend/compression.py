@@ -0,0 +1,173 @@
+"""
+Negotiated response compression.
+
+`CompressionMiddleware` compresses text-like responses (JSON, NDJSON, HTML,
+plain text, ...) with the best encoding the client lists in Accept-Encoding,
+out of COMPRESSION in its order of preference (brotli needs the optional
+`brotli` package; without it only gzip is offered). Bodies under
+COMPRESSION_MIN_BYTES are sent as they are: below about a kilobyte the
+headers and the CPU outweigh the saving. Images and anything that already has
+a Content-Encoding pass through untouched, and so do server-sent events
+(text/event-stream): the notification streams are long-lived and every
+event has to reach the client as soon as it is written.
+
+Streamed responses (e.g. NDJSON lists) are compressed as they go, flushed at
+the end of every chunk the app sends, so the client can start on the first
+rows while the rest are still being read.
+
+A compressed body is a different representation of the resource, so its ETag
+is made weak (W/"..."); If-None-Match uses the weak comparison, so the
+response cache still answers 304 to it. Every response that could have been
+compressed carries `Vary: Accept-Encoding` for shared caches.
+"""
+import zlib
+from typing import Optional
+
+from settings import get_settings
+
+try:
+    import brotli
+except ImportError:   # optional: gzip is offered on its own
+    brotli = None
+
+COMPRESSION = tuple(e for e in get_settings().compression if e != "br" or brotli is not None)
+COMPRESSION_MIN_BYTES = get_settings().compression_min_bytes
+
+# Cheap settings: the bodies are JSON, where higher levels gain little for the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                      "application/xml", "image/svg+xml")
+# Matched by COMPRESSIBLE_TYPES but always sent as they are
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+def negotiate(accept_encoding: str, offered=None) -> Optional[str]:
+    """The first of `offered` (default COMPRESSION) that `accept_encoding` accepts, or None."""
+    offered = COMPRESSION if offered is None else offered
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name.strip().lower()] = q
+    star = weights.get("*", 0.0)
+    for encoding in offered:
+        if weights.get(encoding, star) > 0:
+            return encoding
+    return None
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress `data` and flush, so what was sent so far can be decoded."""
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    return next((v for k, v in headers if k.lower() == name), None)
+
+
+def _weak(etag: bytes) -> bytes:
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_bytes: int = None):
+        self.app = app
+        self.min_bytes = COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not COMPRESSION:
+            return await self.app(scope, receive, send)
+        accept = _header(scope["headers"], b"accept-encoding")
+        encoding = negotiate(accept.decode("latin-1")) if accept else None
+
+        start = None
+        encoder = None      # set once the body is being compressed
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = message.get("headers", [])
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                if message["status"] == 304:
+                    # No body (nor, from the response cache, a type): describe the
+                    # representation the client would have been sent
+                    passthrough = True
+                    return await send(_with_headers(message, vary=True, weak_etag=encoding is not None))
+                if (message["status"] in (204, 206) or _header(headers, b"content-encoding") is not None
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or content_type.startswith(UNCOMPRESSED_TYPES)):
+                    passthrough = True
+                    return await send(message)
+                return   # held until the first body chunk shows whether (and how) to compress
+
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+            body, more = message.get("body", b""), message.get("more_body", False)
+
+            if encoder is None:
+                if encoding is None or (not more and len(body) < self.min_bytes):
+                    passthrough = True
+                    await send(_with_headers(start, vary=True))
+                    return await send(message)
+                encoder = _Encoder(encoding)
+                if not more:
+                    compressed = encoder.finish(body)
+                    await send(_with_headers(start, vary=True, weak_etag=True, encoding=encoding,
+                                             length=len(compressed)))
+                    return await send({"type": "http.response.body", "body": compressed})
+                await send(_with_headers(start, vary=True, weak_etag=True, encoding=encoding))
+
+            data = encoder.chunk(body) if more else encoder.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _with_headers(start, vary=False, weak_etag=False, encoding: str = None, length: int = None):
+    headers = []
+    for key, value in start.get("headers", []):
+        name = key.lower()
+        if encoding is not None and name == b"content-length":
+            continue
+        if weak_etag and name == b"etag":
+            value = _weak(value)
+        if vary and name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                value += b", Accept-Encoding"
+            vary = False
+        headers.append((key, value))
+    if vary:
+        headers.append((b"vary", b"Accept-Encoding"))
+    if encoding is not None:
+        headers.append((b"content-encoding", encoding.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+    return {**start, "headers": headers}
@@ -1,32 +1,195 @@
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, status
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from functools import lru_cache
+import itertools
+from starlette.concurrency import run_in_threadpool
+import anyio
 
-load_dotenv()
+from settings import get_settings
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./skillbridge.db")
+settings = get_settings()
 
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+DATABASE_URL = settings.database_url
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    pool_pre_ping=True,    # re-test connection before use (fixes Neon idle drops)
-    pool_recycle=300,      # recycle connections every 5 min
-)
+# Read replicas (comma-separated URLs) for the read-only routes; see get_read_db
+DATABASE_REPLICA_URLS = list(settings.database_replica_urls)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DB_POOL_SIZE = settings.db_pool_size
+DB_MAX_OVERFLOW = settings.db_max_overflow
+DB_POOL_TIMEOUT = settings.db_pool_timeout
+DB_POOL_RECYCLE = settings.db_pool_recycle
+# "always": test every connection on checkout (one extra round-trip, survives
+# servers that drop idle connections, e.g. Neon). "never": rely on
+# DB_POOL_RECYCLE being shorter than the server's idle timeout; a connection
+# that still turns out dead fails that one request and the pool is refreshed.
+DB_PRE_PING = settings.db_pre_ping
 
-Base = declarative_base()
 
+def _engine_options(url: str) -> dict:
+    options = dict(
+        pool_pre_ping=DB_PRE_PING == "always",
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    return options
 
-def get_db():
-    db = SessionLocal()
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+replica_engines = [create_engine(url, **_engine_options(url)) for url in DATABASE_REPLICA_URLS]
+_next_replica = itertools.cycle(replica_engines)
+
+
+class RoutingSession(Session):
+    """
+    Sends everything to the primary, except the reads of a session marked
+    `info["read_only"]`, which go to one replica (picked round-robin, then
+    kept for the session's lifetime). Flushes always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("read_only") and replica_engines and not self._flushing:
+            if "replica" not in self.info:
+                self.info["replica"] = next(_next_replica)
+            return self.info["replica"]
+        return engine
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+
+# A request holds its session's connection across several threadpool hops
+# (auth dependency, endpoint, ...). If more requests than the pool can serve
+# start at once, they all block worker threads on checkout while the
+# requests that own connections wait for a free thread: a deadlock until
+# pool_timeout. Admitting at most pool-capacity requests per engine, and
+# queueing the rest on the event loop, keeps every checkout immediate. Each
+# engine (all built with _engine_options) has its own slots, so every replica
+# adds capacity. A request that waits DB_POOL_TIMEOUT for a slot gets a 503,
+# as a checkout that timed out would have failed it anyway.
+_db_slots = {e: anyio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW) for e in [engine, *replica_engines]}
+RETRY_AFTER_SECONDS = 1
+
+
+@asynccontextmanager
+async def _slot(bind: Engine):
+    slots = _db_slots[bind]
     try:
-        yield db
+        with anyio.fail_after(DB_POOL_TIMEOUT):
+            await slots.acquire()
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The database is busy, please try again in a moment",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    try:
+        yield
     finally:
-        db.close()
+        slots.release()
+
+
+async def get_db():
+    async with _slot(engine):
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def get_read_db():
+    """
+    Like get_db, for routes that only read. Served by a replica when
+    DATABASE_REPLICA_URLS is set, so results may lag the primary by the
+    replication delay; don't use it where a user must see their own writes.
+    """
+    info = {"read_only": True}
+    if replica_engines:
+        # Picked here rather than on first use, to wait on that replica's slots
+        info["replica"] = next(_next_replica)
+    async with _slot(info.get("replica", engine)):
+        db = SessionLocal(info=info)
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+# ── Async engine (aiosqlite locally, asyncpg on Postgres) ─────────────────────
+
+def _async_url_and_args(url: str):
+    url = make_url(url)
+    connect_args = {}
+    if url.drivername.startswith("sqlite"):
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif url.drivername.startswith(("postgres", "postgresql")):
+        # asyncpg takes `ssl` instead of libpq's `sslmode` (used by Neon URLs)
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = True
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+    return url, connect_args
+
+
+_async_engines = {}
+
+
+@lru_cache
+def _async_sessionmaker_for(url: str) -> async_sessionmaker:
+    async_url, connect_args = _async_url_and_args(url)
+    options = _engine_options(url)
+    options["connect_args"] = connect_args
+    async_engine = _async_engines[url] = create_async_engine(async_url, **options)
+    return async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Created on first use so the sync-only paths never need the async drivers."""
+    return _async_sessionmaker_for(DATABASE_URL)
+
+
+_next_async_replica = itertools.cycle(DATABASE_REPLICA_URLS)
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Async counterpart of get_read_db."""
+    url = next(_next_async_replica) if DATABASE_REPLICA_URLS else DATABASE_URL
+    async with _async_sessionmaker_for(url)() as db:
+        yield db
+
+
+def pool_stats() -> dict:
+    """Per pool: configured size and connections checked out, overflowing and idle."""
+    engines = {"primary": engine}
+    engines.update({f"replica{i}": e for i, e in enumerate(replica_engines)})
+    for url, async_engine in list(_async_engines.items()):
+        name = "primary" if url == DATABASE_URL else f"replica{DATABASE_REPLICA_URLS.index(url)}"
+        engines[f"{name}_async"] = async_engine.sync_engine
+    stats = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        if not hasattr(pool, "overflow"):
+            continue   # not a queue pool (e.g. SQLite :memory:)
+        stats[name] = {
+            "size": pool.size(),
+            "max": pool.size() + DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "idle": pool.checkedin(),
+        }
+    return stats
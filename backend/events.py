@@ -0,0 +1,122 @@
+"""
+In-process pub/sub for pushing notifications to connected clients.
+
+New `Notification` rows are picked up from the ORM session as they are
+flushed and published once the transaction commits, so producers (bookings,
+reviews, ...) don't need to know about the stream. A rolled-back transaction
+publishes nothing.
+
+`InProcessBroker` only reaches subscribers in the same worker process. To fan
+out across several workers, implement the same two methods on top of a real
+broker (Redis pub/sub, Postgres LISTEN/NOTIFY, ...) and install it with
+`set_broker()` at startup.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+
+# Events a slow client can fall behind by before older ones are dropped;
+# the unread count is re-read on every wake-up, so only toasts are lost.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class InProcessBroker:
+    """Per-user fan-out to asyncio queues; `publish` is safe from any thread."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id: int, message: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(self._put, queue, message)
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, message: dict):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        entry = (asyncio.get_running_loop(), asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[user_id].add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(entry)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._subscribers),
+                "connections": sum(len(s) for s in self._subscribers.values()),
+            }
+
+
+broker = InProcessBroker()
+
+
+def set_broker(new_broker):
+    """Swap in another broker with the same `publish`/`subscribe` interface."""
+    global broker
+    broker = new_broker
+
+
+def notification_payload(notif: models.Notification) -> dict:
+    """Same shape as an item of `GET /notifications/`."""
+    return schemas.NotificationOut.model_validate(notif).model_dump(mode="json")
+
+
+def publish_unread_changed(user_id: int):
+    """Tell a user's open streams to re-read their unread count."""
+    broker.publish(user_id, {"type": "unread"})
+
+
+# ── Session hooks: collect on flush, publish on commit ─────────────────────────
+# Payloads are built at flush time, while the attributes are still loaded;
+# after commit they are expired and reading them would hit the database.
+
+_PENDING_KEY = "pending_notification_events"
+
+
+def queue_notifications(session: Session, notifications):
+    """Publish `notifications` when `session` commits.
+
+    Flushed ORM objects are picked up automatically; this is for rows written
+    with a bulk `insert(models.Notification).returning(models.Notification)`,
+    which bypasses the unit of work.
+    """
+    session.info.setdefault(_PENDING_KEY, []).extend(
+        (n.user_id, notification_payload(n)) for n in notifications
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_notifications(session, flush_context):
+    queue_notifications(session, [obj for obj in session.new if isinstance(obj, models.Notification)])
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_notifications(session):
+    for user_id, payload in session.info.pop(_PENDING_KEY, ()):
+        broker.publish(user_id, {"type": "notification", "notification": payload})
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_notifications(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
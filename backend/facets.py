@@ -0,0 +1,325 @@
+"""
+In-memory facet index for service search.
+
+Every worker keeps, per facet value (category, price bucket, provider rating
+bucket), the set of matching service ids as a bitset (a Python int, bit n =
+service n). Counting a facet under the other filters is then an AND and a
+popcount per value, with no GROUP BY: `/services/search` returns its counts
+from here and only runs SQL for the page of results.
+
+The index is loaded with one query on first use. Services created, edited or
+deleted through the ORM, and providers whose rating changes
+(`mark_provider`), are re-read by id on the next lookup after their
+transaction commits; nothing is applied for a rollback. A change made by
+another worker (or outside the app) is picked up by the full reload every
+FACET_INDEX_TTL seconds, the same bound the response cache has. One request
+does the reload while the others keep using the previous index; what is
+marked while it loads is re-read into the new index before it is swapped in.
+The database is never queried while holding the lock that lookups take.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session
+
+import database
+import models
+from settings import get_settings
+
+FACET_INDEX_TTL = get_settings().facet_index_ttl
+
+# Lower edges of the price buckets (the last one is open-ended)
+PRICE_BUCKET_EDGES = (0.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+# Rating facets are "at least N stars"; avg_rating is bucketed by whole stars
+MIN_RATINGS = (4, 3, 2, 1)
+_RATING_BUCKETS = 5     # 0 (unrated or under 1) .. 4 (4 to 5 stars)
+
+
+def _price_bucket(price: float) -> int:
+    return max(0, bisect.bisect_right(PRICE_BUCKET_EDGES, price) - 1)
+
+
+def _rating_bucket(avg_rating: Optional[float]) -> int:
+    return min(_RATING_BUCKETS - 1, max(0, int(avg_rating or 0)))
+
+
+def bitset(ids: Iterable[int]) -> int:
+    """Bitset of `ids`, built in a bytearray (OR-ing into an int copies it every time)."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+class FacetIndex:
+    def __init__(self, rows: Iterable[tuple] = ()):
+        # id -> (category, price, rating bucket)
+        self.services: Dict[int, Tuple[str, float, int]] = {}
+        # (price, id) per price bucket, sorted, to cut ranges that end mid-bucket
+        self.price_order: List[List[Tuple[float, int]]] = [[] for _ in PRICE_BUCKET_EDGES]
+
+        by_category: Dict[str, List[int]] = {}
+        by_rating: List[List[int]] = [[] for _ in range(_RATING_BUCKETS)]
+        for service_id, category, price, avg_rating in rows:
+            rating = _rating_bucket(avg_rating)
+            self.services[service_id] = (category, price, rating)
+            by_category.setdefault(category, []).append(service_id)
+            by_rating[rating].append(service_id)
+            self.price_order[_price_bucket(price)].append((price, service_id))
+        for order in self.price_order:
+            order.sort()
+
+        self.categories: Dict[str, int] = {name: bitset(ids) for name, ids in by_category.items()}
+        self.prices: List[int] = [bitset(i for _, i in order) for order in self.price_order]
+        self.ratings: List[int] = [bitset(ids) for ids in by_rating]
+        self.all = bitset(self.services)
+
+    # ── Maintenance ────────────────────────────────────────────────────────────
+
+    def remove(self, service_id: int):
+        entry = self.services.pop(service_id, None)
+        if entry is None:
+            return
+        category, price, rating = entry
+        bit = ~(1 << service_id)
+        self.categories[category] &= bit
+        if not self.categories[category]:
+            del self.categories[category]
+        bucket = _price_bucket(price)
+        self.prices[bucket] &= bit
+        order = self.price_order[bucket]
+        del order[bisect.bisect_left(order, (price, service_id))]
+        self.ratings[rating] &= bit
+        self.all &= bit
+
+    def add(self, service_id: int, category: str, price: float, avg_rating: Optional[float]):
+        self.remove(service_id)
+        rating = _rating_bucket(avg_rating)
+        self.services[service_id] = (category, price, rating)
+        bit = 1 << service_id
+        self.categories[category] = self.categories.get(category, 0) | bit
+        bucket = _price_bucket(price)
+        self.prices[bucket] |= bit
+        bisect.insort(self.price_order[bucket], (price, service_id))
+        self.ratings[rating] |= bit
+        self.all |= bit
+
+    # ── Lookups ────────────────────────────────────────────────────────────────
+
+    def price_range(self, low: Optional[float], below: Optional[float]) -> int:
+        """Services priced from `low` up to, not including, `below` (like the buckets)."""
+        low = 0.0 if low is None else low
+        mask = 0
+        for bucket, start in enumerate(PRICE_BUCKET_EDGES):
+            end = PRICE_BUCKET_EDGES[bucket + 1] if bucket + 1 < len(PRICE_BUCKET_EDGES) else None
+            if (end is not None and end <= low) or (below is not None and start >= below):
+                continue
+            if start >= low and (below is None or (end is not None and end <= below)):
+                mask |= self.prices[bucket]
+                continue
+            order = self.price_order[bucket]
+            lo = bisect.bisect_left(order, (low, -1))
+            hi = len(order) if below is None else bisect.bisect_left(order, (below, -1))
+            if hi - lo <= len(order) // 2:
+                mask |= bitset(service_id for _, service_id in order[lo:hi])
+            else:   # fewer bits to build for the part that's left out
+                mask |= self.prices[bucket] & ~bitset(service_id for _, service_id in order[:lo] + order[hi:])
+        return mask
+
+    def min_rating(self, stars: int) -> int:
+        mask = 0
+        for bucket in self.ratings[stars:]:
+            mask |= bucket
+        return mask
+
+    def counts(
+        self,
+        category: Optional[str] = None,
+        price_min: Optional[float] = None,
+        price_below: Optional[float] = None,
+        min_rating: Optional[int] = None,
+        within: Optional[int] = None,
+    ) -> dict:
+        """
+        Matching total, and counts per facet value. Each facet is counted
+        under every filter except its own, so the other values of a facet
+        that is already filtered on still show what choosing them would give.
+        `within` restricts everything to a bitset of ids (e.g. text matches).
+        """
+        base = self.all if within is None else self.all & within
+        by_category = self.categories.get(category, 0) if category else base
+        by_price = self.price_range(price_min, price_below) if price_min is not None or price_below is not None else base
+        by_rating = self.min_rating(min_rating) if min_rating else base
+
+        not_category = base & by_price & by_rating
+        not_price = base & by_category & by_rating
+        not_rating = base & by_category & by_price
+        edges = PRICE_BUCKET_EDGES
+        return {
+            "total": (not_category & by_category).bit_count(),
+            "facets": {
+                "category": [
+                    {"value": name, "count": (mask & not_category).bit_count()}
+                    for name, mask in sorted(self.categories.items())
+                ],
+                "price": [
+                    {"min": edges[i], "max": edges[i + 1] if i + 1 < len(edges) else None,
+                     "count": (mask & not_price).bit_count()}
+                    for i, mask in enumerate(self.prices)
+                ],
+                "rating": [
+                    {"min_rating": stars, "count": (self.min_rating(stars) & not_rating).bit_count()}
+                    for stars in MIN_RATINGS
+                ],
+            },
+        }
+
+
+# ── The worker's index ─────────────────────────────────────────────────────────
+
+_index: Optional[FacetIndex] = None
+_loaded_at = 0.0
+_lock = threading.Lock()          # guards _index, _loaded_at and the marks; never held over a query
+_refresh_lock = threading.Lock()  # one re-read of marked ids at a time, so an older read can't win
+_reload_lock = threading.Lock()   # one full reload at a time
+_dirty_services: Set[int] = set()
+_dirty_providers: Set[int] = set()
+# Marks made while a full reload is loading; None when none is
+_marked_during_reload: Optional[Tuple[Set[int], Set[int]]] = None
+_reloads = 0
+
+
+def _rows(services: Iterable[int] = (), providers: Iterable[int] = ()):
+    Service, User = models.Service, models.User
+    query = select(Service.id, Service.category, Service.min_price, User.avg_rating).join(
+        User, User.id == Service.provider_id
+    )
+    if services or providers:
+        query = query.where(or_(Service.id.in_(list(services)), Service.provider_id.in_(list(providers))))
+    # Always the primary: a lagging replica would miss a service that was just created
+    with database.engine.connect() as conn:
+        return conn.execute(query).all()
+
+
+def _apply(index: FacetIndex, services: Set[int], rows):
+    """Bring `index` in line with `rows`, re-read for `services` (gone if absent) and some providers."""
+    for service_id in services - {row[0] for row in rows}:
+        index.remove(service_id)
+    for row in rows:
+        index.add(*row)
+
+
+def _reload():
+    global _index, _loaded_at, _reloads, _marked_during_reload
+    with _lock:
+        # The full read covers what was marked so far
+        _dirty_services.clear()
+        _dirty_providers.clear()
+        _marked_during_reload = (set(), set())
+    index = FacetIndex(_rows())
+    with _refresh_lock:
+        # A change committed while loading may be missing from the rows (or be
+        # applied to the old index only): re-read it into the new one. Marks
+        # made from here on stay dirty and are applied after the swap.
+        with _lock:
+            services, providers = _marked_during_reload
+            _marked_during_reload = None
+        if services or providers:
+            _apply(index, services, _rows(services, providers))
+        with _lock:
+            _index, _loaded_at = index, time.monotonic()
+            _reloads += 1
+
+
+def current() -> FacetIndex:
+    """This worker's index, brought up to date. Call from a worker thread, not the event loop."""
+    if _index is None:
+        with _reload_lock:
+            if _index is None:
+                _reload()
+    elif time.monotonic() - _loaded_at > FACET_INDEX_TTL and _reload_lock.acquire(blocking=False):
+        try:
+            _reload()
+        finally:
+            _reload_lock.release()
+
+    if _dirty_services or _dirty_providers:
+        with _refresh_lock:
+            with _lock:
+                services, providers = set(_dirty_services), set(_dirty_providers)
+                _dirty_services.clear()
+                _dirty_providers.clear()
+            if services or providers:
+                rows = _rows(services, providers)
+                with _lock:
+                    _apply(_index, services, rows)
+    return _index
+
+
+def counts(**filters) -> dict:
+    index = current()
+    with _lock:
+        return index.counts(**filters)
+
+
+def categories() -> List[str]:
+    index = current()
+    with _lock:
+        return sorted(index.categories)
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "services": len(_index.services) if _index else 0,
+            "age_seconds": round(time.monotonic() - _loaded_at, 1) if _index else None,
+            "reloads": _reloads,
+            "pending": len(_dirty_services) + len(_dirty_providers),
+        }
+
+
+# ── Session hooks: collect on flush, apply after commit ────────────────────────
+
+_PENDING_KEY = "pending_facet_changes"
+
+
+def _pending(session: Session) -> Tuple[Set[int], Set[int]]:
+    return session.info.setdefault(_PENDING_KEY, (set(), set()))
+
+
+def mark_provider(session: Session, provider_id: int):
+    """Re-read the provider's services (e.g. after a rating change) once `session` commits."""
+    _pending(session)[1].add(provider_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_services(session, flush_context):
+    changed = [
+        obj.id for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, models.Service)
+    ]
+    if changed:
+        _pending(session)[0].update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    services, providers = session.info.pop(_PENDING_KEY, (set(), set()))
+    if services or providers:
+        with _lock:
+            _dirty_services.update(services)
+            _dirty_providers.update(providers)
+            if _marked_during_reload is not None:
+                _marked_during_reload[0].update(services)
+                _marked_during_reload[1].update(providers)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_changes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,182 @@
+"""
+Opt-in fast path for the big list responses.
+
+By default a list route returns ORM objects: SQLAlchemy builds an instance
+(and identity-map entry) per row and joined relationship, then FastAPI
+validates each one against the nested response model with
+`from_attributes`, one instrumented attribute read per field, before
+encoding. With FAST_JSON on, the routes that support it select exactly the
+columns of their response model as plain dicts instead (`row_of`), and
+`response()` encodes those with orjson, or with pydantic-core's encoder when
+orjson isn't installed. Nothing is validated on the way out: the rows take
+their shape from the schema itself, and fields with a JSON serializer (e.g.
+`ClockTime`) are converted as they are read.
+
+FAST_JSON selects the mode:
+
+    off    (default) ORM objects and FastAPI's response validation
+    on     row dicts, encoded directly
+    check  row dicts, validated against the response model (with a cached
+           TypeAdapter) before encoding: catches a row that drifted from its
+           schema, at about the cost of the default path; for development
+
+The same rows back the NDJSON streams (`ndjson()`, see pagination.py),
+whatever the mode.
+
+`benchmarks/serialization.py` times every schema and compares both paths
+end to end.
+"""
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+import pydantic_core
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, PlainSerializer, TypeAdapter
+from sqlalchemy.orm import Bundle, ColumnProperty, RelationshipProperty
+
+from pagination import NDJSON_MEDIA_TYPE
+from settings import get_settings
+
+try:
+    import orjson
+except ImportError:   # optional: pydantic-core's encoder is nearly as fast
+    orjson = None
+
+FAST_JSON = get_settings().fast_json
+ENABLED = FAST_JSON in ("on", "check")
+
+
+def configure(mode: str):
+    """Change the mode at runtime (scripts and benchmarks)."""
+    global FAST_JSON, ENABLED
+    FAST_JSON, ENABLED = mode, mode in ("on", "check")
+
+
+@lru_cache(maxsize=None)
+def adapter(tp) -> TypeAdapter:
+    """TypeAdapter for a response type; building one compiles its validator, so keep them."""
+    return TypeAdapter(tp)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def response(tp, rows, headers_from: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Encode `rows` (built by `row_of`) as the response type `tp`. Headers set
+    on `headers_from`, the route's injected Response (e.g. the pagination
+    cursor), are carried over: a returned Response replaces it.
+    """
+    if FAST_JSON == "check":
+        adapter(tp).validate_python(rows)
+    result = FastJSONResponse(rows)
+    if headers_from is not None:
+        result.raw_headers.extend(h for h in headers_from.raw_headers if h[0] != b"content-length")
+    return result
+
+
+def ndjson(tp, batches: Iterable[list], from_attributes: bool = False) -> StreamingResponse:
+    """
+    Stream `batches` (from `pagination.stream_rows`) as NDJSON, one `tp` per
+    line and one chunk per batch. Rows are `row_of` dicts, encoded directly
+    (validated first in check mode), or with `from_attributes` ORM objects,
+    validated like a normal response.
+    """
+    def lines():
+        for batch in batches:
+            if from_attributes:
+                items = adapter(List[tp]).validate_python(batch, from_attributes=True)
+                yield b"".join(adapter(tp).dump_json(item) + b"\n" for item in items)
+                continue
+            if FAST_JSON == "check":
+                adapter(List[tp]).validate_python(batch)
+            yield b"".join(dumps(row) + b"\n" for row in batch)
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+# ── Selecting rows in the shape of a schema ────────────────────────────────────
+
+class Row(Bundle):
+    """Bundle that comes back as a dict, or None when its first column (an outer-joined id) is NULL."""
+
+    def __init__(self, name, *exprs, defaults: Optional[Dict[str, Any]] = None, convert=None, **kw):
+        super().__init__(name, *exprs, **kw)
+        self.defaults = defaults or {}
+        self.convert = convert or {}
+
+    def create_row_processor(self, query, procs, labels):
+        defaults, convert = self.defaults, self.convert
+
+        def proc(row):
+            values = [p(row) for p in procs]
+            if values[0] is None:
+                return None
+            item = dict(defaults)
+            item.update(zip(labels, values))
+            for label, fn in convert.items():
+                if item[label] is not None:
+                    item[label] = fn(item[label])
+            return item
+        return proc
+
+
+def json_serializer(field) -> Optional[typing.Callable]:
+    """A field's `PlainSerializer` for JSON, also when wrapped in Optional[...]."""
+    metadata = list(field.metadata)
+    for arg in typing.get_args(field.annotation):
+        metadata.extend(getattr(arg, "__metadata__", ()))
+    for item in metadata:
+        if isinstance(item, PlainSerializer) and item.when_used in ("always", "json", "json-unless-none"):
+            return item.func
+    return None
+
+
+def _nested_model(field) -> type:
+    for tp in (field.annotation, *typing.get_args(field.annotation)):
+        if isinstance(tp, type) and issubclass(tp, BaseModel):
+            return tp
+    raise TypeError(f"{field.annotation} is not a model")
+
+
+def row_of(schema: type, entity, name: str = "row", **nested) -> Row:
+    """
+    A `Row` selecting `schema`'s fields from `entity` (a model or an alias).
+    Each relationship field in the schema must be given as `field=entity`
+    (the caller joins it) or `field=(entity, {its nested fields})`, or as
+    `field=None` to leave it at the schema's default; anything else that is
+    not a column also keeps its default (e.g. `UserOut.distance_km`).
+    """
+    exprs, defaults, convert = [], {}, {}
+    for field_name, field in schema.model_fields.items():
+        attr = getattr(entity, field_name, None)
+        prop = getattr(attr, "property", None)
+        if field_name in nested:
+            target = nested[field_name]
+            if target is None:
+                defaults[field_name] = field.get_default(call_default_factory=True)
+                continue
+            target, deeper = target if isinstance(target, tuple) else (target, {})
+            exprs.append(row_of(_nested_model(field), target, field_name, **deeper))
+        elif isinstance(prop, ColumnProperty):
+            exprs.append(attr)
+            serializer = json_serializer(field)
+            if serializer is not None:
+                convert[field_name] = serializer
+        elif isinstance(prop, RelationshipProperty):
+            raise ValueError(f"{schema.__name__}.{field_name} is a relationship: pass {field_name}= to row_of")
+        else:
+            defaults[field_name] = field.get_default(call_default_factory=True)
+    return Row(name, *exprs, defaults=defaults, convert=convert)
@@ -0,0 +1,200 @@
+"""
+Provider coordinates and "near me" search.
+
+A user's free-text `location` ("Kothrud, Pune") is geocoded offline against
+the bundled gazetteer (data/gazetteer.csv: Indian cities and a few busy
+neighbourhoods, with common alternative names) whenever it is set or changed,
+through mapper events, so no router has to remember to do it. Unknown places
+leave the coordinates empty; those users can still be found by the
+`location` substring filter.
+
+Each located user also stores the geohash of their point, indexed together
+with `role`. A radius query covers the circle's bounding box with at most
+MAX_COVER_CELLS geohash cells, each of which is one index range scan.
+The candidates are then filtered and ordered by squared equirectangular
+distance (plain arithmetic, so it runs on SQLite and Postgres alike and can
+be a keyset pagination key). That approximation is well under 1% off at
+these radii; it is not meant for the poles or across the 180th meridian.
+"""
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, event, inspect, or_
+
+import models
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "gazetteer.csv"
+GEOHASH_PRECISION = 9          # ~5 m cells, far finer than a city-level point
+DEFAULT_RADIUS_KM = 25.0
+MAX_RADIUS_KM = 500.0
+# More, smaller cells read fewer rows outside the circle but cost an index probe each
+MAX_COVER_CELLS = 16
+KM_PER_DEGREE = 111.32
+
+Point = Tuple[float, float]
+
+
+# ── Gazetteer ──────────────────────────────────────────────────────────────────
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> Dict[str, Point]:
+    places = {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            point = (float(row["latitude"]), float(row["longitude"]))
+            for name in [row["name"], *filter(None, row["aliases"].split("|"))]:
+                places[_normalize(name)] = point
+    return places
+
+
+def geocode(location: Optional[str]) -> Optional[Point]:
+    """
+    (lat, lng) of the most specific known place in `location`, or None.
+    Comma-separated parts are tried left to right ("Area, City, State"), each
+    as a whole and then by its longest run of words that names a place.
+    """
+    if not location:
+        return None
+    places = _gazetteer()
+    for part in location.split(","):
+        words = _normalize(part).split()
+        for size in range(min(len(words), 3), 0, -1):
+            for start in range(len(words) - size + 1):
+                point = places.get(" ".join(words[start:start + size]))
+                if point is not None:
+                    return point
+    return None
+
+
+# ── Geohash ────────────────────────────────────────────────────────────────────
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, value, bits, use_lng = [], 0, 0, True
+    while len(chars) < precision:
+        bounds, coordinate = (lng_range, lng) if use_lng else (lat_range, lat)
+        mid = (bounds[0] + bounds[1]) / 2
+        if coordinate >= mid:
+            value, bounds[0] = value * 2 + 1, mid
+        else:
+            value, bounds[1] = value * 2, mid
+        use_lng = not use_lng
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            value = bits = 0
+    return "".join(chars)
+
+
+def _cell_degrees(precision: int) -> Tuple[float, float]:
+    """(height, width) of a geohash cell in degrees."""
+    lng_bits = (5 * precision + 1) // 2
+    return 180.0 / 2 ** (5 * precision - lng_bits), 360.0 / 2 ** lng_bits
+
+
+def covering_cells(lat: float, lng: float, radius_km: float) -> List[str]:
+    """
+    Geohash prefixes whose cells together contain the whole circle: every
+    cell touching its bounding box, at the finest precision that needs no
+    more than MAX_COVER_CELLS of them.
+    """
+    lat_span = radius_km / KM_PER_DEGREE
+    # Longitude degrees are shortest on the edge farthest from the equator
+    edge_lat = min(89.9, abs(lat) + lat_span)
+    lng_span = min(180.0, radius_km / (KM_PER_DEGREE * math.cos(math.radians(edge_lat))))
+    south, north = max(-90.0, lat - lat_span), min(90.0 - 1e-9, lat + lat_span)
+    west, east = lng - lng_span, lng + lng_span
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_degrees(precision)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        columns = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * columns <= MAX_COVER_CELLS or precision == 1:
+            break
+    cells = set()
+    for row in range(rows):
+        y = min(north, south + row * height)
+        for column in range(columns):
+            x = min(east, west + column * width)
+            cells.add(geohash(y, (x + 180.0) % 360.0 - 180.0, precision))
+    return sorted(cells)
+
+
+# ── Queries ────────────────────────────────────────────────────────────────────
+
+def parse_point(value: str) -> Point:
+    """`near=` value: "lat,lng", or a place name from the gazetteer."""
+    lat_text, _, lng_text = value.partition(",")
+    try:
+        lat, lng = float(lat_text), float(lng_text)
+    except ValueError:
+        point = geocode(value)
+        if point is None:
+            raise HTTPException(status_code=400, detail=f"Unknown place: {value!r}; pass near=lat,lng")
+        return point
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise HTTPException(status_code=400, detail="near must be lat,lng in degrees")
+    return lat, lng
+
+
+def providers_within(lat: float, lng: float, radius_km: float):
+    """
+    (condition, squared distance in km²) for providers within `radius_km` of
+    the point. Sort by the second to get nearest first.
+    """
+    user = models.User
+    # role in every branch, so each one is a range scan of ix_users_role_geohash
+    in_cells = or_(*(
+        and_(user.role == "provider", user.geohash >= cell, user.geohash < cell + "~")
+        for cell in covering_cells(lat, lng, radius_km)
+    ))
+    lng_scale = KM_PER_DEGREE * math.cos(math.radians(lat))
+    dy = (user.latitude - lat) * KM_PER_DEGREE
+    dx = (user.longitude - lng) * lng_scale
+    distance_sq = dy * dy + dx * dx
+    return and_(in_cells, distance_sq <= radius_km * radius_km), distance_sq
+
+
+def distance_km(a: Point, b: Point) -> float:
+    """Great-circle distance (haversine)."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(h))
+
+
+def annotate_distance(users: Iterable[models.User], origin: Point):
+    """Set `distance_km` (shown by UserOut) on located users."""
+    for user in users:
+        if user.latitude is not None:
+            user.distance_km = round(distance_km(origin, (user.latitude, user.longitude)), 2)
+
+
+# ── Keeping coordinates in step with `location` ────────────────────────────────
+
+def _locate(user: models.User):
+    point = geocode(user.location)
+    user.latitude, user.longitude = point if point else (None, None)
+    user.geohash = geohash(*point) if point else None
+
+
+@event.listens_for(models.User, "before_insert")
+def _locate_new_user(mapper, connection, user):
+    _locate(user)
+
+
+@event.listens_for(models.User, "before_update")
+def _relocate_user(mapper, connection, user):
+    if inspect(user).attrs.location.history.has_changes():
+        _locate(user)
@@ -1,42 +1,86 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
 
 import models
-from database import engine, SessionLocal, get_db
+from auth import auth_cache_stats
+import compression
+import database
+import facets
+from database import get_async_read_db
+from pagination import NEXT_CURSOR_HEADER
+import metrics
+import nplusone  # noqa: F401  (registers the lazy-load listener)
+import outbox
+import passwords
+import response_cache
+from settings import get_settings
+
+from routers import auth, users, services, bookings, reviews, calendar, notifications, availability, media
+
+settings = get_settings()
+
+# Set to 0 when the outbox worker runs as its own process (python -m outbox)
+OUTBOX_WORKER = settings.outbox_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.auto_migrate:
+        # Bring the schema up to date (Alembic, see migrations/). Production
+        # should set AUTO_MIGRATE=0 and run `python migrate.py` before starting
+        # the app, which keeps Alembic and a DB round-trip out of every cold start.
+        import migrate
 
-from routers import auth, users, services, bookings, reviews, calendar, notifications, availability
+        await run_in_threadpool(migrate.upgrade, configure_logger=False)
+    worker = asyncio.create_task(outbox.run_worker()) if OUTBOX_WORKER else None
+    yield
+    if worker is not None:
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+    await run_in_threadpool(passwords.shutdown)
 
-# Create all DB tables
-models.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="SkillBridge API",
     description="Two-sided service marketplace — connect service providers with users",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow all origins (safe for a practice project)
 # To restrict later, set CORS_ORIGINS env var as comma-separated list
-_cors_env = os.getenv("CORS_ORIGINS", "*")
+_cors_env = settings.cors_origins
 if _cors_env == "*":
     allowed_origins = ["*"]
 else:
     allowed_origins = [o.strip() for o in _cors_env.split(",") if o.strip()]
 
+# Inside CORS, so cached responses still get per-origin CORS headers
+app.add_middleware(response_cache.ResponseCacheMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=allowed_origins != ["*"],  # credentials not allowed with wildcard
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
+# Outside the cache and CORS, so it sees their final headers; inside metrics,
+# which then records the size on the wire
+app.add_middleware(compression.CompressionMiddleware)
+
+# Outermost, so cache hits and CORS preflights are timed too
+app.add_middleware(metrics.MetricsMiddleware, router_app=app)
+
 # Mount routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -46,6 +90,7 @@ app.include_router(reviews.router)
 app.include_router(calendar.router)
 app.include_router(notifications.router)
 app.include_router(availability.router)
+app.include_router(media.router)
 
 
 @app.get("/")
@@ -58,17 +103,64 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/health/cache")
+def cache_health():
+    """Hit/miss counters for the in-process (or Redis) caches, and the facet index."""
+    return {"auth": auth_cache_stats(), "responses": response_cache.store.stats(), "facets": facets.stats()}
+
+
+@app.get("/health/outbox")
+def outbox_health():
+    """Outbox events waiting to be processed, and dead ones given up on after repeated failures."""
+    with database.SessionLocal() as db:
+        return outbox.stats(db)
+
+
+@app.get("/health/db")
+def db_health():
+    """Connection pool usage per database (primary, replicas, async engines)."""
+    return database.pool_stats()
+
+
+def _pool_metrics() -> str:
+    samples = {
+        (("pool", pool), ("state", state)): value
+        for pool, stats in database.pool_stats().items()
+        for state, value in stats.items()
+    }
+    return metrics.render_gauge(
+        "db_pool_connections", "Pool size/max and connections checked out, overflowing and idle.", samples)
+
+
+def _password_metrics() -> str:
+    stats = passwords.stats()
+    return metrics.render_gauge(
+        "password_hash_calls", "Password hashes queued or running, the limit, and calls refused with 503.",
+        {(("state", k),): stats[k] for k in ("pending", "max_pending", "rejected")})
+
+
+metrics.COLLECTORS += [_pool_metrics, _password_metrics]
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Per-route latency, SQL and response-size metrics (Prometheus text format)."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/stats")
-def get_platform_stats(db: Session = Depends(get_db)):
+async def get_platform_stats(db: AsyncSession = Depends(get_async_read_db)):
     """Return real platform-wide stats for the landing page."""
-    total_services = db.query(func.count(models.Service.id)).scalar() or 0
-    total_providers = (
-        db.query(func.count(models.User.id))
-        .filter(models.User.role == "provider")
-        .scalar() or 0
-    )
-    avg_result = db.query(func.avg(models.Review.rating)).scalar()
-    avg_rating = round(float(avg_result), 1) if avg_result else 0.0
+    total_services = await db.scalar(select(func.count(models.Service.id))) or 0
+    total_providers = await db.scalar(
+        select(func.count(models.User.id)).where(models.User.role == "provider")
+    ) or 0
+    # Weighted by review count, from the per-provider aggregates
+    rating_sum, rating_count = (await db.execute(
+        select(func.sum(models.User.rating_sum), func.sum(models.User.rating_count))
+        .where(models.User.role == "provider")
+    )).one()
+    avg_rating = round(float(rating_sum) / rating_count, 1) if rating_count else 0.0
 
     return {
         "total_services": total_services,
@@ -0,0 +1,130 @@
+"""
+Content-addressed image store for avatars.
+
+Uploads are keyed by the SHA-256 of their bytes, so the same picture is only
+stored once. Each image is re-encoded as JPEG (capped at 1024px) alongside
+resized thumbnails, fanned out on disk by the first two hex digits:
+
+    media/ab/<digest>.jpg
+    media/ab/<digest>_128.jpg
+    media/ab/<digest>_512.jpg
+
+The files are immutable, so they can be served with a long-lived cache.
+"""
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+from PIL import Image, UnidentifiedImageError
+
+import models
+from settings import get_settings
+
+MEDIA_ROOT = get_settings().media_root
+MEDIA_URL_PREFIX = "/media"
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+MAX_DIMENSION = 1024
+THUMBNAIL_SIZES = (128, 512)
+AVATAR_SIZE = 512           # variant stored on User.avatar_url
+
+MEDIA_NAME_RE = re.compile(r"^(?P<digest>[0-9a-f]{64})(?:_(?P<size>\d+))?\.jpg$")
+_DATA_URL_RE = re.compile(r"^data:image/[\w.+-]+;base64,(?P<data>.+)$", re.DOTALL)
+
+
+def media_path(name: str) -> Optional[Path]:
+    """Filesystem path for a media file name, or None if the name is not ours."""
+    match = MEDIA_NAME_RE.match(name)
+    if not match:
+        return None
+    return MEDIA_ROOT / match["digest"][:2] / name
+
+
+def _variant_name(digest: str, size: Optional[int] = None) -> str:
+    return f"{digest}_{size}.jpg" if size else f"{digest}.jpg"
+
+
+def _save_jpeg(image: Image.Image, path: Path):
+    # A temp name of its own: concurrent uploads of the same image write the same path
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        try:
+            image.save(tmp, "JPEG", quality=85, optimize=True)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    os.chmod(tmp.name, 0o644)      # temp files are created owner-only
+    os.replace(tmp.name, path)   # atomic, so readers never see a half-written file
+
+
+def store_image(data: bytes) -> str:
+    """Store an uploaded image plus thumbnails and return its digest."""
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Image too large (max 5 MB)")
+
+    digest = hashlib.sha256(data).hexdigest()
+    folder = MEDIA_ROOT / digest[:2]
+    if all((folder / _variant_name(digest, s)).exists() for s in (None, *THUMBNAIL_SIZES)):
+        return digest
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Image.DecompressionBombError:
+        raise HTTPException(status_code=400, detail="Image dimensions too large")
+    except (UnidentifiedImageError, OSError):
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid image")
+
+    image = image.convert("RGB")
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION))
+    folder.mkdir(parents=True, exist_ok=True)
+    _save_jpeg(image, folder / _variant_name(digest))
+    for size in THUMBNAIL_SIZES:
+        thumb = image.copy()
+        thumb.thumbnail((size, size))
+        _save_jpeg(thumb, folder / _variant_name(digest, size))
+    return digest
+
+
+def avatar_url(digest: str) -> str:
+    """Host-relative `/media/...` link, under MEDIA_BASE_URL if one is set (e.g. a CDN)."""
+    base = (get_settings().media_base_url or "").rstrip("/")
+    return f"{base}{MEDIA_URL_PREFIX}/{_variant_name(digest, AVATAR_SIZE)}"
+
+
+def decode_data_url(value: str) -> Optional[bytes]:
+    """Bytes of a base64 `data:image/...` URL, or None if `value` is not one."""
+    match = _DATA_URL_RE.match(value)
+    if not match:
+        return None
+    try:
+        return base64.b64decode(match["data"], validate=False)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Malformed image data URL")
+
+
+def migrate_inline_avatars(db) -> int:
+    """Move base64 avatars still stored on User rows into the media store."""
+    moved = 0
+    users = db.query(models.User).filter(models.User.avatar_url.like("data:%")).all()
+    for user in users:
+        try:
+            user.avatar_url = avatar_url(store_image(decode_data_url(user.avatar_url)))
+            moved += 1
+        except HTTPException as exc:
+            print(f"user {user.id}: skipped ({exc.detail})")
+    db.commit()
+    return moved
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        print(f"Moved {migrate_inline_avatars(session)} avatar(s)")
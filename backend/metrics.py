@@ -0,0 +1,248 @@
+"""
+Per-route request metrics, exposed in Prometheus text format at /metrics.
+
+`MetricsMiddleware` times every HTTP request and labels it with the route
+template (`/services/{service_id}`, not the concrete path) and method. SQL
+statements are counted and timed through engine-wide cursor events and
+credited to the request whose context issued them, including statements run
+from the threadpool (sync routes) and through AsyncSession.
+
+Recorded per route: latency, SQL statements, SQL time and response size
+(histograms), plus a request counter by status, all recorded once the last
+body chunk has gone out. A route with a high statement count per request
+usually has an N+1 query.
+
+A response sent in one piece also carries a `Server-Timing` header (`app`,
+and `db` with the statement count), so the numbers for a single request show
+up in the browser's network panel. Streamed responses (NDJSON lists) go
+without it: their headers leave before the rows are read, so it could only
+cover the part before the stream. Their histograms include all of it.
+
+Each worker process keeps its own numbers; Prometheus should scrape every
+worker (or aggregate them) when running several.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label set; thread-safe."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, list] = {}   # labels -> [per-bucket counts + overflow, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: (list(counts), total, n) for labels, (counts, total, n) in self._series.items()}
+        for labels, (counts, total, n) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_fmt(labels + (('le', _num(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_fmt(labels + (('le', '+Inf'),))} {n}")
+            lines.append(f"{self.name}_sum{_fmt(labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{_fmt(labels)} {n}")
+        return "\n".join(lines)
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        lines += [f"{self.name}{_fmt(labels)} {_num(v)}" for labels, v in sorted(snapshot.items())]
+        return "\n".join(lines)
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _fmt(labels: Labels) -> str:
+    def escape(v: str) -> str:
+        return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}" if labels else ""
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body.", LATENCY_BUCKETS)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.", STATEMENT_BUCKETS)
+REQUEST_LAZY_LOADS = Histogram(
+    "http_request_lazy_loads", "Relationship lazy loads that queried the database, per request.", STATEMENT_BUCKETS)
+REQUEST_SQL_DURATION = Histogram(
+    "http_request_sql_seconds", "Time spent executing SQL per request.", LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size.", SIZE_BUCKETS)
+REQUESTS = Counter("http_requests_total", "Requests by route, method and status.")
+
+METRICS = (REQUESTS, REQUEST_DURATION, REQUEST_SQL_STATEMENTS, REQUEST_LAZY_LOADS,
+           REQUEST_SQL_DURATION, RESPONSE_SIZE)
+
+
+# Callables returning extra exposition text (e.g. gauges read at scrape time)
+COLLECTORS: List[Callable[[], str]] = []
+
+
+def render_gauge(name: str, help: str, samples: Dict[Labels, float]) -> str:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_fmt(labels)} {_num(v)}" for labels, v in sorted(samples.items())]
+    return "\n".join(lines)
+
+
+def render() -> str:
+    return "\n".join([m.render() for m in METRICS] + [collect() for collect in COLLECTORS]) + "\n"
+
+
+# ── SQL accounting ─────────────────────────────────────────────────────────────
+
+@dataclass
+class RequestStats:
+    path: str = ""
+    sql_statements: int = 0
+    sql_seconds: float = 0.0
+    # "Model.relationship" -> lazy loads that hit the database (see nplusone.py)
+    lazy_loads: Dict[str, int] = field(default_factory=dict)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Counters of the request being handled, or None outside a request."""
+    return _request_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is not None and context is not None:
+        stats.sql_statements += 1
+        stats.sql_seconds += perf_counter() - getattr(context, "_metrics_started", perf_counter())
+
+
+# ── Middleware ─────────────────────────────────────────────────────────────────
+
+# Long-lived streams would only skew the latency histograms
+_UNTIMED_CONTENT_TYPES = (b"text/event-stream",)
+
+
+def _route_template(app, scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        # Not routed (e.g. answered by the response cache): match it ourselves
+        for candidate in getattr(app, "routes", ()):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, router_app=None):
+        self.app = app
+        # The FastAPI app, for matching requests that never reached the router
+        self.router_app = router_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(path=scope["path"])
+        token = _request_stats.set(stats)
+        started = perf_counter()
+        status, size, timed, recorded = 500, 0, True, False
+        start = None   # held until the first body chunk shows whether the body is streamed
+
+        def record():
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            labels = (("method", scope["method"]), ("route", _route_template(self.router_app, scope)))
+            REQUESTS.inc(labels + (("status", str(status)),))
+            if timed:
+                REQUEST_DURATION.observe(labels, perf_counter() - started)
+                REQUEST_SQL_STATEMENTS.observe(labels, stats.sql_statements)
+                REQUEST_LAZY_LOADS.observe(labels, sum(stats.lazy_loads.values()))
+                REQUEST_SQL_DURATION.observe(labels, stats.sql_seconds)
+                RESPONSE_SIZE.observe(labels, size)
+
+        async def send_with_timing(message):
+            nonlocal status, size, timed, start
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = next((v for k, v in message.get("headers", []) if k.lower() == b"content-type"), b"")
+                timed = not content_type.startswith(_UNTIMED_CONTENT_TYPES)
+                if not timed:
+                    return await send(message)   # event streams open at once, with no Server-Timing
+                start = message
+                return
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                more = message.get("more_body", False)
+                if start is not None:
+                    if not more:
+                        start = {**start, "headers": [*start.get("headers", []), (b"server-timing", (
+                            f"app;dur={(perf_counter() - started) * 1000:.1f}, "
+                            f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_statements} queries"'
+                        ).encode())]}
+                    await send(start)
+                    start = None
+                await send(message)
+                if not more:
+                    record()
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            # Responses that never finished (errors, disconnects) are counted too
+            record()
@@ -0,0 +1,28 @@
+"""
+Apply schema migrations (Alembic) programmatically.
+
+    python migrate.py            # same as `alembic upgrade head`
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+
+
+def upgrade(bind=None, revision: str = "head", configure_logger: bool = True):
+    """Upgrade `bind` (an Engine; defaults to database.engine) to `revision`."""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    config.attributes["configure_logger"] = configure_logger
+    if bind is None:
+        command.upgrade(config, revision)
+        return
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    upgrade()
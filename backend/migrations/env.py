@@ -0,0 +1,59 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import models
+from database import engine
+
+config = context.config
+
+# Skip logging setup when migrations run inside the app (see migrate.py)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+# Search index objects are managed by search.py, not the ORM models
+_UNMANAGED = {"search_vector", "ix_services_search_vector"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if reflected and compare_to is None:
+        return not (name.startswith("services_fts") or name in _UNMANAGED)
+    return True
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=engine.dialect.name == "sqlite",   # SQLite can't ALTER most things
+        compare_type=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    _configure(url=engine.url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # migrate.upgrade(bind) hands over a connection to a specific database
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    with engine.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
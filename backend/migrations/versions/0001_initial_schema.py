@@ -0,0 +1,124 @@
+"""initial schema
+
+The tables as `Base.metadata.create_all` used to create them. Tables that
+already exist are left alone, so databases created before migrations were
+introduced can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("email", sa.String(150), nullable=False),
+            sa.Column("mobile", sa.String(20), nullable=True),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+            sa.Column("role", sa.String(20), nullable=True),
+            sa.Column("age", sa.Integer(), nullable=True),
+            sa.Column("location", sa.String(200), nullable=True),
+            sa.Column("bio", sa.Text(), nullable=True),
+            sa.Column("avatar_url", sa.String(500), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "services" not in existing:
+        op.create_table(
+            "services",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("service_name", sa.String(200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("min_price", sa.Float(), nullable=False),
+            sa.Column("category", sa.String(100), nullable=False),
+            sa.Column("image_url", sa.String(500), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_services_id", "services", ["id"])
+
+    if "bookings" not in existing:
+        op.create_table(
+            "bookings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=False),
+            sa.Column("problem_description", sa.Text(), nullable=True),
+            sa.Column("booking_date", sa.String(20), nullable=False),
+            sa.Column("booking_time", sa.String(10), nullable=False),
+            sa.Column("status", sa.String(20), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_bookings_id", "bookings", ["id"])
+
+    if "reviews" not in existing:
+        op.create_table(
+            "reviews",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("booking_id", sa.Integer(), sa.ForeignKey("bookings.id"), nullable=False, unique=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("rating", sa.Float(), nullable=False),
+            sa.Column("feedback", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_reviews_id", "reviews", ["id"])
+
+    if "provider_availability" not in existing:
+        op.create_table(
+            "provider_availability",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("day_of_week", sa.Integer(), nullable=False),
+            sa.Column("start_time", sa.String(10), nullable=False),
+            sa.Column("end_time", sa.String(10), nullable=False),
+        )
+        op.create_index("ix_provider_availability_id", "provider_availability", ["id"])
+
+    if "calendar_events" not in existing:
+        op.create_table(
+            "calendar_events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("provider_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("title", sa.String(300), nullable=False),
+            sa.Column("event_type", sa.String(20), nullable=True),
+            sa.Column("start_datetime", sa.String(50), nullable=False),
+            sa.Column("end_datetime", sa.String(50), nullable=True),
+            sa.Column("color", sa.String(20), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_calendar_events_id", "calendar_events", ["id"])
+
+    if "notifications" not in existing:
+        op.create_table(
+            "notifications",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("title", sa.String(300), nullable=False),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("is_read", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_notifications_id", "notifications", ["id"])
+
+
+def downgrade():
+    for table in ["notifications", "calendar_events", "provider_availability",
+                  "reviews", "bookings", "services", "users"]:
+        op.drop_table(table)
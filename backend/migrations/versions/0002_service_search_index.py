@@ -0,0 +1,32 @@
+"""service full-text search index
+
+FTS5 table + sync triggers on SQLite, generated tsvector + GIN on Postgres
+(see search.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+from search import ensure_search_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    ensure_search_index(op.get_bind())
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ["services_fts_ai", "services_fts_ad", "services_fts_au"]:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS services_fts")
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_services_search_vector")
+        op.execute("ALTER TABLE services DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,41 @@
+"""provider rating aggregates on users
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    with op.batch_alter_table("users") as batch:
+        if "rating_sum" not in existing:
+            batch.add_column(sa.Column("rating_sum", sa.Float(), nullable=False, server_default="0"))
+        if "rating_count" not in existing:
+            batch.add_column(sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"))
+        if "avg_rating" not in existing:
+            batch.add_column(sa.Column("avg_rating", sa.Float(), nullable=False, server_default="0"))
+
+    # Backfill from existing reviews (same result as `python ratings.py`)
+    op.execute("""
+        UPDATE users SET
+            rating_sum = COALESCE((SELECT SUM(rating) FROM reviews WHERE reviews.provider_id = users.id), 0),
+            rating_count = (SELECT COUNT(*) FROM reviews WHERE reviews.provider_id = users.id)
+    """)
+    op.execute("""
+        UPDATE users SET avg_rating = CASE WHEN rating_count > 0 THEN rating_sum / rating_count ELSE 0 END
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("avg_rating")
+        batch.drop_column("rating_count")
+        batch.drop_column("rating_sum")
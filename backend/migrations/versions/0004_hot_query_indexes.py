@@ -0,0 +1,36 @@
+"""composite indexes for hot query shapes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_users_role_created", "users", ["role", "created_at"]),
+    ("ix_services_provider_created", "services", ["provider_id", "created_at"]),
+    ("ix_services_category", "services", ["category"]),
+    ("ix_services_created", "services", ["created_at"]),
+    ("ix_bookings_provider_slot", "bookings", ["provider_id", "booking_date", "booking_time", "status"]),
+    ("ix_bookings_provider_created", "bookings", ["provider_id", "created_at"]),
+    ("ix_bookings_user_created", "bookings", ["user_id", "created_at"]),
+    ("ix_reviews_provider_created", "reviews", ["provider_id", "created_at"]),
+    ("ix_provider_availability_provider_day", "provider_availability", ["provider_id", "day_of_week"]),
+    ("ix_calendar_events_provider", "calendar_events", ["provider_id"]),
+    ("ix_notifications_user_read_created", "notifications", ["user_id", "is_read", "created_at"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
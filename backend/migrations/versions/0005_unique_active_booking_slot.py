@@ -0,0 +1,79 @@
+"""unique active booking per provider slot
+
+A partial unique index on (provider_id, booking_date, booking_time) for
+bookings that still hold the slot. Any duplicates left behind by the old
+check-then-insert race are resolved first. The booking furthest along keeps
+the slot: accepted or ongoing before pending, then the earliest. The others
+are marked rejected, and their user and provider each get a notification.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('pending', 'accepted', 'ongoing')"
+# Which of a slot's active bookings keeps it: work agreed to first, then the earliest
+PRECEDENCE = {"ongoing": 0, "accepted": 0, "pending": 1}
+
+bookings = sa.table("bookings", sa.column("id"), sa.column("status"))
+notifications = sa.table(
+    "notifications", sa.column("user_id"), sa.column("title"), sa.column("message"),
+    sa.column("is_read"), sa.column("created_at"),
+)
+
+
+def _resolve_duplicate_slots():
+    rows = op.get_bind().execute(sa.text(f"""
+        SELECT id, user_id, provider_id, booking_date, booking_time, status FROM bookings AS b
+        WHERE b.{ACTIVE} AND EXISTS (
+            SELECT 1 FROM bookings AS other
+            WHERE other.provider_id = b.provider_id
+              AND other.booking_date = b.booking_date
+              AND other.booking_time = b.booking_time
+              AND other.{ACTIVE}
+              AND other.id <> b.id
+        )
+    """)).all()
+    slots = {}
+    for row in rows:
+        slots.setdefault((row.provider_id, row.booking_date, row.booking_time), []).append(row)
+
+    rejected, messages, now = [], [], datetime.utcnow()
+    for taken in slots.values():
+        keeper, *losers = sorted(taken, key=lambda b: (PRECEDENCE[b.status], b.id))
+        for b in losers:
+            rejected.append(b.id)
+            when = f"{b.booking_date} at {b.booking_time}"
+            messages += [
+                {"user_id": b.user_id, "title": "Booking Rejected",
+                 "message": f"Your booking on {when} was rejected: another booking holds that slot.",
+                 "is_read": False, "created_at": now},
+                {"user_id": b.provider_id, "title": "Duplicate Booking Rejected",
+                 "message": f"Booking #{b.id} for {when} was rejected: booking #{keeper.id} holds that slot.",
+                 "is_read": False, "created_at": now},
+            ]
+    for start in range(0, len(rejected), 500):
+        op.execute(bookings.update().where(bookings.c.id.in_(rejected[start:start + 500])).values(status="rejected"))
+    if messages:
+        op.bulk_insert(notifications, messages)
+
+
+def upgrade():
+    _resolve_duplicate_slots()
+    op.create_index(
+        "ux_bookings_active_slot", "bookings", ["provider_id", "booking_date", "booking_time"],
+        unique=True, sqlite_where=sa.text(ACTIVE), postgresql_where=sa.text(ACTIVE), if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ux_bookings_active_slot", table_name="bookings")
@@ -0,0 +1,227 @@
+"""typed date/time columns
+
+Booking dates/times, availability times and calendar event datetimes were
+free-form strings. Existing values are parsed leniently ("9:00", "09:00:00",
+"2026-10-19T10:00", "2026-10-19 10:00", date-only, with or without an
+offset) and rewritten in canonical ISO form, then the columns are converted
+to DATE / TIME / TIMESTAMP. Values that can't be parsed stop the migration
+with the offending row ids rather than being guessed at.
+
+Normalising can make two active bookings for the same slot identical
+("10:00" vs "10:00:00"). They are resolved as in 0005 before the unique
+index is rebuilt: accepted or ongoing before pending, then the earliest
+keeps the slot. The rest are marked rejected, and their users and providers
+are notified.
+
+Also replaces ix_calendar_events_provider with (provider_id, start_datetime)
+for calendar window queries.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from datetime import date, datetime, time
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IN ('pending', 'accepted', 'ongoing')"
+# Which of a slot's active bookings keeps it: work agreed to first, then the earliest
+PRECEDENCE = {"ongoing": 0, "accepted": 0, "pending": 1}
+
+bookings = sa.table("bookings", sa.column("id"), sa.column("status"))
+notifications = sa.table(
+    "notifications", sa.column("user_id"), sa.column("title"), sa.column("message"),
+    sa.column("is_read"), sa.column("created_at"),
+)
+
+
+def _parse_date(raw: str) -> date:
+    return date.fromisoformat(raw.strip()[:10])
+
+
+def _parse_time(raw: str) -> time:
+    raw = raw.strip().upper()
+    for fmt in ("%H:%M", "%H:%M:%S", "%H:%M:%S.%f", "%I:%M %p", "%I:%M%p"):
+        try:
+            return datetime.strptime(raw, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(raw)
+
+
+def _parse_datetime(raw: str) -> datetime:
+    raw = raw.strip()
+    if raw.endswith("Z"):
+        raw = raw[:-1] + "+00:00"
+    # Wall-clock time as entered; any offset is dropped, not converted
+    return datetime.fromisoformat(raw).replace(tzinfo=None)
+
+
+# table -> [(column, old type, new type, Postgres cast, parser, nullable)]
+COLUMNS = {
+    "bookings": [
+        ("booking_date", sa.String(20), sa.Date(), "date", _parse_date, False),
+        ("booking_time", sa.String(10), sa.Time(), "time", _parse_time, False),
+    ],
+    "provider_availability": [
+        ("start_time", sa.String(10), sa.Time(), "time", _parse_time, False),
+        ("end_time", sa.String(10), sa.Time(), "time", _parse_time, False),
+    ],
+    "calendar_events": [
+        ("start_datetime", sa.String(50), sa.DateTime(), "timestamp", _parse_datetime, False),
+        ("end_datetime", sa.String(50), sa.DateTime(), "timestamp", _parse_datetime, True),
+    ],
+}
+
+
+def _canonical(value) -> str:
+    # Accepted by Postgres casts and identical to what SQLAlchemy's SQLite
+    # Date/Time/DateTime types write, so old and new rows compare correctly.
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="microseconds")
+    if isinstance(value, time):
+        return value.isoformat(timespec="microseconds")
+    return value.isoformat()
+
+
+def _legacy(value) -> str:
+    """The string formats the app used before this revision."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M")
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    return value.isoformat()
+
+
+def _rewrite(table_name: str, columns, render):
+    """Parse every value of the (string) `columns` and write back `render(value)`."""
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column("id"), *(sa.column(c[0], sa.String()) for c in columns))
+    bad = []
+    updates = []
+    for row in bind.execute(sa.select(table)).mappings():
+        values = {}
+        for name, *_, parse, nullable in columns:
+            raw = row[name]
+            if raw is None or raw == "":
+                if not nullable:
+                    bad.append((row["id"], name, raw))
+                values[name] = None
+                continue
+            try:
+                values[name] = render(parse(raw))
+            except ValueError:
+                bad.append((row["id"], name, raw))
+        updates.append({"row_id": row["id"], **values})
+    if bad:
+        listed = ", ".join(f"id={i} {c}={v!r}" for i, c, v in bad[:20])
+        raise RuntimeError(f"{table_name}: {len(bad)} unparseable value(s), fix them and rerun: {listed}")
+    if updates:
+        bind.execute(table.update().where(table.c.id == sa.bindparam("row_id")), updates)
+
+
+def _drop_slot_indexes():
+    op.drop_index("ux_bookings_active_slot", table_name="bookings", if_exists=True)
+    op.drop_index("ix_bookings_provider_slot", table_name="bookings", if_exists=True)
+
+
+def _create_slot_indexes():
+    op.create_index("ix_bookings_provider_slot", "bookings",
+                    ["provider_id", "booking_date", "booking_time", "status"])
+    op.create_index(
+        "ux_bookings_active_slot", "bookings", ["provider_id", "booking_date", "booking_time"],
+        unique=True, sqlite_where=sa.text(ACTIVE), postgresql_where=sa.text(ACTIVE),
+    )
+
+
+def _retype_sqlite(table_name: str, columns):
+    # A batch type change copies rows with CAST(x AS DATE), which SQLite turns
+    # into a number ('2026-10-20' -> 2026). Copy the text into fresh columns
+    # instead; SQLite stores it unchanged since it isn't a well-formed number.
+    with op.batch_alter_table(table_name) as batch:
+        for name, _, new, *_ in columns:
+            batch.add_column(sa.Column(f"{name}_typed", new, nullable=True))
+    op.execute(f"UPDATE {table_name} SET " + ", ".join(f"{c[0]}_typed = {c[0]}" for c in columns))
+    with op.batch_alter_table(table_name) as batch:
+        for name, *_ in columns:
+            batch.drop_column(name)
+        for name, _, new, _, _, nullable in columns:
+            batch.alter_column(f"{name}_typed", new_column_name=name, existing_type=new, nullable=nullable)
+
+
+def _resolve_duplicate_slots():
+    rows = op.get_bind().execute(sa.text(f"""
+        SELECT id, user_id, provider_id, booking_date, booking_time, status FROM bookings AS b
+        WHERE b.{ACTIVE} AND EXISTS (
+            SELECT 1 FROM bookings AS other
+            WHERE other.provider_id = b.provider_id
+              AND other.booking_date = b.booking_date
+              AND other.booking_time = b.booking_time
+              AND other.{ACTIVE}
+              AND other.id <> b.id
+        )
+    """)).all()
+    slots = {}
+    for row in rows:
+        slots.setdefault((row.provider_id, row.booking_date, row.booking_time), []).append(row)
+
+    rejected, messages, now = [], [], datetime.utcnow()
+    for taken in slots.values():
+        keeper, *losers = sorted(taken, key=lambda b: (PRECEDENCE[b.status], b.id))
+        for b in losers:
+            rejected.append(b.id)
+            when = f"{b.booking_date} at {str(b.booking_time)[:5]}"
+            messages += [
+                {"user_id": b.user_id, "title": "Booking Rejected",
+                 "message": f"Your booking on {when} was rejected: another booking holds that slot.",
+                 "is_read": False, "created_at": now},
+                {"user_id": b.provider_id, "title": "Duplicate Booking Rejected",
+                 "message": f"Booking #{b.id} for {when} was rejected: booking #{keeper.id} holds that slot.",
+                 "is_read": False, "created_at": now},
+            ]
+    for start in range(0, len(rejected), 500):
+        op.execute(bookings.update().where(bookings.c.id.in_(rejected[start:start + 500])).values(status="rejected"))
+    if messages:
+        op.bulk_insert(notifications, messages)
+
+
+def upgrade():
+    _drop_slot_indexes()
+    op.drop_index("ix_calendar_events_provider", table_name="calendar_events", if_exists=True)
+
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table_name, columns in COLUMNS.items():
+        _rewrite(table_name, columns, _canonical)
+        if sqlite:
+            _retype_sqlite(table_name, columns)
+            continue
+        with op.batch_alter_table(table_name) as batch:
+            for name, old, new, pg_cast, _, nullable in columns:
+                batch.alter_column(name, type_=new, existing_type=old, existing_nullable=nullable,
+                                   postgresql_using=f"{name}::{pg_cast}")
+
+    _resolve_duplicate_slots()
+    _create_slot_indexes()
+    op.create_index("ix_calendar_events_provider_start", "calendar_events",
+                    ["provider_id", "start_datetime"])
+
+
+def downgrade():
+    _drop_slot_indexes()
+    op.drop_index("ix_calendar_events_provider_start", table_name="calendar_events")
+
+    for table_name, columns in COLUMNS.items():
+        with op.batch_alter_table(table_name) as batch:
+            for name, old, new, _, _, nullable in columns:
+                batch.alter_column(name, type_=old, existing_type=new, existing_nullable=nullable,
+                                   postgresql_using=f"{name}::varchar")
+        _rewrite(table_name, columns, _legacy)
+
+    _create_slot_indexes()
+    op.create_index("ix_calendar_events_provider", "calendar_events", ["provider_id"])
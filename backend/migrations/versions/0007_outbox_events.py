@@ -0,0 +1,41 @@
+"""outbox events
+
+Domain events (booking created, status changed, review submitted) are
+recorded in the request's transaction and turned into notifications and
+calendar entries by the outbox worker (outbox.py).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+PENDING = "processed_at IS NULL"
+
+
+def upgrade():
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_type", sa.String(50), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        "ix_outbox_events_pending", "outbox_events", ["id"],
+        sqlite_where=sa.text(PENDING), postgresql_where=sa.text(PENDING),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_outbox_events_pending", table_name="outbox_events")
+    op.drop_table("outbox_events")
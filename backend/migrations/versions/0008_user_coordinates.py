@@ -0,0 +1,54 @@
+"""user coordinates and geohash index
+
+Latitude/longitude geocoded from `location` against the bundled gazetteer,
+plus a (role, geohash) index for radius search (see geo.py).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from geo import geocode, geohash
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.Integer), sa.column("location", sa.String),
+    sa.column("latitude", sa.Float), sa.column("longitude", sa.Float), sa.column("geohash", sa.String),
+)
+
+
+def upgrade():
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("latitude", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("longitude", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("geohash", sa.String(12), nullable=True))
+    op.create_index("ix_users_role_geohash", "users", ["role", "geohash"])
+
+    # Backfill everyone whose location the gazetteer knows
+    bind = op.get_bind()
+    rows = []
+    for user_id, location in bind.execute(sa.select(users.c.id, users.c.location).where(users.c.location.isnot(None))):
+        point = geocode(location)
+        if point:
+            rows.append({"user_id": user_id, "lat": point[0], "lng": point[1], "hash": geohash(*point)})
+    if rows:
+        bind.execute(
+            users.update().where(users.c.id == sa.bindparam("user_id"))
+            .values(latitude=sa.bindparam("lat"), longitude=sa.bindparam("lng"), geohash=sa.bindparam("hash")),
+            rows,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_users_role_geohash", table_name="users")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("geohash")
+        batch.drop_column("longitude")
+        batch.drop_column("latitude")
@@ -0,0 +1,26 @@
+"""drop ix_bookings_provider_slot
+
+The slot check it served became the partial unique index
+ux_bookings_active_slot (0005), which has the same leading columns and now
+also serves slot lookups over a date range. Keeping both cost an extra index
+write on every booking.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index("ix_bookings_provider_slot", table_name="bookings", if_exists=True)
+
+
+def downgrade():
+    op.create_index("ix_bookings_provider_slot", "bookings",
+                    ["provider_id", "booking_date", "booking_time", "status"])
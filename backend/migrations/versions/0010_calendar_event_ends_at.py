@@ -0,0 +1,56 @@
+"""calendar event ends_at
+
+Window queries used to bound start_datetime by 31 days before the window,
+which missed longer events. ends_at is when an event actually ends (its
+end_datetime, or the end of its start day), so overlap is a plain
+`ends_at > start AND start_datetime < end`, served by (provider_id, ends_at).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from datetime import datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+calendar_events = sa.table(
+    "calendar_events",
+    sa.column("id", sa.Integer), sa.column("start_datetime", sa.DateTime),
+    sa.column("end_datetime", sa.DateTime), sa.column("ends_at", sa.DateTime),
+)
+
+
+def upgrade():
+    with op.batch_alter_table("calendar_events") as batch:
+        batch.add_column(sa.Column("ends_at", sa.DateTime(), nullable=True))
+
+    bind = op.get_bind()
+    rows = [
+        {"event_id": event_id,
+         "ends": end if end is not None else datetime.combine(start.date(), time()) + timedelta(days=1)}
+        for event_id, start, end in bind.execute(sa.select(
+            calendar_events.c.id, calendar_events.c.start_datetime, calendar_events.c.end_datetime,
+        ))
+    ]
+    if rows:
+        bind.execute(
+            calendar_events.update().where(calendar_events.c.id == sa.bindparam("event_id"))
+            .values(ends_at=sa.bindparam("ends")),
+            rows,
+        )
+
+    with op.batch_alter_table("calendar_events") as batch:
+        batch.alter_column("ends_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index("ix_calendar_events_provider_end", "calendar_events", ["provider_id", "ends_at"])
+
+
+def downgrade():
+    op.drop_index("ix_calendar_events_provider_end", table_name="calendar_events")
+    with op.batch_alter_table("calendar_events") as batch:
+        batch.drop_column("ends_at")
@@ -1,12 +1,17 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Enum, ForeignKey, Text, Boolean, Time
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Date, DateTime, Enum, ForeignKey, Text, Boolean, Time, JSON, Index, and_, bindparam, text
+from sqlalchemy.orm import declarative_base, relationship
+from datetime import datetime, time, timedelta
+from typing import Optional
 import enum
 
 Base = declarative_base()
 
 
+# Bookings in these states hold their provider's time slot
+ACTIVE_BOOKING_STATUSES = ("pending", "accepted", "ongoing")
+_ACTIVE_SLOT_WHERE = text("status IN (%s)" % ", ".join(f"'{s}'" for s in ACTIVE_BOOKING_STATUSES))
+
+
 class RoleEnum(str, enum.Enum):
     user = "user"
     provider = "provider"
@@ -43,6 +48,16 @@ class User(Base):
     avatar_url = Column(String(500), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Rating aggregates for providers, maintained by ratings.apply_rating_change
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    avg_rating = Column(Float, nullable=False, default=0.0)
+
+    # Geocoded from `location` by geo.py (offline gazetteer); NULL when unknown
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True)
+
     # Relationships
     services = relationship("Service", back_populates="provider", foreign_keys="Service.provider_id")
     bookings_as_user = relationship("Booking", back_populates="user", foreign_keys="Booking.user_id")
@@ -53,6 +68,11 @@ class User(Base):
     calendar_events = relationship("CalendarEvent", back_populates="provider")
     notifications = relationship("Notification", back_populates="user")
 
+    __table_args__ = (
+        Index("ix_users_role_created", "role", "created_at"),
+        Index("ix_users_role_geohash", "role", "geohash"),
+    )
+
 
 class Service(Base):
     __tablename__ = "services"
@@ -69,6 +89,12 @@ class Service(Base):
     provider = relationship("User", back_populates="services", foreign_keys=[provider_id])
     bookings = relationship("Booking", back_populates="service")
 
+    __table_args__ = (
+        Index("ix_services_provider_created", "provider_id", "created_at"),
+        Index("ix_services_category", "category"),
+        Index("ix_services_created", "created_at"),
+    )
+
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -78,8 +104,8 @@ class Booking(Base):
     provider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
     problem_description = Column(Text, nullable=True)
-    booking_date = Column(String(20), nullable=False)
-    booking_time = Column(String(10), nullable=False)
+    booking_date = Column(Date, nullable=False)
+    booking_time = Column(Time, nullable=False)
     status = Column(String(20), default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -88,6 +114,27 @@ class Booking(Base):
     service = relationship("Service", back_populates="bookings")
     review = relationship("Review", back_populates="booking", uselist=False)
 
+    @classmethod
+    def holding_slot(cls):
+        """
+        Bookings that hold their slot. The statuses are inlined rather than
+        bound, so the planner can match ux_bookings_active_slot's predicate and
+        use it for a provider's bookings over a date range.
+        """
+        return cls.status.in_(bindparam(
+            "active_statuses", list(ACTIVE_BOOKING_STATUSES), expanding=True, literal_execute=True, unique=True,
+        ))
+
+    __table_args__ = (
+        # At most one active booking per provider slot, enforced by the database
+        Index(
+            "ux_bookings_active_slot", "provider_id", "booking_date", "booking_time",
+            unique=True, sqlite_where=_ACTIVE_SLOT_WHERE, postgresql_where=_ACTIVE_SLOT_WHERE,
+        ),
+        Index("ix_bookings_provider_created", "provider_id", "created_at"),
+        Index("ix_bookings_user_created", "user_id", "created_at"),
+    )
+
 
 class Review(Base):
     __tablename__ = "reviews"
@@ -104,6 +151,10 @@ class Review(Base):
     user = relationship("User", back_populates="reviews_given", foreign_keys=[user_id])
     provider = relationship("User", back_populates="reviews_received", foreign_keys=[provider_id])
 
+    __table_args__ = (
+        Index("ix_reviews_provider_created", "provider_id", "created_at"),
+    )
+
 
 class ProviderAvailability(Base):
     __tablename__ = "provider_availability"
@@ -111,11 +162,15 @@ class ProviderAvailability(Base):
     id = Column(Integer, primary_key=True, index=True)
     provider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     day_of_week = Column(Integer, nullable=False)  # 0=Mon, 6=Sun
-    start_time = Column(String(10), nullable=False)
-    end_time = Column(String(10), nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
 
     provider = relationship("User", back_populates="availability")
 
+    __table_args__ = (
+        Index("ix_provider_availability_provider_day", "provider_id", "day_of_week"),
+    )
+
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
@@ -124,13 +179,39 @@ class CalendarEvent(Base):
     provider_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(300), nullable=False)
     event_type = Column(String(20), default="event")
-    start_datetime = Column(String(50), nullable=False)
-    end_datetime = Column(String(50), nullable=True)
+    start_datetime = Column(DateTime, nullable=False)
+    end_datetime = Column(DateTime, nullable=True)
+    # When the event actually ends: end_datetime, or the end of its start day.
+    # Set on insert and update; not part of the API
+    ends_at = Column(DateTime, nullable=False, default=lambda context: event_ends_at(
+        context.get_current_parameters()["start_datetime"], context.get_current_parameters().get("end_datetime"),
+    ))
     color = Column(String(20), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     provider = relationship("User", back_populates="calendar_events")
 
+    @classmethod
+    def overlapping(cls, start: datetime, end: datetime):
+        """Events overlapping [start, end); an event without an end lasts its start day."""
+        return and_(cls.ends_at > start, cls.start_datetime < end)
+
+    __table_args__ = (
+        # Listing in start order
+        Index("ix_calendar_events_provider_start", "provider_id", "start_datetime"),
+        # Calendar window queries (/calendar/?start=&end=) and holidays in slots.py
+        Index("ix_calendar_events_provider_end", "provider_id", "ends_at"),
+    )
+
+
+def event_ends_at(start: datetime, end: Optional[datetime]) -> datetime:
+    return end if end is not None else datetime.combine(start.date(), time()) + timedelta(days=1)
+
+
+@event.listens_for(CalendarEvent, "before_update")
+def _update_ends_at(mapper, connection, target):
+    target.ends_at = event_ends_at(target.start_datetime, target.end_datetime)
+
 
 class Notification(Base):
     __tablename__ = "notifications"
@@ -143,3 +224,28 @@ class Notification(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="notifications")
+
+    __table_args__ = (
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
+
+
+class OutboxEvent(Base):
+    """Domain event written with the change that caused it; consumed by outbox.py."""
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        # The worker's "next unprocessed batch" scan
+        Index(
+            "ix_outbox_events_pending", "id",
+            sqlite_where=text("processed_at IS NULL"), postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
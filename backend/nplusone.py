@@ -0,0 +1,66 @@
+"""
+Opt-in detection of N+1 lazy loading.
+
+Relationships that aren't eager-loaded are fetched with one SELECT per
+parent row the first time they are read, which is easy to miss when a
+response schema with `from_attributes` walks nested objects. Every lazy load
+that actually queries the database (many-to-one hits in the identity map
+are free and not counted) is tallied per relationship on the current
+request's `metrics.RequestStats`, and shows up in /metrics as
+`http_request_lazy_loads`.
+
+NPLUSONE selects what happens when one relationship is lazy-loaded more than
+NPLUSONE_THRESHOLD times in a single request:
+
+    off    (default) only count
+    log    log a warning naming the route and relationship, once per request
+    raise  raise NPlusOneError at the offending load, failing the request
+
+`log` suits development; `raise` is what tests/test_query_budget.py runs with.
+"""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import metrics
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+NPLUSONE = get_settings().nplusone
+NPLUSONE_THRESHOLD = get_settings().nplusone_threshold
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+def configure(mode: str = None, threshold: int = None):
+    """Change the mode/threshold at runtime (scripts and benchmarks)."""
+    global NPLUSONE, NPLUSONE_THRESHOLD
+    if mode is not None:
+        NPLUSONE = mode
+    if threshold is not None:
+        NPLUSONE_THRESHOLD = threshold
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_lazy_load(orm_execute_state):
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None:
+        return
+    stats = metrics.current_stats()
+    if stats is None:
+        return
+    path = orm_execute_state.loader_strategy_path
+    relationship = str(path.prop) if path is not None and hasattr(path, "prop") else "unknown"
+    count = stats.lazy_loads[relationship] = stats.lazy_loads.get(relationship, 0) + 1
+    if count != NPLUSONE_THRESHOLD + 1 or NPLUSONE == "off":
+        return
+    message = (
+        f"{stats.path}: {relationship} lazy-loaded more than {NPLUSONE_THRESHOLD} times "
+        f"in one request; eager-load it (joinedload/selectinload)"
+    )
+    if NPLUSONE == "raise":
+        raise NPlusOneError(message)
+    logger.warning(message)
@@ -0,0 +1,322 @@
+"""
+Transactional outbox for the side effects of bookings and reviews.
+
+Routers call `record()` with domain events (booking created, status changed,
+review submitted) in the same transaction as the change itself, so an event
+exists exactly when its change was committed. The worker reads unprocessed
+events in id order, a batch at a time, and hands each batch to every
+registered consumer. The default consumer turns them into `Notification` and
+`CalendarEvent` rows with one multi-row INSERT per table. A batch's rows and
+its `processed_at` stamp commit together, so each event is applied once.
+
+If a consumer raises, the batch is rolled back and its events are retried
+one by one, so a single bad event can't hold up the rest. An event that
+fails `MAX_ATTEMPTS` times is dead: it is skipped from then on and kept, with
+its `last_error`, for someone to look at. Dead events are logged when they
+die and on every hourly housekeeping pass, and counted at /health/outbox.
+
+Housekeeping also deletes events processed more than OUTBOX_RETENTION_DAYS
+ago, a batch per transaction, so the table doesn't grow without bound.
+
+The worker runs as an asyncio task in the API process (see main.py; disable
+with OUTBOX_WORKER=0), or as a separate process:
+
+    python -m outbox
+
+New notifications reach open streams through events.py. Its default
+in-process broker only reaches the process that wrote them, so a separate
+worker process needs a cross-process broker installed on both sides.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import events
+import models
+from database import SessionLocal
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = get_settings().outbox_batch_size
+OUTBOX_POLL_SECONDS = get_settings().outbox_poll_seconds
+OUTBOX_RETENTION_DAYS = get_settings().outbox_retention_days
+MAX_ATTEMPTS = 5
+HOUSEKEEPING_INTERVAL_SECONDS = 3600
+PURGE_BATCH_SIZE = 1000
+
+BOOKING_CREATED = "booking.created"
+BOOKING_STATUS_CHANGED = "booking.status_changed"
+REVIEW_SUBMITTED = "review.submitted"
+
+Consumer = Callable[[Session, List[models.OutboxEvent]], None]
+CONSUMERS: List[Consumer] = []
+
+
+def consumer(fn: Consumer) -> Consumer:
+    """Register `fn(db, batch)` to run on every batch, inside its transaction."""
+    CONSUMERS.append(fn)
+    return fn
+
+
+# ── Producing ──────────────────────────────────────────────────────────────────
+
+_RECORDED_KEY = "outbox_recorded"
+
+
+def record(db: Session, *outbox_events: Tuple[str, dict]):
+    """Add `(event_type, payload)` events to the session's transaction (one INSERT)."""
+    if not outbox_events:
+        return
+    db.execute(insert(models.OutboxEvent), [
+        {"event_type": event_type, "payload": payload} for event_type, payload in outbox_events
+    ])
+    db.info[_RECORDED_KEY] = True
+
+
+def booking_status_event(booking: models.Booking, status: str) -> Tuple[str, dict]:
+    """Needs booking.service loaded."""
+    return BOOKING_STATUS_CHANGED, {
+        "booking_id": booking.id,
+        "status": status,
+        "user_id": booking.user_id,
+        "provider_id": booking.provider_id,
+        "booking_date": booking.booking_date.isoformat(),
+        "booking_time": booking.booking_time.strftime("%H:%M"),
+        "service_name": booking.service.service_name if booking.service else None,
+    }
+
+
+# ── Default consumer: notifications and calendar entries ───────────────────────
+
+def _booking_created(p: dict, notifications: list, cal_events: list):
+    notifications.append({
+        "user_id": p["provider_id"],
+        "title": "New Booking Request",
+        "message": f"{p['user_name']} sent you a new booking request for {p['booking_date']} at {p['booking_time']}.",
+    })
+
+
+_STATUS_MESSAGES = {
+    "accepted": ("Booking Accepted", "Your booking on {booking_date} was accepted!", "user_id"),
+    "rejected": ("Booking Rejected", "Your booking on {booking_date} was rejected.", "user_id"),
+    "ongoing": ("Work Started", "Provider has started working on your booking ({booking_date}).", "user_id"),
+    "completed": ("Work Completed", "Provider marked booking ({booking_date}) as completed. Please confirm.", "user_id"),
+    "disputed": ("Dispute Raised", "User raised a dispute on booking #{booking_id}.", "provider_id"),
+}
+
+
+def _booking_status_changed(p: dict, notifications: list, cal_events: list):
+    if p["status"] in _STATUS_MESSAGES:
+        title, message, recipient = _STATUS_MESSAGES[p["status"]]
+        notifications.append({"user_id": p[recipient], "title": title, "message": message.format(**p)})
+
+    # Add to calendar on accept
+    if p["status"] == "accepted":
+        cal_events.append({
+            "provider_id": p["provider_id"],
+            "title": f"Booking: {p['service_name'] or 'Service'}",
+            "event_type": "booking",
+            "start_datetime": datetime.fromisoformat(f"{p['booking_date']}T{p['booking_time']}"),
+            "color": "#6366f1",
+        })
+
+
+def _review_submitted(p: dict, notifications: list, cal_events: list):
+    notifications.append({
+        "user_id": p["provider_id"],
+        "title": "New Review Received",
+        "message": f"{p['user_name']} gave you {p['rating']}⭐ rating.",
+    })
+
+
+_BUILDERS: Dict[str, Callable[[dict, list, list], None]] = {
+    BOOKING_CREATED: _booking_created,
+    BOOKING_STATUS_CHANGED: _booking_status_changed,
+    REVIEW_SUBMITTED: _review_submitted,
+}
+
+
+@consumer
+def write_notifications(db: Session, batch: List[models.OutboxEvent]):
+    notifications, cal_events = [], []
+    for outbox_event in batch:
+        build = _BUILDERS.get(outbox_event.event_type)
+        if build is not None:
+            build(outbox_event.payload, notifications, cal_events)
+    if notifications:
+        rows = db.scalars(insert(models.Notification).returning(models.Notification), notifications).all()
+        events.queue_notifications(db, rows)
+    if cal_events:
+        db.execute(insert(models.CalendarEvent), cal_events)
+
+
+# ── Processing ─────────────────────────────────────────────────────────────────
+
+def _apply(db: Session, batch: List[models.OutboxEvent]):
+    for consume in CONSUMERS:
+        consume(db, batch)
+    db.execute(
+        update(models.OutboxEvent)
+        .where(models.OutboxEvent.id.in_([e.id for e in batch]))
+        .values(processed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _pending(db: Session, limit: int) -> List[models.OutboxEvent]:
+    return db.scalars(
+        select(models.OutboxEvent)
+        .where(models.OutboxEvent.processed_at.is_(None), models.OutboxEvent.attempts < MAX_ATTEMPTS)
+        .order_by(models.OutboxEvent.id)
+        .limit(limit)
+        # Lets several workers share the table on Postgres; ignored by SQLite
+        .with_for_update(skip_locked=True)
+    ).all()
+
+
+def _retry_one(db: Session, event_id: int):
+    outbox_event = db.get(models.OutboxEvent, event_id, with_for_update={"skip_locked": True})
+    if outbox_event is None or outbox_event.processed_at is not None:
+        db.rollback()
+        return
+    attempts = outbox_event.attempts + 1
+    try:
+        _apply(db, [outbox_event])
+    except Exception as exc:
+        db.rollback()
+        logger.exception("outbox event %s failed", event_id)
+        db.execute(
+            update(models.OutboxEvent)
+            .where(models.OutboxEvent.id == event_id)
+            .values(attempts=models.OutboxEvent.attempts + 1, last_error=repr(exc)[:2000])
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if attempts >= MAX_ATTEMPTS:
+            logger.error("outbox event %s failed %d times and is given up on", event_id, attempts)
+
+
+def process_batch(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Apply up to `limit` pending events; returns how many were taken."""
+    batch = _pending(db, limit)
+    if not batch:
+        db.rollback()
+        return 0
+    ids = [e.id for e in batch]
+    try:
+        _apply(db, batch)
+    except Exception:
+        db.rollback()
+        logger.warning("outbox batch of %d failed, retrying one by one", len(ids), exc_info=True)
+        for event_id in ids:
+            _retry_one(db, event_id)
+    return len(ids)
+
+
+def drain(session_factory=SessionLocal) -> int:
+    """Process batches until nothing is pending; returns the number of events taken."""
+    total = 0
+    with session_factory() as db:
+        while True:
+            taken = process_batch(db)
+            total += taken
+            if taken < OUTBOX_BATCH_SIZE:
+                return total
+
+
+# ── Housekeeping ───────────────────────────────────────────────────────────────
+
+def purge_processed(db: Session, older_than: timedelta = None, batch: int = PURGE_BATCH_SIZE) -> int:
+    """Delete events processed more than `older_than` (default OUTBOX_RETENTION_DAYS) ago."""
+    OE = models.OutboxEvent
+    cutoff = datetime.utcnow() - (older_than if older_than is not None else timedelta(days=OUTBOX_RETENTION_DAYS))
+    total = 0
+    while True:
+        # Oldest first: old processed rows sit at the start of the id order
+        ids = db.scalars(select(OE.id).where(OE.processed_at < cutoff).order_by(OE.id).limit(batch)).all()
+        if ids:
+            db.execute(delete(OE).where(OE.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        total += len(ids)
+        if len(ids) < batch:
+            return total
+
+
+def stats(db: Session) -> dict:
+    """Unprocessed events: `pending` ones still to be tried, and `dead` ones given up on."""
+    OE = models.OutboxEvent
+    pending, dead = db.execute(
+        select(func.count().filter(OE.attempts < MAX_ATTEMPTS), func.count().filter(OE.attempts >= MAX_ATTEMPTS))
+        .where(OE.processed_at.is_(None))
+    ).one()
+    return {"pending": pending, "dead": dead}
+
+
+def housekeeping(session_factory=SessionLocal):
+    """Purge old processed events and report dead ones; the worker runs this hourly."""
+    with session_factory() as db:
+        purged = purge_processed(db) if OUTBOX_RETENTION_DAYS > 0 else 0
+        dead = stats(db)["dead"]
+    if purged:
+        logger.info("outbox: deleted %d processed events", purged)
+    if dead:
+        logger.warning("outbox: %d dead events (failed %d times), see /health/outbox", dead, MAX_ATTEMPTS)
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+# Commits that recorded events wake the in-process worker at once; polling
+# covers events written by other processes.
+
+_wakeup: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session):
+    if session.info.pop(_RECORDED_KEY, False) and _wakeup is not None:
+        loop, wake = _wakeup
+        loop.call_soon_threadsafe(wake.set)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_recorded(session, previous_transaction):
+    session.info.pop(_RECORDED_KEY, None)
+
+
+async def run_worker(poll_seconds: float = OUTBOX_POLL_SECONDS):
+    """Process the outbox until cancelled."""
+    global _wakeup
+    wake = asyncio.Event()
+    _wakeup = (asyncio.get_running_loop(), wake)
+    next_housekeeping = time.monotonic()
+    try:
+        while True:
+            wake.clear()
+            try:
+                await run_in_threadpool(drain)
+            except Exception:
+                logger.exception("outbox worker pass failed")
+            if time.monotonic() >= next_housekeeping:
+                next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL_SECONDS
+                try:
+                    await run_in_threadpool(housekeeping)
+                except Exception:
+                    logger.exception("outbox housekeeping failed")
+            try:
+                await asyncio.wait_for(wake.wait(), poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        _wakeup = None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
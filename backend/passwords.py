@@ -0,0 +1,125 @@
+"""
+Password hashing off the request path.
+
+bcrypt is slow on purpose (around 250 ms of CPU at cost 12). Run inline in
+a sync route it holds a threadpool worker and a core for the whole call, so
+a burst of logins leaves nothing for the rest of the API. Here the work runs
+in a small process pool (PASSWORD_HASH_WORKERS processes), so hashing can
+never use more than that many cores and the event loop and threadpool stay
+free. At most PASSWORD_HASH_MAX_PENDING hashes may be queued or running per
+API process; past that a request fails at once with 503 and `Retry-After`
+rather than waiting in a queue its client would give up on.
+
+The bcrypt cost is BCRYPT_ROUNDS. A stored hash with any other cost still
+verifies, and `verify_password` then also returns a hash at the current
+cost for the caller to save, so changing the cost needs no migration: users
+move over as they log in.
+
+PASSWORD_HASH_WORKERS=0 hashes in the threadpool instead (still bounded by
+the pending limit), e.g. on a single-core host. Workers are spawned, which
+re-imports the main module: a script that drives the app in-process needs
+the usual `if __name__ == "__main__":` guard.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from settings import get_settings
+
+BCRYPT_ROUNDS = get_settings().bcrypt_rounds
+PASSWORD_HASH_WORKERS = get_settings().password_hash_workers
+PASSWORD_HASH_MAX_PENDING = get_settings().password_hash_max_pending
+RETRY_AFTER_SECONDS = 1
+
+
+# ── Runs in the worker processes ───────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def _context(rounds: int):
+    # Imported here: only the worker processes need passlib
+    from passlib.context import CryptContext
+
+    # min == max == default, so a hash at any other cost needs an update
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto",
+        bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds,
+    )
+
+
+def hash_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_sync(plain: str, hashed: str, rounds: int = BCRYPT_ROUNDS) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash if the stored one has another cost)."""
+    return _context(rounds).verify_and_update(plain, hashed)
+
+
+# ── Called from the event loop ─────────────────────────────────────────────────
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Only touched from the event loop, so no lock
+_pending = 0
+_rejected = 0
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and PASSWORD_HASH_WORKERS > 0:
+        # spawn, not fork: forking a process with live threads can copy held locks
+        _pool = ProcessPoolExecutor(PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def _run(fn, *args):
+    global _pending, _rejected
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, please try again in a moment",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    _pending += 1
+    try:
+        pool = _executor()
+        if pool is None:
+            return await run_in_threadpool(fn, *args)
+        # Cancelling the await (client went away) also drops the call if it hasn't started
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(hash_sync, password, BCRYPT_ROUNDS)
+
+
+async def verify_password(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new hash to store or None); see the module docstring."""
+    return await _run(verify_sync, plain, hashed, BCRYPT_ROUNDS)
+
+
+def stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "rounds": BCRYPT_ROUNDS,
+        "pending": _pending,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "rejected": _rejected,
+    }
+
+
+def shutdown():
+    """Stop the workers, dropping queued hashes. Blocks until they have exited."""
+    global _pool
+    if _pool is not None:
+        # Waiting lets the executor's management thread finish with the pipes
+        # before they are closed (not waiting races it: EBADF at exit)
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,67 @@
+"""
+Per-provider rating aggregates kept on the users row.
+
+`rating_sum`, `rating_count` and `avg_rating` are adjusted in the same
+transaction as the review that changes them, so reading a provider's rating
+(or sorting by it) never has to aggregate the reviews table. `reconcile`
+recomputes them from scratch for backfills or to repair drift:
+
+    python ratings.py
+
+which first brings the schema to head (migration 0003 adds the columns).
+"""
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+import facets
+import models
+
+
+def apply_rating_change(db: Session, provider_id: int, delta_sum: float, delta_count: int = 0):
+    """
+    Atomically adjust a provider's aggregates (runs in the caller's
+    transaction). `delta_sum` may be a SQL expression, evaluated by the UPDATE.
+    """
+    User = models.User
+    new_count = User.rating_count + delta_count
+    new_sum = User.rating_sum + delta_sum
+    db.query(User).filter(User.id == provider_id).update(
+        {
+            User.rating_sum: new_sum,
+            User.rating_count: new_count,
+            User.avg_rating: case((new_count > 0, new_sum / new_count), else_=0.0),
+        },
+        synchronize_session=False,
+    )
+    # The bulk UPDATE bypasses the unit of work, so tell the facet index
+    facets.mark_provider(db, provider_id)
+
+
+def reconcile(db: Session) -> int:
+    """Recompute every provider's aggregates from `reviews`; returns rows fixed."""
+    actual = {
+        provider_id: (float(total or 0), count)
+        for provider_id, total, count in db.query(
+            models.Review.provider_id, func.sum(models.Review.rating), func.count(models.Review.id)
+        ).group_by(models.Review.provider_id)
+    }
+    fixed = 0
+    for user in db.query(models.User).filter(
+        (models.User.role == "provider") | models.User.id.in_(list(actual))
+    ):
+        total, count = actual.get(user.id, (0.0, 0))
+        avg = total / count if count else 0.0
+        if (user.rating_sum, user.rating_count) != (total, count) or abs((user.avg_rating or 0) - avg) > 1e-9:
+            user.rating_sum, user.rating_count, user.avg_rating = total, count, avg
+            fixed += 1
+    db.commit()
+    return fixed
+
+
+if __name__ == "__main__":
+    import migrate
+    from database import SessionLocal
+
+    migrate.upgrade()
+    with SessionLocal() as session:
+        print(f"Reconciled rating aggregates for {reconcile(session)} provider(s)")
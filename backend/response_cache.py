@@ -0,0 +1,258 @@
+"""
+Server-side cache for public GET endpoints, with ETag revalidation.
+
+`ResponseCacheMiddleware` stores whole responses (status, headers, body) for
+the routes listed in `RULES`, each with its own TTL and invalidation tags.
+Every cacheable response gets a strong ETag (SHA-256 of the body) and
+`Cache-Control: no-cache`, so browsers always revalidate and get a body-less
+304 when nothing changed.
+
+Mutating routes call `invalidate(*tags)` after they commit. A response that
+was being computed while one of its tags was invalidated is not stored, so a
+slow read can't put stale data back into the cache.
+
+The default store is an in-process LRU bounded by entry count and total body
+bytes; with several workers each keeps its own copy and an invalidation only
+reaches the worker that made the change, so other workers may serve a stale
+entry for up to the route's TTL. Anything with the `MemoryResponseStore`
+interface (e.g. one backed by Redis) can be installed with `set_store()`.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Pattern, Sequence, Set, Tuple
+
+from cache import _Counters
+from pagination import NDJSON_MEDIA_TYPE
+from settings import get_settings
+
+RESPONSE_CACHE_MAX_BYTES = get_settings().response_cache_max_bytes
+RESPONSE_CACHE_MAX_ENTRIES = get_settings().response_cache_max_entries
+
+# Responses bigger than this are passed through rather than cached
+MAX_CACHEABLE_BYTES = 1024 * 1024
+
+
+@dataclass
+class CacheRule:
+    pattern: Pattern
+    ttl: float
+    tags: Sequence[str]     # formatted with the pattern's named groups
+
+
+def _rule(path: str, ttl: float, *tags: str) -> CacheRule:
+    return CacheRule(re.compile(f"^{path}/?$"), ttl, tags)
+
+
+RULES: List[CacheRule] = [
+    _rule(r"/stats", 60, "stats"),
+    _rule(r"/services/categories", 300, "services"),
+    _rule(r"/services/(?P<service_id>\d+)", 120, "services"),
+    _rule(r"/services/provider/(?P<provider_id>\d+)", 120, "services"),
+    _rule(r"/availability/(?P<provider_id>\d+)", 300, "availability:{provider_id}"),
+    _rule(r"/reviews/provider/(?P<provider_id>\d+)", 120, "reviews", "reviews:{provider_id}"),
+    _rule(r"/reviews/provider/(?P<provider_id>\d+)/avg", 120, "reviews:{provider_id}"),
+    _rule(r"/users/(?P<user_id>\d+)", 120, "user:{user_id}"),
+]
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    expires: float = 0.0
+    tags: Tuple[str, ...] = ()
+
+
+class MemoryResponseStore(_Counters):
+    """Thread-safe LRU of `CachedResponse`s, bounded by count and body bytes."""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def generations(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(t, 0) for t in tags)
+
+    def set(self, key: str, entry: CachedResponse, seen: Tuple[int, ...]):
+        """Store `entry` unless one of its tags was invalidated since `seen`."""
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if tuple(self._generations.get(t, 0) for t in entry.tags) != seen:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._by_tag.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            **super().stats(),
+        }
+
+
+store = MemoryResponseStore()
+
+
+def set_store(new_store):
+    """Swap in another store with the same `get`/`set`/`invalidate` interface."""
+    global store
+    store = new_store
+
+
+def invalidate(*tags: str):
+    """Drop cached responses carrying any of `tags`; call after commit."""
+    store.invalidate(*tags)
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix still matches
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _accepts_ndjson(scope) -> bool:
+    accept = next((v for k, v in scope["headers"] if k == b"accept"), b"")
+    return NDJSON_MEDIA_TYPE.encode() in accept
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, rules: List[CacheRule] = None):
+        self.app = app
+        self.rules = RULES if rules is None else rules
+
+    def _match(self, path: str):
+        for rule in self.rules:
+            match = rule.pattern.match(path)
+            if match:
+                return rule, tuple(sorted({t.format(**match.groupdict()) for t in rule.tags}))
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        rule, tags = self._match(scope["path"])
+        if rule is None or _accepts_ndjson(scope):
+            # NDJSON lists are streamed, not buffered (and differ from the JSON body)
+            return await self.app(scope, receive, send)
+
+        key = scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+        if_none_match = next(
+            (v.decode("latin-1") for k, v in scope["headers"] if k == b"if-none-match"), None
+        )
+
+        entry = store.get(key)
+        if entry is not None:
+            return await self._replay(entry, if_none_match, b"HIT", send)
+
+        seen = store.generations(tags)
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            else:
+                chunks.append(message.get("body", b""))
+
+        # These routes return small JSON bodies, so buffering them is cheap
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        if start["status"] != 200 or len(body) > MAX_CACHEABLE_BYTES:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [
+            (k, v) for k, v in start["headers"]
+            if k.lower() not in (b"content-length", b"etag", b"cache-control")
+        ]
+        entry = CachedResponse(
+            status=start["status"],
+            headers=headers,
+            body=body,
+            etag=_etag(body),
+            expires=time.monotonic() + rule.ttl,
+            tags=tags,
+        )
+        store.set(key, entry, seen)
+        await self._replay(entry, if_none_match, b"MISS", send)
+
+    async def _replay(self, entry: CachedResponse, if_none_match: Optional[str], status: bytes, send):
+        headers = entry.headers + [
+            (b"etag", entry.etag.encode()),
+            (b"cache-control", b"no-cache"),
+            (b"x-cache", status),
+        ]
+        if if_none_match and _etag_matches(if_none_match, entry.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": [
+                (k, v) for k, v in headers if k.lower() != b"content-type"
+            ]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers.append((b"content-length", str(len(entry.body)).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
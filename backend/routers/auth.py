@@ -1,22 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import models, schemas
-from auth import hash_password, verify_password, create_access_token
+from auth import create_access_token
+from passwords import hash_password, verify_password
+import response_cache
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Async so that waiting on the password hash pool costs an event-loop task,
+# not a threadpool worker (see passwords.py). The read transaction is ended
+# before hashing, so a queue of logins doesn't hold pool connections too.
+
 
 @router.post("/register", response_model=schemas.UserOut)
-def register(user_data: schemas.UserRegister, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(models.User.email == user_data.email).first()
+async def register(user_data: schemas.UserRegister, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.scalar(select(models.User.id).where(models.User.email == user_data.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
+    await db.commit()
 
     user = models.User(
         name=user_data.name,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password(user_data.password),
         role=user_data.role,
         age=user_data.age,
         location=user_data.location,
@@ -24,16 +33,32 @@ def register(user_data: schemas.UserRegister, db: Session = Depends(get_db)):
         mobile=user_data.mobile,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    # The check above ran before hashing; a concurrent registration of the
+    # same email can commit in between, and the unique index rejects ours
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    if user.role == "provider":
+        response_cache.invalidate("stats")
+    await db.refresh(user)
     return user
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+async def login(credentials: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(models.User).where(models.User.email == credentials.email))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    await db.commit()
+    valid, new_hash = await verify_password(credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Stored at another BCRYPT_ROUNDS; upgrade it now that we have the password
+        user.password_hash = new_hash
+        await db.commit()
 
     token = create_access_token({"sub": str(user.id), "role": user.role})
     return {
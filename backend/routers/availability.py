@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_read_db
 import models, schemas
 from auth import require_provider
+import response_cache
+from slots import MAX_RANGE_DAYS, free_slots
 
 router = APIRouter(prefix="/availability", tags=["Provider Availability"])
 
@@ -19,12 +22,35 @@ def get_my_availability(
 
 
 @router.get("/{provider_id}", response_model=List[schemas.AvailabilityOut])
-def get_provider_availability(provider_id: int, db: Session = Depends(get_db)):
+def get_provider_availability(provider_id: int, db: Session = Depends(get_read_db)):
     return db.query(models.ProviderAvailability).filter(
         models.ProviderAvailability.provider_id == provider_id
     ).all()
 
 
+@router.get("/{provider_id}/slots", response_model=List[schemas.SlotOut])
+def get_free_slots(
+    provider_id: int,
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    duration: int = Query(60, ge=15, le=480),
+    # A slot taken in the replication lag still shows as free; booking it
+    # then gets a 409 from the unique index on the primary
+    db: Session = Depends(get_read_db),
+):
+    """
+    Bookable slots between `from` and `to` (inclusive, default: the next 7
+    days): availability windows minus active bookings and holidays.
+    """
+    start = start or date.today()
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return free_slots(db, provider_id, start, end, duration)
+
+
 @router.post("/", response_model=schemas.AvailabilityOut)
 def set_availability(
     data: schemas.AvailabilityCreate,
@@ -39,12 +65,14 @@ def set_availability(
         existing.start_time = data.start_time
         existing.end_time = data.end_time
         db.commit()
+        response_cache.invalidate(f"availability:{current_user.id}")
         db.refresh(existing)
         return existing
 
     avail = models.ProviderAvailability(provider_id=current_user.id, **data.model_dump())
     db.add(avail)
     db.commit()
+    response_cache.invalidate(f"availability:{current_user.id}")
     db.refresh(avail)
     return avail
 
@@ -63,4 +91,5 @@ def delete_availability(
         raise HTTPException(status_code=404, detail="Not found")
     db.delete(avail)
     db.commit()
+    response_cache.invalidate(f"availability:{current_user.id}")
     return {"message": "Deleted"}
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased, joinedload
 from typing import List
 from database import get_db
-import models, schemas
+import fastjson, models, outbox, schemas
 from auth import get_current_user, require_provider, require_user
+from pagination import NDJSON_RESPONSES, PageParams, paginate, stream_rows, wants_ndjson
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
@@ -14,10 +18,13 @@ VALID_TRANSITIONS = {
     "completed": ["disputed"],
 }
 
+BOOKING_PAGE_KEYS = [(models.Booking.created_at, True), (models.Booking.id, True)]
 
-def _create_notification(db, user_id: int, title: str, message: str):
-    notif = models.Notification(user_id=user_id, title=title, message=message)
-    db.add(notif)
+
+def _is_slot_conflict(exc: IntegrityError) -> bool:
+    # SQLite names the columns, Postgres names the index
+    message = str(exc.orig)
+    return "ux_bookings_active_slot" in message or "bookings.booking_time" in message
 
 
 @router.post("/", response_model=schemas.BookingOut)
@@ -26,24 +33,9 @@ def create_booking(
     current_user: models.User = Depends(require_user),
     db: Session = Depends(get_db),
 ):
-    # Edge case: past date
-    from datetime import date
-    try:
-        booking_date = date.fromisoformat(data.booking_date)
-        if booking_date < date.today():
-            raise HTTPException(status_code=400, detail="Cannot book in the past")
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-
-    # Edge case: double booking check
-    conflict = db.query(models.Booking).filter(
-        models.Booking.provider_id == data.provider_id,
-        models.Booking.booking_date == data.booking_date,
-        models.Booking.booking_time == data.booking_time,
-        models.Booking.status.in_(["pending", "accepted", "ongoing"]),
-    ).first()
-    if conflict:
-        raise HTTPException(status_code=409, detail="Provider already has a booking at that time")
+    # Edge case: past date (the format itself is validated by the schema)
+    if data.booking_date < date.today():
+        raise HTTPException(status_code=400, detail="Cannot book in the past")
 
     booking = models.Booking(
         user_id=current_user.id,
@@ -55,24 +47,118 @@ def create_booking(
         status="pending",
     )
     db.add(booking)
-    db.flush()
+    # Double booking is rejected by the ux_bookings_active_slot unique index,
+    # so two concurrent requests can't both pass a check-then-insert.
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        if _is_slot_conflict(exc):
+            raise HTTPException(status_code=409, detail="Provider already has a booking at that time")
+        raise
 
-    _create_notification(
-        db, data.provider_id,
-        "New Booking Request",
-        f"{current_user.name} sent you a new booking request for {data.booking_date} at {data.booking_time}."
-    )
+    outbox.record(db, (outbox.BOOKING_CREATED, {
+        "booking_id": booking.id,
+        "provider_id": data.provider_id,
+        "user_name": current_user.name,
+        "booking_date": data.booking_date.isoformat(),
+        "booking_time": f"{data.booking_time:%H:%M}",
+    }))
     db.commit()
     db.refresh(booking)
     return booking
 
 
-@router.get("/user", response_model=List[schemas.BookingOut])
-def my_bookings_as_user(
+def _dashboard_rows(db: Session, party_column, party_join, *extra):
+    """One join selecting just the columns of `schemas.*BookingRow`."""
+    B, S = models.Booking, models.Service
+    Party = aliased(models.User)
+    return (
+        db.query(fastjson.Row(
+            "booking",
+            B.id, B.status, B.booking_date, B.booking_time, B.problem_description, B.created_at,
+            fastjson.Row("service", S.id, S.service_name),
+            fastjson.Row(party_column, Party.id, Party.name),
+            *extra,
+        ))
+        .select_from(B)
+        .outerjoin(S, S.id == B.service_id)
+        .outerjoin(Party, Party.id == party_join)
+    )
+
+
+@router.get("/user/dashboard", response_model=List[schemas.UserBookingRow])
+def my_booking_rows_as_user(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(require_user),
     db: Session = Depends(get_db),
 ):
+    """Slim version of /bookings/user: names instead of nested profiles."""
+    R = models.Review
+    query = (
+        _dashboard_rows(db, "provider", models.Booking.provider_id,
+                        fastjson.Row("review", R.id, R.rating, R.feedback, R.created_at))
+        .outerjoin(R, R.booking_id == models.Booking.id)
+        .filter(models.Booking.user_id == current_user.id)
+    )
+    return paginate(query, page, response, BOOKING_PAGE_KEYS)
+
+
+@router.get("/provider/dashboard", response_model=List[schemas.ProviderBookingRow])
+def my_booking_rows_as_provider(
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: models.User = Depends(require_provider),
+    db: Session = Depends(get_db),
+):
+    """Slim version of /bookings/provider: names instead of nested profiles."""
+    query = (
+        _dashboard_rows(db, "user", models.Booking.user_id)
+        .filter(models.Booking.provider_id == current_user.id)
+    )
+    return paginate(query, page, response, BOOKING_PAGE_KEYS)
+
+
+# FAST_JSON: `schemas.BookingOut` as one row per booking (built once; that costs more than the query)
+_BookingUser, _BookingProvider, _ServiceProvider, _Reviewer = (aliased(models.User) for _ in range(4))
+BOOKING_OUT_ROW = fastjson.row_of(
+    schemas.BookingOut, models.Booking,
+    user=_BookingUser, provider=_BookingProvider,
+    service=(models.Service, {"provider": _ServiceProvider}),
+    review=(models.Review, {"user": _Reviewer}),
+)
+
+
+def _booking_out_rows(db: Session):
+    """`schemas.BookingOut` as dicts, for the FAST_JSON path: one join, no ORM objects."""
+    B, S, R = models.Booking, models.Service, models.Review
     return (
+        db.query(BOOKING_OUT_ROW)
+        .select_from(B)
+        .outerjoin(_BookingUser, _BookingUser.id == B.user_id)
+        .outerjoin(_BookingProvider, _BookingProvider.id == B.provider_id)
+        .outerjoin(S, S.id == B.service_id)
+        .outerjoin(_ServiceProvider, _ServiceProvider.id == S.provider_id)
+        .outerjoin(R, R.booking_id == B.id)
+        .outerjoin(_Reviewer, _Reviewer.id == R.user_id)
+    )
+
+
+@router.get("/user", response_model=List[schemas.BookingOut], responses=NDJSON_RESPONSES)
+def my_bookings_as_user(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    current_user: models.User = Depends(require_user),
+    db: Session = Depends(get_db),
+):
+    if fastjson.ENABLED or wants_ndjson(request):
+        query = _booking_out_rows(db).filter(models.Booking.user_id == current_user.id)
+        if wants_ndjson(request):
+            return fastjson.ndjson(schemas.BookingOut, stream_rows(query, page, BOOKING_PAGE_KEYS))
+        return fastjson.response(List[schemas.BookingOut], paginate(query, page, response, BOOKING_PAGE_KEYS), response)
+    query = (
         db.query(models.Booking)
         .options(
             joinedload(models.Booking.service),
@@ -80,17 +166,24 @@ def my_bookings_as_user(
             joinedload(models.Booking.review),
         )
         .filter(models.Booking.user_id == current_user.id)
-        .order_by(models.Booking.created_at.desc())
-        .all()
     )
+    return paginate(query, page, response, BOOKING_PAGE_KEYS)
 
 
-@router.get("/provider", response_model=List[schemas.BookingOut])
+@router.get("/provider", response_model=List[schemas.BookingOut], responses=NDJSON_RESPONSES)
 def my_bookings_as_provider(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(require_provider),
     db: Session = Depends(get_db),
 ):
-    return (
+    if fastjson.ENABLED or wants_ndjson(request):
+        query = _booking_out_rows(db).filter(models.Booking.provider_id == current_user.id)
+        if wants_ndjson(request):
+            return fastjson.ndjson(schemas.BookingOut, stream_rows(query, page, BOOKING_PAGE_KEYS))
+        return fastjson.response(List[schemas.BookingOut], paginate(query, page, response, BOOKING_PAGE_KEYS), response)
+    query = (
         db.query(models.Booking)
         .options(
             joinedload(models.Booking.service),
@@ -98,24 +191,12 @@ def my_bookings_as_provider(
             joinedload(models.Booking.review),
         )
         .filter(models.Booking.provider_id == current_user.id)
-        .order_by(models.Booking.created_at.desc())
-        .all()
     )
+    return paginate(query, page, response, BOOKING_PAGE_KEYS)
 
 
-@router.put("/{booking_id}/status", response_model=schemas.BookingOut)
-def update_booking_status(
-    booking_id: int,
-    update: schemas.BookingStatusUpdate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-
-    new_status = update.status
-
+def _apply_transition(booking: models.Booking, new_status: str, current_user: models.User):
+    """Check role and VALID_TRANSITIONS, then set the status; raises HTTPException."""
     # Role-based guards
     if new_status in ["accepted", "rejected", "ongoing"] and current_user.id != booking.provider_id:
         raise HTTPException(status_code=403, detail="Only the provider can perform this action")
@@ -138,30 +219,68 @@ def update_booking_status(
 
     booking.status = new_status
 
-    # Notifications
-    status_messages = {
-        "accepted": ("Booking Accepted", f"Your booking on {booking.booking_date} was accepted!", booking.user_id),
-        "rejected": ("Booking Rejected", f"Your booking on {booking.booking_date} was rejected.", booking.user_id),
-        "ongoing": ("Work Started", f"Provider has started working on your booking ({booking.booking_date}).", booking.user_id),
-        "completed": ("Work Completed", f"Provider marked booking ({booking.booking_date}) as completed. Please confirm.", booking.user_id),
-        "disputed": ("Dispute Raised", f"User raised a dispute on booking #{booking_id}.", booking.provider_id),
-    }
-    if new_status in status_messages:
-        title, msg, notify_uid = status_messages[new_status]
-        _create_notification(db, notify_uid, title, msg)
-
-    # Add to calendar on accept
-    if new_status == "accepted":
-        service = db.query(models.Service).filter(models.Service.id == booking.service_id).first()
-        cal_event = models.CalendarEvent(
-            provider_id=booking.provider_id,
-            title=f"Booking: {service.service_name if service else 'Service'}",
-            event_type="booking",
-            start_datetime=f"{booking.booking_date}T{booking.booking_time}",
-            color="#6366f1",
+
+@router.put("/status:batch", response_model=List[schemas.BookingStatusResult])
+def update_booking_status_batch(
+    batch: schemas.BookingStatusBatch,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Apply up to 100 status changes in one transaction. Items are validated
+    and applied in order, each on its own: a failing item is reported in its
+    result and does not affect the others.
+    """
+    ids = {item.booking_id for item in batch.items}
+    # Only the caller's own bookings: anyone else's is "not found", status and all
+    bookings = {
+        b.id: b for b in db.query(models.Booking)
+        .options(joinedload(models.Booking.service))
+        .filter(
+            models.Booking.id.in_(ids),
+            or_(models.Booking.user_id == current_user.id, models.Booking.provider_id == current_user.id),
         )
-        db.add(cal_event)
+    }
+
+    results, changes = [], []
+    for item in batch.items:
+        booking = bookings.get(item.booking_id)
+        try:
+            if booking is None:
+                raise HTTPException(status_code=404, detail="Booking not found")
+            _apply_transition(booking, item.status, current_user)
+        except HTTPException as exc:
+            results.append(schemas.BookingStatusResult(
+                booking_id=item.booking_id, ok=False, status=booking.status if booking else None,
+                status_code=exc.status_code, detail=exc.detail,
+            ))
+            continue
+        changes.append(outbox.booking_status_event(booking, item.status))
+        results.append(schemas.BookingStatusResult(booking_id=booking.id, ok=True, status=booking.status))
+
+    outbox.record(db, *changes)
+    db.commit()
+    return results
+
+
+@router.put("/{booking_id}/status", response_model=schemas.BookingOut)
+def update_booking_status(
+    booking_id: int,
+    update: schemas.BookingStatusUpdate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    booking = (
+        db.query(models.Booking)
+        .options(joinedload(models.Booking.service))
+        .filter(models.Booking.id == booking_id)
+        .first()
+    )
+    if not booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
 
+    _apply_transition(booking, update.status, current_user)
+    outbox.record(db, outbox.booking_status_event(booking, update.status))
     db.commit()
     db.refresh(booking)
     return booking
@@ -1,21 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 import models, schemas
 from auth import require_provider
+from pagination import PageParams, paginate
 
 router = APIRouter(prefix="/calendar", tags=["Calendar"])
 
 
 @router.get("/", response_model=List[schemas.CalendarEventOut])
 def get_my_events(
+    response: Response,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page: PageParams = Depends(),
     current_user: models.User = Depends(require_provider),
     db: Session = Depends(get_db),
 ):
-    return db.query(models.CalendarEvent).filter(
+    """Events in chronological order; pass `start`/`end` to get only the visible window."""
+    query = db.query(models.CalendarEvent).filter(
         models.CalendarEvent.provider_id == current_user.id
-    ).all()
+    )
+    if start or end:
+        if not (start and end) or end <= start:
+            raise HTTPException(status_code=400, detail="Pass both 'start' and 'end', with end after start")
+        query = query.filter(models.CalendarEvent.overlapping(start.replace(tzinfo=None), end.replace(tzinfo=None)))
+    return paginate(query, page, response, [(models.CalendarEvent.start_datetime, False), (models.CalendarEvent.id, False)])
 
 
 @router.post("/", response_model=schemas.CalendarEventOut)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from media import media_path
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+# Media files are content-addressed and never change once written
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{name}")
+def get_media(name: str, request: Request):
+    path = media_path(name)
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Not found")
+
+    etag = f'"{name.rsplit(".", 1)[0]}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match == "*" or etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
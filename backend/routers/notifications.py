@@ -1,63 +1,127 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db, get_async_sessionmaker
+import events
 import models, schemas
-from auth import get_current_user
+from auth import get_current_user_async, get_stream_user_id
 
+# Async end to end: these are polled by every open tab, so they shouldn't
+# each hold a threadpool worker while waiting on the database.
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+# Comment line sent on idle streams so proxies keep them open
+HEARTBEAT_SECONDS = 20
+
+
+def _unread_query(user_id: int):
+    return select(func.count(models.Notification.id)).where(
+        models.Notification.user_id == user_id,
+        models.Notification.is_read == False,
+    )
+
 
 @router.get("/", response_model=List[schemas.NotificationOut])
-def get_notifications(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_notifications(
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return (
-        db.query(models.Notification)
-        .filter(models.Notification.user_id == current_user.id)
+    result = await db.scalars(
+        select(models.Notification)
+        .where(models.Notification.user_id == current_user.id)
         .order_by(models.Notification.created_at.desc())
         .limit(50)
-        .all()
     )
+    return result.all()
 
 
 @router.put("/{notif_id}/read")
-def mark_read(
+async def mark_read(
     notif_id: int,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    notif = db.query(models.Notification).filter(
+    notif = await db.scalar(select(models.Notification).where(
         models.Notification.id == notif_id,
         models.Notification.user_id == current_user.id,
-    ).first()
+    ))
     if notif:
         notif.is_read = True
-        db.commit()
+        await db.commit()
+        events.publish_unread_changed(current_user.id)
     return {"message": "Marked as read"}
 
 
 @router.put("/read-all")
-def mark_all_read(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def mark_all_read(
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db.query(models.Notification).filter(
-        models.Notification.user_id == current_user.id,
-        models.Notification.is_read == False,
-    ).update({"is_read": True})
-    db.commit()
+    await db.execute(
+        update(models.Notification)
+        .where(
+            models.Notification.user_id == current_user.id,
+            models.Notification.is_read == False,
+        )
+        .values(is_read=True)
+    )
+    await db.commit()
+    events.publish_unread_changed(current_user.id)
     return {"message": "All notifications marked as read"}
 
 
 @router.get("/unread-count")
-def unread_count(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def unread_count(
+    current_user: models.User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    count = db.query(models.Notification).filter(
-        models.Notification.user_id == current_user.id,
-        models.Notification.is_read == False,
-    ).count()
+    count = await db.scalar(_unread_query(current_user.id))
     return {"count": count}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _event_stream(request: Request, user_id: int):
+    async def unread_count() -> int:
+        # Short session per read; the database is only touched when something changed
+        async with get_async_sessionmaker()() as db:
+            return await db.scalar(_unread_query(user_id))
+
+    async with events.broker.subscribe(user_id) as queue:
+        yield _sse("unread_count", {"count": await unread_count()})
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": ping\n\n"
+                continue
+            # Drain a burst so it costs one COUNT, not one per event
+            batch = [message]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            for item in batch:
+                if item["type"] == "notification":
+                    yield _sse("notification", item["notification"])
+            yield _sse("unread_count", {"count": await unread_count()})
+
+
+@router.get("/stream")
+async def stream_notifications(request: Request, user_id: int = Depends(get_stream_user_id)):
+    """
+    Server-Sent Events: a `notification` event for each new notification and
+    an `unread_count` event whenever the count may have changed (including
+    once on connect). Replaces polling `/unread-count`.
+    """
+    return StreamingResponse(
+        _event_stream(request, user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
 from typing import List
 from datetime import datetime, timedelta
-from database import get_db
-import models, schemas
-from auth import get_current_user, require_user
+from database import get_db, get_read_db
+import fastjson, models, outbox, schemas
+from auth import get_current_user, invalidate_user, require_user
+from pagination import NDJSON_RESPONSES, PageParams, paginate, stream_rows, wants_ndjson
+from ratings import apply_rating_change
+import response_cache
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
+# FAST_JSON: `schemas.ReviewOut` as one row per review (built once)
+REVIEW_OUT_ROW = fastjson.row_of(schemas.ReviewOut, models.Review, user=models.User)
+
+
+def _invalidate_provider_views(provider_id: int):
+    # The rating shows up on the profile, the review list, services and /stats
+    response_cache.invalidate(
+        f"reviews:{provider_id}", f"user:{provider_id}", "services", "stats"
+    )
+
 
 @router.post("/", response_model=schemas.ReviewOut)
 def submit_review(
@@ -37,12 +50,16 @@ def submit_review(
         feedback=data.feedback,
     )
     db.add(review)
-    db.add(models.Notification(
-        user_id=booking.provider_id,
-        title="New Review Received",
-        message=f"{current_user.name} gave you {data.rating}⭐ rating.",
-    ))
+    apply_rating_change(db, booking.provider_id, data.rating, 1)
+    outbox.record(db, (outbox.REVIEW_SUBMITTED, {
+        "booking_id": data.booking_id,
+        "provider_id": booking.provider_id,
+        "user_name": current_user.name,
+        "rating": data.rating,
+    }))
     db.commit()
+    invalidate_user(booking.provider_id)
+    _invalidate_provider_views(booking.provider_id)
     db.refresh(review)
     return review
 
@@ -55,19 +72,26 @@ def edit_review(
     db: Session = Depends(get_db),
 ):
     """Edit a review within 24 hours of original submission."""
+    # Locked (where the database can) so concurrent edits apply their deltas in turn
     review = db.query(models.Review).filter(
         models.Review.booking_id == booking_id,
         models.Review.user_id == current_user.id,
-    ).first()
+    ).with_for_update().first()
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
 
     if datetime.utcnow() - review.created_at > timedelta(hours=24):
         raise HTTPException(status_code=400, detail="Review edit window has expired (24 hours)")
 
+    # The delta is taken from the stored rating by the UPDATE itself, not from
+    # the one read above, which another edit may have changed since
+    stored_rating = select(models.Review.rating).where(models.Review.id == review.id).scalar_subquery()
+    apply_rating_change(db, review.provider_id, data.rating - stored_rating)
     review.rating = data.rating
     review.feedback = data.feedback
     db.commit()
+    invalidate_user(review.provider_id)
+    _invalidate_provider_views(review.provider_id)
     db.refresh(review)
     return review
 
@@ -86,24 +110,41 @@ def get_review_for_booking(
     return review
 
 
-@router.get("/provider/{provider_id}", response_model=List[schemas.ReviewOut])
-def provider_reviews(provider_id: int, db: Session = Depends(get_db)):
-    return (
+@router.get("/provider/{provider_id}", response_model=List[schemas.ReviewOut], responses=NDJSON_RESPONSES)
+def provider_reviews(
+    provider_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    keys = [(models.Review.created_at, True), (models.Review.id, True)]
+    if fastjson.ENABLED or wants_ndjson(request):
+        query = (
+            db.query(REVIEW_OUT_ROW)
+            .select_from(models.Review)
+            .outerjoin(models.User, models.User.id == models.Review.user_id)
+            .filter(models.Review.provider_id == provider_id)
+        )
+        if wants_ndjson(request):
+            return fastjson.ndjson(schemas.ReviewOut, stream_rows(query, page, keys))
+        return fastjson.response(List[schemas.ReviewOut], paginate(query, page, response, keys), response)
+    query = (
         db.query(models.Review)
         .options(joinedload(models.Review.user))
         .filter(models.Review.provider_id == provider_id)
-        .order_by(models.Review.created_at.desc())
-        .all()
     )
+    return paginate(query, page, response, keys)
 
 
 @router.get("/provider/{provider_id}/avg")
-def provider_avg_rating(provider_id: int, db: Session = Depends(get_db)):
-    result = db.query(func.avg(models.Review.rating), func.count(models.Review.id)).filter(
-        models.Review.provider_id == provider_id
+def provider_avg_rating(provider_id: int, db: Session = Depends(get_read_db)):
+    result = db.query(models.User.avg_rating, models.User.rating_count).filter(
+        models.User.id == provider_id
     ).first()
+    avg, count = result if result else (0.0, 0)
     return {
         "provider_id": provider_id,
-        "avg_rating": round(result[0] or 0, 1),
-        "total_reviews": result[1],
+        "avg_rating": round(avg or 0, 1),
+        "total_reviews": count or 0,
     }
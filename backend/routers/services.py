@@ -1,40 +1,148 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_read_db
 import models, schemas
 from auth import get_current_user, require_provider
+from pagination import NDJSON_RESPONSES, PageParams, paginate, stream_rows, wants_ndjson
+import facets
+import fastjson
+import response_cache
+from search import search_matches
+import geo
 
 router = APIRouter(prefix="/services", tags=["Services"])
 
+# FAST_JSON: `schemas.ServiceOut` as one row per service (built once)
+SERVICE_OUT_ROW = fastjson.row_of(schemas.ServiceOut, models.Service, provider=models.User)
 
-@router.get("/", response_model=List[schemas.ServiceOut])
+
+def _matching(db: Session, search: Optional[str], location: Optional[str], near: Optional[str], radius_km: float):
+    """
+    Services matching the text and place filters, with the keyset order to
+    page them in, and the origin to measure distances from (if `near`).
+    """
+    query = db.query(models.Service)
+    keys = [(models.Service.created_at, True), (models.Service.id, True)]
+    origin = None
+
+    if search:
+        hits = search_matches(db.get_bind(), search)
+        query = query.join(hits, hits.c.service_id == models.Service.id)
+        keys = [(hits.c.rank, False), (models.Service.id, False)]
+    if location or near:
+        query = query.join(models.User, models.Service.provider_id == models.User.id)
+    if location:
+        query = query.filter(models.User.location.ilike(f"%{location}%"))
+    if near:
+        origin = geo.parse_point(near)
+        in_radius, distance_sq = geo.providers_within(*origin, radius_km)
+        query = query.filter(in_radius)
+        keys = [(distance_sq, False), (models.Service.id, False)]
+    return query, keys, origin
+
+
+def _page(query, page: PageParams, response: Response, keys, origin):
+    services = paginate(query.options(joinedload(models.Service.provider)), page, response, keys)
+    if origin:
+        geo.annotate_distance({s.provider for s in services}, origin)
+    return services
+
+
+def _as_rows(query, provider_joined: bool):
+    """The query as `schemas.ServiceOut` dicts (no distances, so not for `near`)."""
+    rows = query.with_entities(SERVICE_OUT_ROW)
+    if not provider_joined:
+        rows = rows.join(models.User, models.Service.provider_id == models.User.id)
+    return rows
+
+
+def _page_rows(query, page: PageParams, response: Response, keys, provider_joined: bool):
+    """`_page` for the FAST_JSON path."""
+    return paginate(_as_rows(query, provider_joined), page, response, keys)
+
+
+def _stream(query, page: PageParams, keys, origin, provider_joined: bool):
+    """Every matching service as NDJSON; ORM objects only when distances have to be added."""
+    if not origin:
+        return fastjson.ndjson(schemas.ServiceOut, stream_rows(_as_rows(query, provider_joined), page, keys))
+
+    def batches():
+        for services in stream_rows(query.options(joinedload(models.Service.provider)), page, keys):
+            geo.annotate_distance({s.provider for s in services}, origin)
+            yield services
+    return fastjson.ndjson(schemas.ServiceOut, batches(), from_attributes=True)
+
+
+@router.get("/", response_model=List[schemas.ServiceOut], responses=NDJSON_RESPONSES)
 def list_services(
-    category: Optional[str] = None,
+    request: Request,
+    response: Response,
+    category: Optional[str] = Query(None, description="exact category, as listed by /services/categories"),
     search: Optional[str] = None,
     location: Optional[str] = None,
-    db: Session = Depends(get_db),
+    near: Optional[str] = Query(None, description="lat,lng or a city name; nearest providers first"),
+    radius_km: float = Query(geo.DEFAULT_RADIUS_KM, gt=0, le=geo.MAX_RADIUS_KM),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    query = db.query(models.Service).options(joinedload(models.Service.provider))
-
+    query, keys, origin = _matching(db, search, location, near, radius_km)
     if category:
-        query = query.filter(models.Service.category.ilike(f"%{category}%"))
-    if search:
-        query = query.filter(
-            models.Service.service_name.ilike(f"%{search}%") |
-            models.Service.description.ilike(f"%{search}%")
-        )
-    if location:
-        query = query.join(models.User, models.Service.provider_id == models.User.id)
-        query = query.filter(models.User.location.ilike(f"%{location}%"))
+        # Exact, so ix_services_category serves it (a substring match scans every service)
+        query = query.filter(models.Service.category == category)
+    if wants_ndjson(request):
+        return _stream(query, page, keys, origin, provider_joined=bool(location or near))
+    if fastjson.ENABLED and not near:
+        rows = _page_rows(query, page, response, keys, provider_joined=bool(location))
+        return fastjson.response(List[schemas.ServiceOut], rows, response)
+    return _page(query, page, response, keys, origin)
+
+
+@router.get("/search", response_model=schemas.ServiceSearchOut)
+def search_services(
+    response: Response,
+    category: Optional[str] = Query(None, description="exact category, as listed in the facets"),
+    price_min: Optional[float] = Query(None, ge=0),
+    price_below: Optional[float] = Query(None, gt=0, description="exclusive, like the price facet buckets"),
+    min_rating: Optional[int] = Query(None, ge=1, le=4, description="provider rating, in whole stars"),
+    search: Optional[str] = None,
+    location: Optional[str] = None,
+    near: Optional[str] = Query(None, description="lat,lng or a city name; nearest providers first"),
+    radius_km: float = Query(geo.DEFAULT_RADIUS_KM, gt=0, le=geo.MAX_RADIUS_KM),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """
+    A page of services plus the total and per-category, price and rating
+    counts for the same filters. The counts come from the in-memory facet
+    index (see facets.py); text and place filters cost one extra id-only query.
+    """
+    query, keys, origin = _matching(db, search, location, near, radius_km)
+    within = None
+    if search or location or near:
+        within = facets.bitset(service_id for (service_id,) in query.with_entities(models.Service.id))
 
-    return query.all()
+    if category:
+        query = query.filter(models.Service.category == category)
+    if price_min is not None:
+        query = query.filter(models.Service.min_price >= price_min)
+    if price_below is not None:
+        query = query.filter(models.Service.min_price < price_below)
+    if min_rating:
+        query = query.filter(models.Service.provider.has(models.User.avg_rating >= min_rating))
+
+    counts = facets.counts(
+        category=category, price_min=price_min, price_below=price_below, min_rating=min_rating, within=within
+    )
+    if fastjson.ENABLED and not near:
+        rows = _page_rows(query, page, response, keys, provider_joined=bool(location))
+        return fastjson.response(schemas.ServiceSearchOut, {**counts, "items": rows}, response)
+    return {**counts, "items": _page(query, page, response, keys, origin)}
 
 
 @router.get("/categories", response_model=List[str])
-def get_categories(db: Session = Depends(get_db)):
-    results = db.query(models.Service.category).distinct().all()
-    return [r[0] for r in results]
+def get_categories():
+    return facets.categories()
 
 
 @router.get("/my", response_model=List[schemas.ServiceOut])
@@ -42,11 +150,16 @@ def my_services(
     current_user: models.User = Depends(require_provider),
     db: Session = Depends(get_db),
 ):
-    return db.query(models.Service).filter(models.Service.provider_id == current_user.id).all()
+    return (
+        db.query(models.Service)
+        .options(joinedload(models.Service.provider))
+        .filter(models.Service.provider_id == current_user.id)
+        .all()
+    )
 
 
 @router.get("/{service_id}", response_model=schemas.ServiceOut)
-def get_service(service_id: int, db: Session = Depends(get_db)):
+def get_service(service_id: int, db: Session = Depends(get_read_db)):
     service = db.query(models.Service).options(
         joinedload(models.Service.provider)
     ).filter(models.Service.id == service_id).first()
@@ -56,8 +169,18 @@ def get_service(service_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/provider/{provider_id}", response_model=List[schemas.ServiceOut])
-def provider_services(provider_id: int, db: Session = Depends(get_db)):
-    return db.query(models.Service).filter(models.Service.provider_id == provider_id).all()
+def provider_services(
+    provider_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    query = (
+        db.query(models.Service)
+        .options(joinedload(models.Service.provider))
+        .filter(models.Service.provider_id == provider_id)
+    )
+    return paginate(query, page, response, [(models.Service.created_at, True), (models.Service.id, True)])
 
 
 @router.post("/", response_model=schemas.ServiceOut)
@@ -69,6 +192,7 @@ def create_service(
     service = models.Service(provider_id=current_user.id, **service_data.model_dump())
     db.add(service)
     db.commit()
+    response_cache.invalidate("services", "stats")
     db.refresh(service)
     return service
 
@@ -89,6 +213,7 @@ def update_service(
     for f, v in update_data.model_dump(exclude_none=True).items():
         setattr(service, f, v)
     db.commit()
+    response_cache.invalidate("services")
     db.refresh(service)
     return service
 
@@ -107,4 +232,5 @@ def delete_service(
         raise HTTPException(status_code=404, detail="Service not found")
     db.delete(service)
     db.commit()
+    response_cache.invalidate("services", "stats")
     return {"message": "Service deleted"}
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
-from database import get_db
+from typing import List, Optional
+from database import get_db, get_read_db
 import models, schemas
-from auth import get_current_user
+from auth import get_current_user, invalidate_user
+from media import MAX_UPLOAD_BYTES, avatar_url, decode_data_url, store_image
+from pagination import PageParams, paginate
+import response_cache
+import geo
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -19,15 +23,39 @@ def update_my_profile(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    for field, value in update_data.model_dump(exclude_none=True).items():
+    changes = update_data.model_dump(exclude_none=True)
+    # Older clients still send the avatar inline as a base64 data URL
+    inline = decode_data_url(changes.get("avatar_url", ""))
+    if inline is not None:
+        changes["avatar_url"] = avatar_url(store_image(inline))
+    for field, value in changes.items():
         setattr(current_user, field, value)
     db.commit()
+    invalidate_user(current_user.id)
+    # Profiles are embedded in service and review responses too
+    response_cache.invalidate(f"user:{current_user.id}", "services", "reviews")
+    db.refresh(current_user)
+    return current_user
+
+
+@router.post("/me/avatar", response_model=schemas.UserOut)
+def upload_avatar(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    data = file.file.read(MAX_UPLOAD_BYTES + 1)
+    current_user.avatar_url = avatar_url(store_image(data))
+    db.commit()
+    invalidate_user(current_user.id)
+    # Profiles are embedded in service and review responses too
+    response_cache.invalidate(f"user:{current_user.id}", "services", "reviews")
     db.refresh(current_user)
     return current_user
 
 
 @router.get("/{user_id}", response_model=schemas.UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_read_db)):
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -36,10 +64,26 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 @router.get("/providers/list", response_model=List[schemas.UserOut])
 def list_providers(
+    response: Response,
     location: str = None,
-    db: Session = Depends(get_db),
+    sort: str = Query("newest", pattern="^(newest|rating)$"),
+    near: Optional[str] = Query(None, description="lat,lng or a city name; nearest first (overrides sort)"),
+    radius_km: float = Query(geo.DEFAULT_RADIUS_KM, gt=0, le=geo.MAX_RADIUS_KM),
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(models.User).filter(models.User.role == "provider")
     if location:
         query = query.filter(models.User.location.ilike(f"%{location}%"))
-    return query.all()
+    if near:
+        origin = geo.parse_point(near)
+        in_radius, distance_sq = geo.providers_within(*origin, radius_km)
+        providers = paginate(query.filter(in_radius), page, response,
+                             [(distance_sq, False), (models.User.id, False)])
+        geo.annotate_distance(providers, origin)
+        return providers
+    if sort == "rating":
+        keys = [(models.User.avg_rating, True), (models.User.id, True)]
+    else:
+        keys = [(models.User.created_at, True), (models.User.id, True)]
+    return paginate(query, page, response, keys)
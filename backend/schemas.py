@@ -1,6 +1,15 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, PlainSerializer, field_validator
+from typing import Annotated, Optional, List
+from datetime import date, datetime, time
+
+# Typed in the database, but sent in the formats the frontend has always
+# used: "HH:MM" times and minute-precision local "YYYY-MM-DDTHH:MM" datetimes.
+ClockTime = Annotated[time, PlainSerializer(lambda t: t.strftime("%H:%M"), return_type=str, when_used="json")]
+LocalDateTime = Annotated[
+    datetime,
+    AfterValidator(lambda d: d.replace(tzinfo=None)),   # wall-clock time, as entered
+    PlainSerializer(lambda d: d.strftime("%Y-%m-%dT%H:%M"), return_type=str, when_used="json"),
+]
 
 
 # ── Auth ──────────────────────────────────────────────────────────────────────
@@ -42,6 +51,10 @@ class UserOut(BaseModel):
     mobile: Optional[str]
     avatar_url: Optional[str]
     created_at: datetime
+    avg_rating: float = 0.0
+    rating_count: int = 0
+    # Only set by `near=` searches: km from the searched point
+    distance_km: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -89,28 +102,73 @@ class ServiceOut(BaseModel):
         from_attributes = True
 
 
+class CategoryFacet(BaseModel):
+    value: str
+    count: int
+
+
+class PriceFacet(BaseModel):
+    min: float
+    max: Optional[float]    # None for the open-ended top bucket
+    count: int
+
+
+class RatingFacet(BaseModel):
+    min_rating: int
+    count: int
+
+
+class ServiceFacets(BaseModel):
+    category: List[CategoryFacet]
+    price: List[PriceFacet]
+    rating: List[RatingFacet]
+
+
+class ServiceSearchOut(BaseModel):
+    total: int
+    items: List[ServiceOut]
+    facets: ServiceFacets
+
+
 # ── Bookings ──────────────────────────────────────────────────────────────────
 
 class BookingCreate(BaseModel):
     service_id: int
     provider_id: int
     problem_description: Optional[str] = None
-    booking_date: str
-    booking_time: str
+    booking_date: date
+    booking_time: ClockTime
 
 
 class BookingStatusUpdate(BaseModel):
     status: str   # accepted | rejected | ongoing | completed | disputed
 
 
+class BookingStatusItem(BaseModel):
+    booking_id: int
+    status: str
+
+
+class BookingStatusBatch(BaseModel):
+    items: List[BookingStatusItem] = Field(..., min_length=1, max_length=100)
+
+
+class BookingStatusResult(BaseModel):
+    booking_id: int
+    ok: bool
+    status: Optional[str] = None   # the booking's status after this item
+    status_code: int = 200         # what the single-booking endpoint would have returned
+    detail: Optional[str] = None
+
+
 class BookingOut(BaseModel):
     id: int
     user_id: int
     provider_id: int
     service_id: int
     problem_description: Optional[str]
-    booking_date: str
-    booking_time: str
+    booking_date: date
+    booking_time: ClockTime
     status: str
     created_at: datetime
     user: Optional[UserOut] = None
@@ -122,6 +180,43 @@ class BookingOut(BaseModel):
         from_attributes = True
 
 
+# Dashboard rows: only what the booking lists render
+class PartyBrief(BaseModel):
+    id: int
+    name: str
+
+
+class ServiceBrief(BaseModel):
+    id: int
+    service_name: str
+
+
+class ReviewBrief(BaseModel):
+    id: int
+    rating: float
+    feedback: Optional[str]
+    created_at: datetime
+
+
+class BookingRowBase(BaseModel):
+    id: int
+    status: str
+    booking_date: date
+    booking_time: ClockTime
+    problem_description: Optional[str]
+    created_at: datetime
+    service: Optional[ServiceBrief] = None
+
+
+class ProviderBookingRow(BookingRowBase):
+    user: Optional[PartyBrief] = None
+
+
+class UserBookingRow(BookingRowBase):
+    provider: Optional[PartyBrief] = None
+    review: Optional[ReviewBrief] = None
+
+
 # ── Reviews ───────────────────────────────────────────────────────────────────
 
 class ReviewCreate(BaseModel):
@@ -144,23 +239,32 @@ class ReviewOut(BaseModel):
         from_attributes = True
 
 
+BookingOut.model_rebuild()   # resolve its forward reference to ReviewOut
+
+
 # ── Calendar ──────────────────────────────────────────────────────────────────
 
 class CalendarEventCreate(BaseModel):
     title: str
     event_type: str = "event"   # holiday | event | reminder | booking
-    start_datetime: str
-    end_datetime: Optional[str] = None
+    start_datetime: LocalDateTime
+    end_datetime: Optional[LocalDateTime] = None
     color: Optional[str] = None
 
+    @field_validator("end_datetime", mode="before")
+    @classmethod
+    def blank_end_is_none(cls, value):
+        # The event form posts "" when no end is picked
+        return value or None
+
 
 class CalendarEventOut(BaseModel):
     id: int
     provider_id: int
     title: str
     event_type: str
-    start_datetime: str
-    end_datetime: Optional[str]
+    start_datetime: LocalDateTime
+    end_datetime: Optional[LocalDateTime]
     color: Optional[str]
 
     class Config:
@@ -184,16 +288,22 @@ class NotificationOut(BaseModel):
 
 class AvailabilityCreate(BaseModel):
     day_of_week: int   # 0=Mon, 6=Sun
-    start_time: str
-    end_time: str
+    start_time: ClockTime
+    end_time: ClockTime
 
 
 class AvailabilityOut(BaseModel):
     id: int
     provider_id: int
     day_of_week: int
-    start_time: str
-    end_time: str
+    start_time: ClockTime
+    end_time: ClockTime
 
     class Config:
         from_attributes = True
+
+
+class SlotOut(BaseModel):
+    date: str          # YYYY-MM-DD
+    start_time: str    # HH:MM, the value to send as booking_time
+    end_time: str
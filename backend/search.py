@@ -0,0 +1,165 @@
+"""
+Full-text search index for services.
+
+SQLite uses an FTS5 external-content table kept in sync with `services` by
+triggers; Postgres uses a generated `tsvector` column with a GIN index. Both
+stay consistent on service create/update/delete without any router code.
+Anything else (or a SQLite build without FTS5) falls back to ILIKE.
+
+Every backend exposes `matches(text)`, a subquery of `(service_id, rank)`
+where a lower rank is a better match.
+"""
+import re
+
+from sqlalchemy import Float, Integer, literal, select, text
+from sqlalchemy.engine import Connection, Engine
+
+import models
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(raw: str):
+    return _TOKEN_RE.findall(raw.lower())
+
+
+class LikeSearch:
+    """Fallback: leading-wildcard ILIKE scan, unranked."""
+
+    name = "like"
+
+    def ensure_schema(self, conn: Connection):
+        pass
+
+    def matches(self, raw: str):
+        pattern = f"%{raw}%"
+        return (
+            select(models.Service.id.label("service_id"), literal(0.0).label("rank"))
+            .where(
+                models.Service.service_name.ilike(pattern) |
+                models.Service.description.ilike(pattern)
+            )
+            .subquery("search_hits")
+        )
+
+
+class SqliteFtsSearch:
+    """FTS5 index over service_name/description, ranked by bm25."""
+
+    name = "sqlite-fts5"
+
+    _DDL = [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS services_fts USING fts5(
+            service_name, description,
+            content='services', content_rowid='id',
+            tokenize='porter unicode61', prefix='2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN
+            INSERT INTO services_fts(rowid, service_name, description)
+            VALUES (new.id, new.service_name, new.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN
+            INSERT INTO services_fts(services_fts, rowid, service_name, description)
+            VALUES ('delete', old.id, old.service_name, old.description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE OF service_name, description ON services BEGIN
+            INSERT INTO services_fts(services_fts, rowid, service_name, description)
+            VALUES ('delete', old.id, old.service_name, old.description);
+            INSERT INTO services_fts(rowid, service_name, description)
+            VALUES (new.id, new.service_name, new.description);
+        END""",
+    ]
+
+    def ensure_schema(self, conn: Connection):
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'services_fts'"
+        )).first()
+        for ddl in self._DDL:
+            conn.exec_driver_sql(ddl)
+        if not exists:
+            # Index rows that were created before the FTS table existed
+            conn.exec_driver_sql("INSERT INTO services_fts(services_fts) VALUES ('rebuild')")
+
+    def matches(self, raw: str):
+        # Quote every token and prefix-match it so search-as-you-type works
+        query = " ".join(f'"{t}"*' for t in _tokens(raw))
+        return (
+            text(
+                "SELECT rowid AS service_id, bm25(services_fts, 10.0, 1.0) AS rank "
+                "FROM services_fts WHERE services_fts MATCH :fts_query"
+            )
+            .bindparams(fts_query=query)
+            .columns(service_id=Integer, rank=Float)
+            .subquery("search_hits")
+        )
+
+
+class PostgresSearch:
+    """Generated tsvector column + GIN index, ranked by ts_rank."""
+
+    name = "postgres-tsvector"
+
+    _DDL = [
+        """ALTER TABLE services ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(service_name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'B')
+            ) STORED""",
+        "CREATE INDEX IF NOT EXISTS ix_services_search_vector ON services USING GIN (search_vector)",
+    ]
+
+    def ensure_schema(self, conn: Connection):
+        for ddl in self._DDL:
+            conn.exec_driver_sql(ddl)
+
+    def matches(self, raw: str):
+        query = " & ".join(f"{t}:*" for t in _tokens(raw))
+        return (
+            text(
+                "SELECT id AS service_id, -ts_rank(search_vector, to_tsquery('english', :ts_query)) AS rank "
+                "FROM services WHERE search_vector @@ to_tsquery('english', :ts_query)"
+            )
+            .bindparams(ts_query=query)
+            .columns(service_id=Integer, rank=Float)
+            .subquery("search_hits")
+        )
+
+
+_backends = {}
+
+
+def _sqlite_has_fts5(conn: Connection) -> bool:
+    options = {row[0] for row in conn.exec_driver_sql("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def get_search_backend(bind):
+    """Return (and cache) the search backend for an engine or connection's database."""
+    key = bind.engine.url.render_as_string()
+    if key not in _backends:
+        dialect = bind.dialect.name
+        if dialect == "sqlite":
+            if isinstance(bind, Connection):
+                has_fts5 = _sqlite_has_fts5(bind)
+            else:
+                with bind.connect() as conn:
+                    has_fts5 = _sqlite_has_fts5(conn)
+            _backends[key] = SqliteFtsSearch() if has_fts5 else LikeSearch()
+        elif dialect == "postgresql":
+            _backends[key] = PostgresSearch()
+        else:
+            _backends[key] = LikeSearch()
+    return _backends[key]
+
+
+def ensure_search_index(conn: Connection):
+    """Create the search index (idempotent); called from the migrations."""
+    get_search_backend(conn).ensure_schema(conn)
+
+
+def search_matches(engine: Engine, raw: str):
+    """Ranked `(service_id, rank)` subquery of services matching `raw`."""
+    if not _tokens(raw):
+        # Punctuation-only input has nothing to index; keep the old substring match
+        return LikeSearch().matches(raw)
+    return get_search_backend(engine).matches(raw)
@@ -0,0 +1,119 @@
+"""
+Application configuration, read once from the environment.
+
+`get_settings()` loads `.env` (without overriding variables already set) and
+builds a frozen `Settings` the first time it is called; later calls return
+the same object. Modules copy what they need into their own constants at
+import, so anything that sets environment variables (tests, benchmarks) must
+do so before importing the app. See `.env.example` for what each one does.
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+
+def _env(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+def _flag(name: str, default: bool) -> bool:
+    return os.getenv(name, "1" if default else "0").lower() not in ("0", "false", "no", "off", "")
+
+
+def _list(name: str, default: str = "") -> Tuple[str, ...]:
+    return tuple(item.strip() for item in os.getenv(name, default).split(",") if item.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    database_url: str
+    database_replica_urls: Tuple[str, ...]
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pre_ping: str
+    auto_migrate: bool
+
+    # Auth
+    secret_key: str
+    algorithm: str
+    access_token_expire_minutes: int
+    auth_cache_url: Optional[str]
+    auth_cache_ttl: float
+    auth_cache_size: int
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_max_pending: int
+
+    # Caching, background work, diagnostics
+    response_cache_max_bytes: int
+    response_cache_max_entries: int
+    facet_index_ttl: float
+    booking_slot_minutes: int
+    outbox_worker: bool
+    outbox_batch_size: int
+    outbox_poll_seconds: float
+    outbox_retention_days: float
+    nplusone: str
+    nplusone_threshold: int
+    fast_json: str
+
+    # Responses
+    compression: Tuple[str, ...]
+    compression_min_bytes: int
+
+    # Media, CORS
+    media_root: Path
+    media_base_url: Optional[str]
+    cors_origins: str
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        hash_workers = int(_env("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+        return cls(
+            database_url=_env("DATABASE_URL", "sqlite:///./skillbridge.db"),
+            database_replica_urls=_list("DATABASE_REPLICA_URLS"),
+            db_pool_size=int(_env("DB_POOL_SIZE", "5")),
+            db_max_overflow=int(_env("DB_MAX_OVERFLOW", "10")),
+            db_pool_timeout=float(_env("DB_POOL_TIMEOUT", "30")),
+            db_pool_recycle=int(_env("DB_POOL_RECYCLE", "300")),
+            db_pre_ping=_env("DB_PRE_PING", "always").lower(),
+            auto_migrate=_flag("AUTO_MIGRATE", True),
+            secret_key=_env("SECRET_KEY", "fallback_secret_key"),
+            algorithm=_env("ALGORITHM", "HS256"),
+            access_token_expire_minutes=int(_env("ACCESS_TOKEN_EXPIRE_MINUTES", "10080")),
+            auth_cache_url=os.getenv("AUTH_CACHE_URL") or None,
+            auth_cache_ttl=float(_env("AUTH_CACHE_TTL", "60")),
+            auth_cache_size=int(_env("AUTH_CACHE_SIZE", "10000")),
+            bcrypt_rounds=int(_env("BCRYPT_ROUNDS", "12")),
+            password_hash_workers=hash_workers,
+            password_hash_max_pending=int(_env("PASSWORD_HASH_MAX_PENDING", str(max(1, hash_workers) * 16))),
+            response_cache_max_bytes=int(_env("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            response_cache_max_entries=int(_env("RESPONSE_CACHE_MAX_ENTRIES", "5000")),
+            facet_index_ttl=float(_env("FACET_INDEX_TTL", "60")),
+            booking_slot_minutes=int(_env("BOOKING_SLOT_MINUTES", "60")),
+            outbox_worker=_flag("OUTBOX_WORKER", True),
+            outbox_batch_size=int(_env("OUTBOX_BATCH_SIZE", "200")),
+            outbox_poll_seconds=float(_env("OUTBOX_POLL_SECONDS", "2")),
+            outbox_retention_days=float(_env("OUTBOX_RETENTION_DAYS", "7")),
+            nplusone=_env("NPLUSONE", "off").lower(),
+            nplusone_threshold=int(_env("NPLUSONE_THRESHOLD", "5")),
+            fast_json=_env("FAST_JSON", "off").lower(),
+            compression=tuple(e.lower() for e in _list("COMPRESSION", "br,gzip")),
+            compression_min_bytes=int(_env("COMPRESSION_MIN_BYTES", "1024")),
+            media_root=Path(_env("MEDIA_ROOT", "./media")),
+            media_base_url=os.getenv("MEDIA_BASE_URL") or None,
+            cors_origins=_env("CORS_ORIGINS", "*"),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    load_dotenv()
+    return Settings.from_env()
@@ -0,0 +1,150 @@
+"""
+Free booking slots for a provider over a date range.
+
+Everything the calculation needs (weekly availability windows, active
+bookings and holidays in the range) is fetched in a single UNION ALL query.
+Per day, the busy intervals are sorted and merged, subtracted from that
+weekday's availability window, and the remaining free intervals are cut into
+`duration`-minute slots.
+
+Bookings only record a start time, so each one is taken to occupy
+`BOOKING_MINUTES` from that start. Holidays without an end time block their
+whole start day.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, Time, cast, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+import models
+from settings import get_settings
+
+BOOKING_MINUTES = get_settings().booking_slot_minutes
+MAX_RANGE_DAYS = 62
+
+Interval = Tuple[int, int]   # [start, end) in minutes since midnight
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def merge(intervals: List[Interval]) -> List[Interval]:
+    """Sort and coalesce overlapping or touching intervals."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract(window: Interval, busy: List[Interval]) -> List[Interval]:
+    """Parts of `window` not covered by `busy` (which must already be merged)."""
+    free = []
+    cursor, end = window
+    for b_start, b_end in busy:
+        if b_end <= cursor:
+            continue
+        if b_start >= end:
+            break
+        if b_start > cursor:
+            free.append((cursor, b_start))
+        cursor = max(cursor, b_end)
+    if cursor < end:
+        free.append((cursor, end))
+    return free
+
+
+def _fetch(db: Session, provider_id: int, start: date, end: date):
+    """Availability, bookings and holidays for the range in one round-trip."""
+    PA, B, CE = models.ProviderAvailability, models.Booking, models.CalendarEvent
+    # Each branch fills the columns for its kind and leaves the rest NULL, so
+    # every column keeps a single type across the UNION.
+    no_int, no_date, no_time, no_datetime = (
+        cast(null(), t) for t in (Integer, Date, Time, DateTime)
+    )
+    rows = union_all(
+        select(
+            literal("window").label("kind"),
+            PA.day_of_week.label("day"),
+            no_date.label("on"),
+            PA.start_time.label("start_time"),
+            PA.end_time.label("end_time"),
+            no_datetime.label("start_at"),
+            no_datetime.label("end_at"),
+        ).where(PA.provider_id == provider_id),
+        select(
+            literal("booking"), no_int, B.booking_date, B.booking_time, no_time, no_datetime, no_datetime,
+        ).where(
+            B.provider_id == provider_id,
+            B.booking_date >= start,
+            B.booking_date <= end,
+            B.holding_slot(),
+        ),
+        select(
+            literal("holiday"), no_int, no_date, no_time, no_time, CE.start_datetime, CE.end_datetime,
+        ).where(
+            CE.provider_id == provider_id,
+            CE.event_type == "holiday",
+            CE.overlapping(datetime.combine(start, time()), datetime.combine(end + timedelta(days=1), time())),
+        ),
+    )
+    return db.execute(rows).all()
+
+
+def free_slots(db: Session, provider_id: int, start: date, end: date, duration: int) -> List[dict]:
+    windows: Dict[int, List[Interval]] = defaultdict(list)
+    busy: Dict[date, List[Interval]] = defaultdict(list)
+
+    for kind, weekday, on, start_time, end_time, start_at, end_at in _fetch(db, provider_id, start, end):
+        if kind == "window":
+            lo, hi = _minutes(start_time), _minutes(end_time)
+            if lo < hi:
+                windows[weekday].append((lo, hi))
+        elif kind == "booking":
+            at = _minutes(start_time)
+            busy[on].append((at, at + BOOKING_MINUTES))
+        else:
+            if end_at is None:
+                start_at = datetime.combine(start_at.date(), time())
+                end_at = start_at + timedelta(days=1)
+            # Split the holiday into per-day pieces within the requested range
+            day = max(start_at.date(), start)
+            while day <= min(end_at.date(), end):
+                midnight = datetime.combine(day, time())
+                lo = max(start_at, midnight) - midnight
+                hi = min(end_at, midnight + timedelta(days=1)) - midnight
+                if hi > lo:
+                    busy[day].append((int(lo.total_seconds()) // 60, -(-int(hi.total_seconds()) // 60)))
+                day += timedelta(days=1)
+
+    # Nothing in the past is offered (create_booking rejects past dates too)
+    now = datetime.now()
+    now_minutes = now.hour * 60 + now.minute
+    slots = []
+    day = max(start, now.date())
+    while day <= end:
+        blocked = merge(busy.get(day, []))
+        for window in merge(windows.get(day.weekday(), [])):
+            for free_start, free_end in subtract(window, blocked):
+                at = free_start
+                while day == now.date() and at < now_minutes:
+                    at += duration
+                while at + duration <= free_end:
+                    slots.append({
+                        "date": day.isoformat(),
+                        "start_time": _hhmm(at),
+                        "end_time": _hhmm(at + duration),
+                    })
+                    at += duration
+        day += timedelta(days=1)
+    return slots
@@ -0,0 +1,93 @@
+"""
+The app in-process, against a scratch SQLite database.
+
+Settings are read when the app modules are imported, so the environment is
+set here, before any of them is. Replicas, redis and the background workers
+are switched off; anything in a local .env is overridden.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{Path(_tmp.name) / 'test.db'}",
+    "DATABASE_REPLICA_URLS": "",
+    "AUTH_CACHE_URL": "",
+    "MEDIA_ROOT": str(Path(_tmp.name) / "media"),
+    "AUTO_MIGRATE": "0",
+    "OUTBOX_WORKER": "0",
+    "PASSWORD_HASH_WORKERS": "0",
+    "BCRYPT_ROUNDS": "4",
+})
+
+
+@pytest.fixture(scope="session")
+def app():
+    import migrate
+    from main import app
+
+    migrate.upgrade(configure_logger=False)
+    return app
+
+
+def _reset():
+    """Empty every table and forget what the in-process caches hold."""
+    import auth
+    import database
+    import facets
+    import models
+    import response_cache
+
+    with database.engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    response_cache.store.clear()
+    auth.token_cache.clear()
+    auth.user_cache.clear()
+    facets._reload()
+
+
+@pytest.fixture(scope="module")
+def client(app):
+    """A client for the app, on a database emptied for this module."""
+    from fastapi.testclient import TestClient
+
+    _reset()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def token():
+    """`token(user_id, role)`: a bearer header for that account."""
+    from auth import create_access_token
+
+    def make(user_id: int, role: str) -> dict:
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id), 'role': role})}"}
+    return make
+
+
+@pytest.fixture
+def request_stats(monkeypatch):
+    """
+    The `metrics.RequestStats` of every request the test makes, in order, with
+    the N+1 detector set to raise once a relationship is lazy-loaded more than
+    twice in one request.
+    """
+    import metrics
+    import nplusone
+
+    recorded = []
+
+    class Recorded(metrics.RequestStats):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            recorded.append(self)
+
+    monkeypatch.setattr(metrics, "RequestStats", Recorded)
+    monkeypatch.setattr(nplusone, "NPLUSONE", "raise")
+    monkeypatch.setattr(nplusone, "NPLUSONE_THRESHOLD", 2)
+    return recorded
@@ -0,0 +1,27 @@
+"""Registration."""
+import asyncio
+
+import httpx
+
+
+def test_concurrent_registrations_of_one_email(client, monkeypatch):
+    import routers.auth
+
+    hash_password = routers.auth.hash_password
+    both_checked = asyncio.Barrier(2)
+
+    async def hash_after_both_checked(password):
+        # Both requests are past the "already registered" check before either inserts
+        await both_checked.wait()
+        return await hash_password(password)
+
+    async def register_twice():
+        body = {"name": "A", "email": "same@example.com", "password": "pw", "role": "user"}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=client.app), base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/auth/register", json=body) for _ in range(2)))
+
+    monkeypatch.setattr(routers.auth, "hash_password", hash_after_both_checked)
+    responses = asyncio.run(register_twice())
+
+    assert sorted(r.status_code for r in responses) == [200, 400]
+    assert {"detail": "Email already registered"} in [r.json() for r in responses]
@@ -0,0 +1,120 @@
+"""
+The verified-token and current-user caches, on a stand-in for Redis.
+
+`FakeRedis` keeps values in a dict with `ex=` expiry on its own clock, which
+the tests move forward; the app's caches are swapped for `RedisCache`s on it.
+"""
+import fnmatch
+from datetime import timedelta
+
+import pytest
+
+
+class FakeRedis:
+    def __init__(self):
+        self.now = 0.0
+        self.values = {}
+        self.expires = {}
+
+    def get(self, key):
+        if key in self.expires and self.expires[key] <= self.now:
+            self.delete(key)
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        self.expires.pop(key, None)
+        if ex is not None:
+            self.expires[key] = self.now + ex
+
+    def delete(self, key):
+        self.values.pop(key, None)
+        self.expires.pop(key, None)
+
+    def scan_iter(self, pattern):
+        return [key for key in list(self.values) if fnmatch.fnmatchcase(key, pattern)]
+
+
+@pytest.fixture
+def redis(client, monkeypatch):
+    import auth
+    from cache import RedisCache
+
+    fake = FakeRedis()
+    monkeypatch.setattr(auth, "token_cache", RedisCache(fake, "auth:token", ttl=60))
+    monkeypatch.setattr(auth, "user_cache", RedisCache(fake, "auth:user", ttl=60))
+    return fake
+
+
+@pytest.fixture(scope="module")
+def user_id(client):
+    response = client.post("/auth/register", json={"name": "Asha", "email": "asha@example.com",
+                                                   "password": "pw", "role": "user"})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _bearer(user_id: int, expires: timedelta = None) -> dict:
+    from auth import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id), 'role': 'user'}, expires)}"}
+
+
+def _counters(client) -> dict:
+    auth = client.get("/health/cache").json()["auth"]
+    return {name: (auth[name]["hits"], auth[name]["misses"]) for name in ("tokens", "users")}
+
+
+def test_miss_then_hit(client, redis, user_id):
+    headers = _bearer(user_id)
+
+    assert client.get("/users/me", headers=headers).json()["name"] == "Asha"
+    assert _counters(client) == {"tokens": (0, 1), "users": (0, 1)}
+    assert redis.get(f"auth:user:{user_id}") is not None
+
+    assert client.get("/users/me", headers=headers).json()["name"] == "Asha"
+    assert _counters(client) == {"tokens": (1, 1), "users": (1, 1)}
+
+
+def test_token_entry_never_outlives_the_token(client, redis, user_id):
+    client.get("/users/me", headers=_bearer(user_id, timedelta(seconds=10)))
+
+    (token_key,) = redis.scan_iter("auth:token:*")
+    assert redis.expires[token_key] <= 10
+    assert redis.expires[f"auth:user:{user_id}"] == 60
+
+
+def test_entries_expire(client, redis, user_id):
+    headers = _bearer(user_id)
+    client.get("/users/me", headers=headers)
+
+    redis.now += 61
+    assert client.get("/users/me", headers=headers).status_code == 200
+    assert _counters(client) == {"tokens": (0, 2), "users": (0, 2)}
+
+
+def test_profile_update_invalidates_cached_user(client, redis, user_id):
+    headers = _bearer(user_id)
+    client.get("/users/me", headers=headers)
+
+    assert client.put("/users/me", json={"name": "Asha K"}, headers=headers).status_code == 200
+    assert redis.get(f"auth:user:{user_id}") is None
+    assert client.get("/users/me", headers=headers).json()["name"] == "Asha K"
+
+
+def test_memory_cache_expiry_and_bound(monkeypatch):
+    import cache
+
+    now = [0.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    memory = cache.TTLCache(maxsize=2, ttl=5)
+    memory.set("a", 1)
+    memory.set("b", 2, ttl=1)
+    memory.set("c", 3)          # evicts "a", the least recently used
+
+    assert memory.get("a") is None
+    assert memory.get("b") == 2
+    now[0] = 2
+    assert memory.get("b") is None
+    assert memory.get("c") == 3
+    assert memory.stats()["hits"] == 2 and memory.stats()["misses"] == 2
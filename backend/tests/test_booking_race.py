@@ -0,0 +1,79 @@
+"""
+Simultaneous bookings of one provider slot: exactly one wins.
+
+Runs the app under uvicorn, against its own scratch SQLite database, and
+sends every POST /bookings/ at once over separate connections.
+"""
+import asyncio
+import json
+import socket
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, select
+
+REQUESTS = 300
+
+
+def _seed(url: str):
+    import migrate
+    import models
+
+    engine = create_engine(url)
+    migrate.upgrade(engine, configure_logger=False)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Provider", "email": "p@example.com", "password_hash": "x", "role": "provider"},
+            *[{"id": 100 + i, "name": f"User {i}", "email": f"u{i}@example.com", "password_hash": "x", "role": "user"}
+              for i in range(REQUESTS)],
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": 1, "provider_id": 1, "service_name": "Repair", "min_price": 100, "category": "Plumbing"},
+        ])
+    return engine
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _fire(base_url: str, tokens, body: bytes) -> Counter:
+    from benchmarks.loadgen import request
+
+    host = base_url.split("//")[1]
+
+    async def one(token):
+        reader, writer = await asyncio.open_connection(*host.split(":"))
+        try:
+            return await request(reader, writer, host, "POST", "/bookings/",
+                                 {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}, body)
+        finally:
+            writer.close()
+
+    return Counter(await asyncio.gather(*(one(t) for t in tokens)))
+
+
+def test_one_booking_per_slot_under_concurrency(tmp_path):
+    import models
+    from auth import create_access_token
+    from benchmarks.loadgen import Server
+
+    url = f"sqlite:///{tmp_path / 'race.db'}"
+    engine = _seed(url)
+    tokens = [create_access_token({"sub": str(100 + i), "role": "user"}) for i in range(REQUESTS)]
+    slot = {"service_id": 1, "provider_id": 1,
+            "booking_date": (date.today() + timedelta(days=1)).isoformat(), "booking_time": "10:00"}
+
+    with Server("main:app", {"DATABASE_URL": url}, port=_free_port()) as server:
+        statuses = asyncio.run(_fire(server.base_url, tokens, json.dumps(slot).encode()))
+
+    with engine.connect() as conn:
+        active = conn.scalar(select(func.count()).select_from(models.Booking).where(
+            models.Booking.provider_id == 1,
+            models.Booking.status.in_(models.ACTIVE_BOOKING_STATUSES),
+        ))
+    engine.dispose()
+    assert statuses == {200: 1, 409: REQUESTS - 1}
+    assert active == 1
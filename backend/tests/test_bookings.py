@@ -0,0 +1,32 @@
+"""Booking status changes in batches."""
+from datetime import date, time, timedelta
+
+
+def test_batch_tells_a_stranger_nothing(client, token):
+    import database
+    import models
+
+    with database.engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Provider", "email": "p@example.com", "password_hash": "x", "role": "provider"},
+            {"id": 2, "name": "User", "email": "u@example.com", "password_hash": "x", "role": "user"},
+            {"id": 3, "name": "Stranger", "email": "s@example.com", "password_hash": "x", "role": "provider"},
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": 1, "provider_id": 1, "service_name": "Repair", "min_price": 100, "category": "Plumbing"},
+        ])
+        conn.execute(models.Booking.__table__.insert(), [
+            {"id": 1, "user_id": 2, "provider_id": 1, "service_id": 1, "status": "pending",
+             "booking_date": date.today() + timedelta(days=1), "booking_time": time(10)},
+        ])
+
+    items = [{"booking_id": 1, "status": "accepted"}, {"booking_id": 999, "status": "accepted"}]
+    response = client.put("/bookings/status:batch", json={"items": items}, headers=token(3, "provider"))
+
+    assert response.status_code == 200
+    assert [(r["ok"], r["status"], r["status_code"]) for r in response.json()] == [(False, None, 404)] * 2
+    assert response.json()[0]["detail"] == response.json()[1]["detail"]
+
+    # The provider still can
+    response = client.put("/bookings/status:batch", json={"items": items[:1]}, headers=token(1, "provider"))
+    assert response.json()[0]["ok"] and response.json()[0]["status"] == "accepted"
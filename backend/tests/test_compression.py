@@ -0,0 +1,33 @@
+"""Which responses CompressionMiddleware compresses."""
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from compression import CompressionMiddleware
+
+CHUNK = b"data: " + b"x" * 2000 + b"\n\n"
+
+
+def _streaming_app(media_type: str):
+    async def chunks():
+        for _ in range(3):
+            yield CHUNK
+
+    async def endpoint(request):
+        return StreamingResponse(chunks(), media_type=media_type)
+
+    return CompressionMiddleware(Starlette(routes=[Route("/", endpoint)]), min_bytes=0)
+
+
+@pytest.mark.parametrize("media_type, compressed", [
+    ("application/x-ndjson", True),
+    ("text/event-stream", False),
+])
+def test_streams(media_type, compressed):
+    with TestClient(_streaming_app(media_type)) as client:
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.content == CHUNK * 3
+    assert ("content-encoding" in response.headers) is compressed
@@ -0,0 +1,33 @@
+"""Admission of requests to the database pools."""
+import itertools
+
+import anyio
+from sqlalchemy import create_engine
+
+
+def test_request_waiting_too_long_for_a_slot_gets_503(client, monkeypatch, token):
+    import database
+
+    monkeypatch.setitem(database._db_slots, database.engine, anyio.Semaphore(0))
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+
+    response = client.get("/bookings/user", headers=token(1, "user"))
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(database.RETRY_AFTER_SECONDS)
+
+
+def test_replica_reads_use_the_replica_slots(client, monkeypatch):
+    import database
+
+    replica = create_engine(database.DATABASE_URL, **database._engine_options(database.DATABASE_URL))
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(database, "_next_replica", itertools.cycle([replica]))
+    monkeypatch.setitem(database._db_slots, replica, anyio.Semaphore(1))
+    # The primary is full: reads still get through on the replica
+    monkeypatch.setitem(database._db_slots, database.engine, anyio.Semaphore(0))
+    monkeypatch.setattr(database, "DB_POOL_TIMEOUT", 0.05)
+    try:
+        assert client.get("/users/providers/list").status_code == 200
+    finally:
+        replica.dispose()
@@ -0,0 +1,36 @@
+"""The facet index stays in step with commits made while it reloads."""
+
+
+def test_change_committed_during_reload_reaches_new_index(client, monkeypatch):
+    import database
+    import facets
+    import models
+
+    with database.SessionLocal() as db:
+        provider = models.User(name="P", email="p@example.com", password_hash="x", role="provider")
+        db.add(provider)
+        db.commit()
+        provider_id = provider.id
+    facets._reload()
+
+    rows = facets._rows
+    created = []
+
+    def rows_then_commit(*args, **kwargs):
+        assert not facets._lock.locked()
+        result = rows(*args, **kwargs)
+        if not args and not kwargs and not created:
+            # A service committed after the full read, before the new index is swapped in
+            with database.SessionLocal() as db:
+                service = models.Service(provider_id=provider_id, service_name="S", min_price=100, category="Late")
+                db.add(service)
+                db.commit()
+                created.append(service.id)
+            facets.current()   # another request applies it to the old index meanwhile
+        return result
+
+    monkeypatch.setattr(facets, "_rows", rows_then_commit)
+    facets._reload()
+
+    assert created[0] in facets.current().services
+    assert facets.categories() == ["Late"]
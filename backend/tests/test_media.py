@@ -0,0 +1,31 @@
+"""Avatar uploads are stored in the media store and linked host-relative."""
+import base64
+import io
+
+from PIL import Image
+
+
+def _png(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 48), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_avatar_upload_stores_relative_link(client, token):
+    user_id = client.post("/auth/register", json={"name": "A", "email": "a@example.com", "password": "pw",
+                                                  "role": "user"}).json()["id"]
+    headers = token(user_id, "user")
+
+    response = client.post("/users/me/avatar", files={"file": ("a.png", _png("red"), "image/png")}, headers=headers)
+    assert response.status_code == 200
+    link = response.json()["avatar_url"]
+    assert link.startswith("/media/") and link.endswith("_512.jpg")
+
+    served = client.get(link)
+    assert served.status_code == 200
+    assert served.headers["content-type"] == "image/jpeg"
+
+    # Older clients' inline data URLs end up in the same place
+    inline = "data:image/png;base64," + base64.b64encode(_png("blue")).decode()
+    link = client.put("/users/me", json={"avatar_url": inline}, headers=headers).json()["avatar_url"]
+    assert link.startswith("/media/")
@@ -0,0 +1,33 @@
+"""Request metrics: what streamed and single-piece responses record."""
+import metrics
+
+ROUTE = (("method", "GET"), ("route", "/services/"))
+
+
+def _statements() -> tuple:
+    """(requests, SQL statements) recorded for GET /services/ so far."""
+    counts, total, n = metrics.REQUEST_SQL_STATEMENTS._series.get(ROUTE, (None, 0, 0))
+    return n, total
+
+
+def test_single_piece_response_has_server_timing(client):
+    response = client.get("/services/")
+    assert response.status_code == 200
+    assert "db;dur=" in response.headers["server-timing"]
+
+
+def test_streamed_response_counts_sql_read_while_streaming(client, token):
+    registered = client.post("/auth/register", json={"name": "P", "email": "p@example.com", "password": "pw",
+                                                     "role": "provider", "location": "Pune"})
+    provider = token(registered.json()["id"], "provider")
+    for i in range(3):
+        client.post("/services/", json={"service_name": f"S{i}", "min_price": 10, "category": "C"}, headers=provider)
+    before = _statements()
+
+    response = client.get("/services/", headers={"Accept": "application/x-ndjson"})
+
+    assert len(response.text.splitlines()) == 3
+    assert "server-timing" not in response.headers
+    requests, statements = _statements()
+    assert requests == before[0] + 1
+    assert statements > before[1]   # the listing query runs on the first read of the stream
@@ -0,0 +1,21 @@
+"""Outbox housekeeping: old processed events are purged, dead ones counted."""
+from datetime import datetime, timedelta
+
+
+def test_purge_and_dead_events(client):
+    import database
+    import models
+    import outbox
+
+    old, recent = datetime.utcnow() - timedelta(days=30), datetime.utcnow()
+    with database.engine.begin() as conn:
+        conn.execute(models.OutboxEvent.__table__.insert(), [
+            {"event_type": "x", "payload": {}, "processed_at": processed_at, "attempts": attempts}
+            for processed_at, attempts in [(old, 0)] * 5 + [(recent, 0), (None, 0), (None, outbox.MAX_ATTEMPTS)]
+        ])
+
+    with database.SessionLocal() as db:
+        assert outbox.purge_processed(db, batch=2) == 5
+        assert db.query(models.OutboxEvent).count() == 3
+
+    assert client.get("/health/outbox").json() == {"pending": 1, "dead": 1}
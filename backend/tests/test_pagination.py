@@ -0,0 +1,52 @@
+"""NDJSON streams list the same items as paging through X-Next-Cursor."""
+import json
+
+import pytest
+
+SERVICES = 7
+
+
+@pytest.fixture(scope="module")
+def services(client):
+    import database
+    import geo
+    import models
+
+    lat, lng = geo.geocode("Pune")
+    with database.engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "P", "email": "p@example.com", "password_hash": "x", "role": "provider",
+             "location": "Pune", "latitude": lat, "longitude": lng, "geohash": geo.geohash(lat, lng)},
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"provider_id": 1, "service_name": f"S{i}", "min_price": 100 + i, "category": "C"} for i in range(SERVICES)
+        ])
+
+
+def _pages(client, path: str, limit: int = 3) -> list:
+    items, cursor = [], None
+    while True:
+        response = client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        items += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return items
+
+
+def _stream(client, path: str, **params) -> list:
+    response = client.get(path, params=params, headers={"Accept": "application/x-ndjson"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("path", ["/services/", "/services/?near=Pune"])
+def test_stream_matches_pages(client, services, path):
+    pages = _pages(client, path)
+    assert len(pages) == SERVICES
+    assert _stream(client, path) == pages
+
+
+def test_stream_starts_at_cursor(client, services):
+    first = client.get("/services/", params={"limit": 3})
+    rest = _stream(client, "/services/", cursor=first.headers["x-next-cursor"])
+    assert first.json() + rest == _pages(client, "/services/")
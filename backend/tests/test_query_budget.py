@@ -0,0 +1,123 @@
+"""
+Per-endpoint SQL statement budgets, with the N+1 detector set to raise.
+
+Seeds several providers, users, services, bookings and reviews (enough rows
+for a per-row query to stand out) and calls each endpoint in `BUDGETS` once,
+after the auth cache and the facet index are warm, so the count is the
+endpoint's own.
+
+A budget is the statement count the endpoint needs no matter how many rows
+it returns. When a change legitimately needs another query, raise the
+budget in the same change.
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+PROVIDERS, USERS, SERVICES_PER_PROVIDER = 4, 4, 5
+
+# (path, who) -> statements; {pid}/{sid}/{bid} are filled from the seed data
+BUDGETS = {
+    ("/services/", None): 1,
+    ("/services/?location=Pune", None): 1,
+    ("/services/?near=Pune&radius_km=50", None): 1,
+    ("/services/search?min_rating=3", None): 1,
+    ("/services/search?near=Pune", None): 2,
+    ("/services/categories", None): 0,
+    ("/services/{sid}", None): 1,
+    ("/services/provider/{pid}", None): 1,
+    ("/services/my", "provider"): 1,
+    ("/users/{pid}", None): 1,
+    ("/users/providers/list", None): 1,
+    ("/users/providers/list?near=18.52,73.85", None): 1,
+    ("/bookings/user", "user"): 2,
+    ("/bookings/provider", "provider"): 2,
+    ("/bookings/user/dashboard", "user"): 1,
+    ("/bookings/provider/dashboard", "provider"): 1,
+    ("/reviews/provider/{pid}", None): 1,
+    ("/reviews/provider/{pid}/avg", None): 1,
+    ("/reviews/booking/{bid}", "user"): 1,
+    ("/calendar/", "provider"): 1,
+    ("/availability/{pid}", None): 1,
+    ("/availability/{pid}/slots", None): 1,
+    ("/notifications/", "user"): 1,
+    ("/notifications/unread-count", "user"): 1,
+    ("/stats", None): 3,
+}
+
+
+def _seed(engine):
+    import geo
+    import models
+
+    pune = geo.geocode("Pune")
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": i, "name": f"Provider {i}", "email": f"p{i}@example.com", "password_hash": "x",
+             "role": "provider", "location": "Pune", "latitude": pune[0], "longitude": pune[1] + i / 100,
+             "geohash": geo.geohash(pune[0], pune[1] + i / 100)} for i in range(1, PROVIDERS + 1)
+        ] + [
+            {"id": 100 + i, "name": f"User {i}", "email": f"u{i}@example.com", "password_hash": "x", "role": "user",
+             "location": "Mumbai", "latitude": None, "longitude": None, "geohash": None}
+            for i in range(1, USERS + 1)
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": p * 10 + s, "provider_id": p, "service_name": f"Service {p}.{s}",
+             "min_price": 100, "category": f"Category {s}"}
+            for p in range(1, PROVIDERS + 1) for s in range(SERVICES_PER_PROVIDER)
+        ])
+        conn.execute(models.ProviderAvailability.__table__.insert(), [
+            {"provider_id": p, "day_of_week": d, "start_time": time(9), "end_time": time(17)}
+            for p in range(1, PROVIDERS + 1) for d in range(7)
+        ])
+        bookings, reviews, notifications, events = [], [], [], []
+        day = date.today() + timedelta(days=1)
+        for u in range(101, 101 + USERS):
+            for p in range(1, PROVIDERS + 1):
+                for n in range(3):
+                    booking_id = len(bookings) + 1
+                    status = ("pending", "accepted", "completed")[n]
+                    bookings.append({
+                        "id": booking_id, "user_id": u, "provider_id": p, "service_id": p * 10 + n,
+                        "booking_date": day + timedelta(days=booking_id), "booking_time": time(10), "status": status,
+                    })
+                    if status == "completed":
+                        reviews.append({"booking_id": booking_id, "user_id": u, "provider_id": p, "rating": 4})
+                    notifications.append({"user_id": u, "title": "t", "message": "m", "is_read": False})
+                    events.append({"provider_id": p, "title": "Booking", "event_type": "booking",
+                                   "start_datetime": datetime.combine(day, time())})
+        conn.execute(models.Booking.__table__.insert(), bookings)
+        conn.execute(models.Review.__table__.insert(), reviews)
+        conn.execute(models.Notification.__table__.insert(), notifications)
+        conn.execute(models.CalendarEvent.__table__.insert(), events)
+        return {"pid": 1, "sid": 10, "bid": next(r["booking_id"] for r in reviews if r["user_id"] == 101)}
+
+
+@pytest.fixture(scope="module")
+def seeded(client):
+    """`(ids, headers)`: the ids the paths are filled with, and a bearer header per role."""
+    import database
+    import facets
+    from auth import create_access_token
+
+    ids = _seed(database.engine)
+    headers = {
+        "provider": {"Authorization": f"Bearer {create_access_token({'sub': '1', 'role': 'provider'})}"},
+        "user": {"Authorization": f"Bearer {create_access_token({'sub': '101', 'role': 'user'})}"},
+    }
+    for header in headers.values():
+        assert client.get("/users/me", headers=header).status_code == 200
+    facets._reload()
+    return ids, headers
+
+
+@pytest.mark.parametrize("template, who", list(BUDGETS), ids=[
+    f"{who or 'anon'} {template}" for template, who in BUDGETS])
+def test_endpoint_within_query_budget(client, seeded, request_stats, template, who):
+    ids, headers = seeded
+    response = client.get(template.format(**ids), headers=headers.get(who))
+
+    assert response.status_code == 200, response.text
+    stats = request_stats[-1]
+    assert stats.sql_statements <= BUDGETS[template, who], (
+        f"{template}: {stats.sql_statements} statements, budget {BUDGETS[template, who]}")
@@ -0,0 +1,136 @@
+"""
+Every query the routers issue is served by an index.
+
+Drives each route once, records the SELECT/UPDATE/DELETE statements it sends
+and runs `EXPLAIN QUERY PLAN` on them.
+"""
+import re
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+_SKIP = re.compile(r"sqlite_master|alembic_version|PRAGMA", re.I)
+# Every row of the table, in index order or not. A lookup through a virtual
+# table's own index (full-text MATCH) is not one.
+_FULL_SCAN = re.compile(r"^SCAN (\w+)\b(?! VIRTUAL TABLE INDEX)")
+
+# Filtered queries allowed to scan, and why
+KNOWN_SCANS = {
+    # The free-text place filter; `near` is the indexed way to search by place
+    "lower(users.location) LIKE lower(?)": "location substring match",
+    # The partial index only holds unprocessed events: the scan is over the backlog
+    "FROM outbox_events WHERE outbox_events.processed_at IS NULL": "walks ix_outbox_events_pending",
+}
+
+# The hot query shapes, and the index each one must be served by
+HOT_INDEXES = [
+    "ix_services_provider_created",
+    "ix_services_category",
+    "ux_bookings_active_slot",
+    "ix_bookings_provider_created",
+    "ix_bookings_user_created",
+    "ix_reviews_provider_created",
+    "ix_provider_availability_provider_day",
+    "ix_calendar_events_provider_end",
+    "ix_notifications_user_read_created",
+]
+
+
+def _ok(response):
+    assert response.status_code == 200, (response.request.url, response.text)
+    return response.json()
+
+
+def _exercise(client):
+    def account(email, role):
+        _ok(client.post("/auth/register", json={"name": email, "email": email, "password": "pw",
+                                                 "role": role, "location": "Pune"}))
+        token = _ok(client.post("/auth/login", json={"email": email, "password": "pw"}))["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    provider, user = account("p@example.com", "provider"), account("u@example.com", "user")
+    pid = _ok(client.get("/users/me", headers=provider))["id"]
+    service = _ok(client.post("/services/", json={"service_name": "Pipe repair", "description": "Leaks",
+                                                   "min_price": 100, "category": "Plumbing"}, headers=provider))
+    day = (date.today() + timedelta(days=1)).isoformat()
+    booking = _ok(client.post("/bookings/", json={"service_id": service["id"], "provider_id": pid,
+                                                   "booking_date": day, "booking_time": "10:00"}, headers=user))
+    for status in ("accepted", "ongoing", "completed"):
+        _ok(client.put(f"/bookings/{booking['id']}/status", json={"status": status}, headers=provider))
+    _ok(client.post("/reviews/", json={"booking_id": booking["id"], "rating": 4}, headers=user))
+    _ok(client.put(f"/reviews/{booking['id']}", json={"booking_id": booking["id"], "rating": 5}, headers=user))
+    _ok(client.post("/availability/", json={"day_of_week": 0, "start_time": "09:00", "end_time": "17:00"},
+                    headers=provider))
+    _ok(client.post("/calendar/", json={"title": "Off", "event_type": "holiday", "start_datetime": day},
+                    headers=provider))
+    _ok(client.put(f"/services/{service['id']}", json={"min_price": 150}, headers=provider))
+    import outbox
+    outbox.drain()   # no background worker in tests
+
+    for path, headers in [
+        ("/services/", None), ("/services/?search=pipe", None), ("/services/?category=Plumbing", None),
+        ("/services/?location=Pune", None), ("/services/?near=18.52,73.85&radius_km=30", None),
+        ("/services/search?category=Plumbing&price_min=100&price_below=500&min_rating=3", None),
+        ("/services/search?search=pipe&min_rating=4", None), ("/services/search?near=Pune&price_below=200", None),
+        ("/services/categories", None), (f"/services/{service['id']}", None),
+        (f"/services/provider/{pid}", None), ("/services/my", provider),
+        ("/users/providers/list", None), ("/users/providers/list?sort=rating", None),
+        ("/users/providers/list?near=Pune&radius_km=30", None), (f"/users/{pid}", None),
+        ("/bookings/user", user), ("/bookings/provider", provider),
+        ("/bookings/user/dashboard", user), ("/bookings/provider/dashboard", provider),
+        (f"/reviews/provider/{pid}", None), (f"/reviews/provider/{pid}/avg", None),
+        (f"/reviews/booking/{booking['id']}", user),
+        ("/calendar/", provider), (f"/calendar/?start={day}&end=2100-01-01", provider),
+        ("/availability/", provider), (f"/availability/{pid}", None), (f"/availability/{pid}/slots", None),
+        ("/notifications/", provider), ("/notifications/unread-count", provider), ("/stats", None),
+    ]:
+        _ok(client.get(path, headers=headers))
+    _ok(client.put("/notifications/read-all", headers=provider))
+
+
+@pytest.fixture(scope="module")
+def plans(client):
+    """Query plan lines of every distinct statement the routes sent."""
+    import database
+
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb in ("SELECT", "UPDATE", "DELETE") and not _SKIP.search(statement) and not executemany:
+            statements.setdefault(" ".join(statement.split()), parameters)
+
+    engines = [database.engine, database.get_async_sessionmaker().kw["bind"].sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        _exercise(client)
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+    with database.engine.connect() as conn:
+        return {sql: [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+                for sql, params in statements.items()}
+
+
+def test_filtered_queries_use_an_index(plans):
+    assert len(plans) > 30
+    scans = {
+        sql: plan for sql, plan in plans.items()
+        if " WHERE " in sql.upper() and any(_FULL_SCAN.match(line) for line in plan)
+        and not any(known in sql for known in KNOWN_SCANS)
+    }
+    assert not scans, "full-table scans:\n" + "\n".join(f"{sql}\n    {plan}" for sql, plan in scans.items())
+
+
+@pytest.mark.parametrize("known", KNOWN_SCANS)
+def test_known_scans_are_still_issued(plans, known):
+    # A stale exception would hide the next scan that happens to match it
+    assert any(known in sql for sql in plans)
+
+
+@pytest.mark.parametrize("index", HOT_INDEXES)
+def test_hot_query_uses_its_index(plans, index):
+    assert any(index in line for plan in plans.values() for line in plan)
@@ -0,0 +1,40 @@
+"""Provider rating aggregates follow review edits."""
+from datetime import date, datetime, time
+
+
+def test_edit_applies_delta_to_stored_rating(client, token):
+    import database
+    import models
+    import schemas
+    from routers.reviews import edit_review
+
+    with database.engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": 1, "name": "Provider", "email": "p@example.com", "password_hash": "x", "role": "provider",
+             "rating_sum": 3, "rating_count": 1, "avg_rating": 3},
+            {"id": 2, "name": "User", "email": "u@example.com", "password_hash": "x", "role": "user",
+             "rating_sum": 0, "rating_count": 0, "avg_rating": 0},
+        ])
+        conn.execute(models.Service.__table__.insert(), [
+            {"id": 1, "provider_id": 1, "service_name": "Repair", "min_price": 100, "category": "Plumbing"},
+        ])
+        conn.execute(models.Booking.__table__.insert(), [
+            {"id": 1, "user_id": 2, "provider_id": 1, "service_id": 1, "status": "completed",
+             "booking_date": date.today(), "booking_time": time(10)},
+        ])
+        conn.execute(models.Review.__table__.insert(), [
+            {"id": 1, "booking_id": 1, "user_id": 2, "provider_id": 1, "rating": 3, "created_at": datetime.utcnow()},
+        ])
+
+    with database.SessionLocal() as db:
+        user = db.get(models.User, 2)
+        read = db.get(models.Review, 1)   # held, so the session keeps this copy
+        assert read.rating == 3
+        # A concurrent edit commits after this request read the review
+        response = client.put("/reviews/1", json={"booking_id": 1, "rating": 5}, headers=token(2, "user"))
+        assert response.status_code == 200
+        edit_review(1, schemas.ReviewCreate(booking_id=1, rating=4), current_user=user, db=db)
+
+    with database.engine.connect() as conn:
+        provider = conn.execute(models.User.__table__.select().where(models.User.id == 1)).one()
+    assert (provider.rating_sum, provider.rating_count, provider.avg_rating) == (4, 1, 4)
@@ -26,6 +26,23 @@ api.interceptors.response.use(
 
 export default api
 
+// Media links (avatars) are host-relative (/media/...) and served by the API,
+// which may be on another origin than the app.
+export const mediaUrl = (url) => (url?.startsWith('/') ? `${BASE_URL.replace(/\/$/, '')}${url}` : url)
+
+// List endpoints are cursor-paginated: follow X-Next-Cursor until exhausted.
+// Resolves to { data } like a normal axios call so callers don't change.
+async function getAllPages(url, params = {}) {
+    const items = []
+    let cursor
+    do {
+        const res = await api.get(url, { params: { ...params, limit: 100, ...(cursor && { cursor }) } })
+        items.push(...res.data)
+        cursor = res.headers['x-next-cursor']
+    } while (cursor)
+    return { data: items }
+}
+
 // ── Auth ──────────────────────────────────────────
 export const authAPI = {
     register: (data) => api.post('/auth/register', data),
@@ -38,14 +55,19 @@ export const usersAPI = {
     update: (data) => api.put('/users/me', data),
     getById: (id) => api.get(`/users/${id}`),
     providers: (params) => api.get('/users/providers', { params }),
-    uploadAvatar: (base64) => api.put('/users/me', { avatar_url: base64 }),
+    uploadAvatar: (file) => {
+        const form = new FormData()
+        form.append('file', file)
+        return api.post('/users/me/avatar', form)
+    },
 }
 
 // ── Services ──────────────────────────────────────
 export const servicesAPI = {
-    list: (params) => api.get('/services/', { params }),
+    list: (params) => getAllPages('/services/', params),
+    search: (params) => api.get('/services/search', { params }),  // { total, items, facets }
     my: () => api.get('/services/my'),
-    byProvider: (id) => api.get(`/services/provider/${id}`),
+    byProvider: (id) => getAllPages(`/services/provider/${id}`),
     create: (data) => api.post('/services/', data),
     update: (id, data) => api.put(`/services/${id}`, data),
     delete: (id) => api.delete(`/services/${id}`),
@@ -54,9 +76,10 @@ export const servicesAPI = {
 // ── Bookings ──────────────────────────────────────
 export const bookingsAPI = {
     create: (data) => api.post('/bookings/', data),
-    myAsUser: () => api.get('/bookings/user'),
-    myAsProvider: () => api.get('/bookings/provider'),
+    myAsUser: () => getAllPages('/bookings/user/dashboard'),
+    myAsProvider: () => getAllPages('/bookings/provider/dashboard'),
     updateStatus: (id, status) => api.put(`/bookings/${id}/status`, { status }),
+    updateStatusBatch: (items) => api.put('/bookings/status:batch', { items }),
 }
 
 // ── Reviews ───────────────────────────────────────
@@ -64,13 +87,14 @@ export const reviewsAPI = {
     submit: (data) => api.post('/reviews/', data),
     edit: (bookingId, data) => api.put(`/reviews/${bookingId}`, data),
     byBooking: (bookingId) => api.get(`/reviews/booking/${bookingId}`),
-    byProvider: (id) => api.get(`/reviews/provider/${id}`),
+    byProvider: (id) => getAllPages(`/reviews/provider/${id}`),
     avgRating: (id) => api.get(`/reviews/provider/${id}/avg`),
 }
 
 // ── Calendar ──────────────────────────────────────
 export const calendarAPI = {
-    list: () => api.get('/calendar/'),
+    // params: { start, end } to load only a visible range (end exclusive)
+    list: (params) => getAllPages('/calendar/', params),
     create: (data) => api.post('/calendar/', data),
     delete: (id) => api.delete(`/calendar/${id}`),
 }
@@ -81,6 +105,10 @@ export const notificationsAPI = {
     unreadCount: () => api.get('/notifications/unread-count'),
     markRead: (id) => api.put(`/notifications/${id}/read`),
     markAllRead: () => api.put('/notifications/read-all'),
+    // EventSource can't send headers, so the token goes in the query string
+    stream: () => new EventSource(
+        `${BASE_URL}/notifications/stream?access_token=${encodeURIComponent(localStorage.getItem('sb_token') || '')}`
+    ),
 }
 
 // ── Availability ──────────────────────────────────
@@ -88,6 +116,8 @@ export const availabilityAPI = {
     get: () => api.get('/availability/'),
     set: (data) => api.post('/availability/', data),
     delete: (day) => api.delete(`/availability/${day}`),
+    // Free slots for a provider; params: { from, to, duration } (dates as YYYY-MM-DD)
+    slots: (providerId, params) => api.get(`/availability/${providerId}/slots`, { params }),
 }
 
 // ── Platform Stats ────────────────────────────────
@@ -2,7 +2,7 @@ import { useState, useEffect, useRef } from 'react'
 import { Link, useNavigate } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext'
 import { usePhotoZoom } from '../context/PhotoZoomContext'
-import { notificationsAPI } from '../api'
+import { notificationsAPI, mediaUrl } from '../api'
 import { Bell, LogOut, User, Search, Zap, Menu, X, LayoutDashboard } from 'lucide-react'
 
 export default function Navbar() {
@@ -23,19 +23,41 @@ export default function Navbar() {
         return () => window.removeEventListener('scroll', onScroll)
     }, [])
 
-    // Poll unread count
+    // Live unread count over Server-Sent Events; fall back to polling if the
+    // stream can't be opened (old browser, proxy that buffers responses, ...)
     useEffect(() => {
-        if (isAuth) {
+        if (!isAuth) return
+        let source = null
+        const startPolling = () => {
+            if (pollRef.current) return
             fetchUnread()
             pollRef.current = setInterval(fetchUnread, 15000)
         }
-        return () => clearInterval(pollRef.current)
+        if (typeof EventSource === 'undefined') {
+            startPolling()
+        } else {
+            source = notificationsAPI.stream()
+            source.addEventListener('unread_count', (e) => setUnread(JSON.parse(e.data).count))
+            source.addEventListener('notification', (e) => {
+                const notif = JSON.parse(e.data)
+                setNotifications(prev => [notif, ...prev.filter(n => n.id !== notif.id)])
+            })
+            source.onerror = () => {
+                // EventSource retries by itself; only give up once it has closed
+                if (source.readyState === EventSource.CLOSED) startPolling()
+            }
+        }
+        return () => {
+            source?.close()
+            clearInterval(pollRef.current)
+            pollRef.current = null
+        }
     }, [isAuth])
 
     async function fetchUnread() {
         try {
             const { data } = await notificationsAPI.unreadCount()
-            setUnread(data.unread_count)
+            setUnread(data.count)
         } catch { }
     }
 
@@ -159,7 +181,7 @@ export default function Navbar() {
                                     title="View profile photo"
                                 >
                                     {user?.avatar_url ? (
-                                        <img src={user.avatar_url} alt="avatar" className="w-7 h-7 rounded-lg object-cover group-hover:scale-105 transition-transform" />
+                                        <img src={mediaUrl(user.avatar_url)} alt="avatar" className="w-7 h-7 rounded-lg object-cover group-hover:scale-105 transition-transform" />
                                     ) : (
                                         <span className="w-7 h-7 rounded-lg bg-primary-600/30 border border-primary-500/40 flex items-center justify-center text-xs font-black text-primary-300 group-hover:scale-105 transition-transform">
                                             {user?.name?.[0]?.toUpperCase()}
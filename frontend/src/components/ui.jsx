@@ -2,6 +2,7 @@ import { useState } from 'react'
 import { Link } from 'react-router-dom'
 import { MapPin, Wrench, Phone, User, X, ZoomIn } from 'lucide-react'
 import { usePhotoZoom } from '../context/PhotoZoomContext'
+import { mediaUrl } from '../api'
 
 /* ══════════════════════════════════════════════════
    1. Photo Zoom Modal — clicking the avatar photo
@@ -23,7 +24,7 @@ export function PhotoZoomModal({ provider, open, onClose }) {
 
                 {provider.avatar_url ? (
                     <img
-                        src={provider.avatar_url}
+                        src={mediaUrl(provider.avatar_url)}
                         alt={provider.name}
                         className="w-64 h-64 sm:w-80 sm:h-80 rounded-3xl object-cover border-2 border-primary-500/40 shadow-2xl shadow-primary-500/20 animate-scale-in"
                     />
@@ -65,7 +66,7 @@ export function ProviderInfoModal({ provider, open, onClose }) {
                 <div className="bg-dark-700 border border-dark-500 rounded-2xl p-4 mb-5 flex flex-col items-center gap-3">
                     {provider.avatar_url ? (
                         <img
-                            src={provider.avatar_url}
+                            src={mediaUrl(provider.avatar_url)}
                             alt={provider.name}
                             className="w-28 h-28 rounded-2xl object-cover border-2 border-primary-500/30 shadow-lg"
                         />
@@ -199,7 +200,7 @@ export function ServiceCard({ service, onClick, onCardClick, onAvatarClick }) {
                             aria-label="View profile photo"
                         >
                             {prov?.avatar_url ? (
-                                <img src={prov.avatar_url} alt={prov.name} className="w-full h-full object-cover group-hover:scale-105 transition-transform" />
+                                <img src={mediaUrl(prov.avatar_url)} alt={prov.name} className="w-full h-full object-cover group-hover:scale-105 transition-transform" />
                             ) : (
                                 <div className="w-full h-full bg-primary-600/50 flex items-center justify-center text-xs font-bold text-primary-200">
                                     {prov?.name?.[0]?.toUpperCase() || '?'}
@@ -225,6 +226,7 @@ export function ServiceCard({ service, onClick, onCardClick, onAvatarClick }) {
                         {prov?.location && (
                             <p className="text-[10px] text-slate-500 flex items-center gap-0.5">
                                 <MapPin className="w-2.5 h-2.5" />{prov.location}
+                                {prov.distance_km != null && <span> · {prov.distance_km} km</span>}
                             </p>
                         )}
                     </div>
@@ -1,5 +1,6 @@
 import { createContext, useContext, useState, useCallback } from 'react'
 import { X } from 'lucide-react'
+import { mediaUrl } from '../api'
 
 const PhotoZoomContext = createContext(null)
 
@@ -34,7 +35,7 @@ export function PhotoZoomProvider({ children }) {
                         {/* Photo or initial block */}
                         {photo.url ? (
                             <img
-                                src={photo.url}
+                                src={mediaUrl(photo.url)}
                                 alt={photo.name}
                                 className="w-64 h-64 sm:w-80 sm:h-80 rounded-3xl object-cover border-2 border-primary-500/40 shadow-2xl shadow-primary-500/20"
                             />
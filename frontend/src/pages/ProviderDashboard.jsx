@@ -1,6 +1,6 @@
 import { useState, useEffect, useCallback, useRef } from 'react'
 import { useAuth } from '../context/AuthContext'
-import { bookingsAPI, servicesAPI, calendarAPI, reviewsAPI, usersAPI } from '../api'
+import { bookingsAPI, servicesAPI, calendarAPI, reviewsAPI, usersAPI, mediaUrl } from '../api'
 import { BookingStatusBadge, EmptyState, Modal } from '../components/ui'
 import { LoadingSpinner, CardSkeleton } from '../components/LoadingSpinner'
 import toast from 'react-hot-toast'
@@ -44,6 +44,7 @@ export default function ProviderDashboard() {
     const [bookings, setBookings] = useState([])
     const [services, setServices] = useState([])
     const [events, setEvents] = useState([])
+    const [calendarVersion, setCalendarVersion] = useState(0)
     const [reviews, setReviews] = useState([])
     const [profile, setProfile] = useState(null)
     const [loading, setLoading] = useState(true)
@@ -71,10 +72,9 @@ export default function ProviderDashboard() {
     const fetchAll = useCallback(async () => {
         setLoading(true)
         try {
-            const [bRes, sRes, eRes, rRes, pRes] = await Promise.all([
+            const [bRes, sRes, rRes, pRes] = await Promise.all([
                 bookingsAPI.myAsProvider(),
                 servicesAPI.my(),
-                calendarAPI.list(),
                 reviewsAPI.byProvider(user?.user_id),
                 usersAPI.me(),
             ])
@@ -84,17 +84,10 @@ export default function ProviderDashboard() {
             setProfile(pRes.data)
             setEditForm({ name: pRes.data.name || '', location: pRes.data.location || '', mobile: pRes.data.mobile || '', bio: pRes.data.bio || '' })
 
-            // Build FullCalendar events
+            // Bookings go straight onto the calendar; calendar events are
+            // loaded per visible range by calendarSource below
+            setCalendarVersion(v => v + 1)
             setEvents([
-                ...eRes.data.map(e => ({
-                    id: `cal-${e.id}`,
-                    title: e.title,
-                    start: e.start_datetime,
-                    end: e.end_datetime,
-                    backgroundColor: e.color || (e.event_type === 'holiday' ? '#ef4444' : e.event_type === 'reminder' ? '#f59e0b' : '#6366f1'),
-                    borderColor: 'transparent',
-                    extendedProps: { dbId: e.id, type: e.event_type, eventTitle: e.title },
-                })),
                 ...bRes.data.filter(b => ['accepted', 'ongoing'].includes(b.status)).map(b => ({
                     id: `bk-${b.id}`,
                     title: `📋 ${b.service?.service_name || 'Booking'}`,
@@ -110,12 +103,39 @@ export default function ProviderDashboard() {
 
     useEffect(() => { fetchAll() }, [fetchAll])
 
+    // FullCalendar calls this with the visible range whenever it changes; a new
+    // function identity (calendarVersion bump) makes it refetch.
+    const calendarSource = useCallback((info, success, failure) => {
+        calendarAPI.list({ start: info.startStr.slice(0, 10), end: info.endStr.slice(0, 10) })
+            .then(({ data }) => success(data.map(e => ({
+                id: `cal-${e.id}`,
+                title: e.title,
+                start: e.start_datetime,
+                end: e.end_datetime,
+                backgroundColor: e.color || (e.event_type === 'holiday' ? '#ef4444' : e.event_type === 'reminder' ? '#f59e0b' : '#6366f1'),
+                borderColor: 'transparent',
+                extendedProps: { dbId: e.id, type: e.event_type, eventTitle: e.title },
+            }))))
+            .catch(failure)
+    }, [calendarVersion])
+
     /* ── Booking status ── */
     async function updateStatus(id, status) {
         try { await bookingsAPI.updateStatus(id, status); toast.success(`Booking ${status}`); fetchAll() }
         catch (err) { toast.error(err.response?.data?.detail || 'Failed') }
     }
 
+    async function updateStatusAll(items, status) {
+        try {
+            const { data } = await bookingsAPI.updateStatusBatch(items.map(b => ({ booking_id: b.id, status })))
+            const failed = data.filter(r => !r.ok).length
+            if (failed) toast.error(`${failed} of ${data.length} could not be ${status}`)
+            else toast.success(`${data.length} bookings ${status}`)
+            fetchAll()
+        }
+        catch (err) { toast.error(err.response?.data?.detail || 'Failed') }
+    }
+
     /* ── Service CRUD ── */
     async function saveSvc(e) {
         e.preventDefault(); setSavingSvc(true)
@@ -169,13 +189,17 @@ export default function ProviderDashboard() {
     }
 
     /* ── Profile ── */
-    function handleAvatarChange(e) {
+    async function handleAvatarChange(e) {
         const file = e.target.files[0]
+        e.target.value = ''
         if (!file) return
-        if (file.size > 500_000) { toast.error('Image too large (max 500KB)'); return }
-        const reader = new FileReader()
-        reader.onload = (ev) => setEditForm(f => ({ ...f, avatar_url: ev.target.result }))
-        reader.readAsDataURL(file)
+        if (file.size > 5_000_000) { toast.error('Image too large (max 5MB)'); return }
+        try {
+            // Saved as soon as it is uploaded, not with the rest of the form
+            const { data } = await usersAPI.uploadAvatar(file)
+            setProfile(p => ({ ...p, avatar_url: data.avatar_url }))
+            toast.success('Photo updated!')
+        } catch (err) { toast.error(err.response?.data?.detail || 'Upload failed') }
     }
 
     async function saveProfile() {
@@ -196,7 +220,7 @@ export default function ProviderDashboard() {
             {/* Header */}
             <div className="flex items-start gap-4 mb-8">
                 {profile?.avatar_url
-                    ? <img src={profile.avatar_url} alt="avatar" className="w-14 h-14 rounded-2xl object-cover border-2 border-cyan-400/40" />
+                    ? <img src={mediaUrl(profile.avatar_url)} alt="avatar" className="w-14 h-14 rounded-2xl object-cover border-2 border-cyan-400/40" />
                     : <div className="w-14 h-14 rounded-2xl bg-cyan-500/20 border border-cyan-400/30 flex items-center justify-center text-2xl font-black text-cyan-300">
                         {user?.name?.[0]?.toUpperCase()}
                     </div>
@@ -241,6 +265,10 @@ export default function ProviderDashboard() {
                                 <h3 className="font-bold text-slate-300 mb-3">
                                     {section.label}
                                     <span className="ml-2 text-slate-600 font-normal text-sm">({section.items.length})</span>
+                                    {section.items === pending && pending.length > 1 && <span className="ml-3 inline-flex gap-2 align-middle">
+                                        <button onClick={() => updateStatusAll(pending, 'accepted')} className="btn-primary text-xs flex items-center gap-1"><Check className="w-3 h-3" />Accept all</button>
+                                        <button onClick={() => updateStatusAll(pending, 'rejected')} className="btn-danger text-xs flex items-center gap-1"><X className="w-3 h-3" />Reject all</button>
+                                    </span>}
                                 </h3>
                                 {section.items.length === 0 ? <p className="text-slate-600 text-sm ml-2">None</p> : (
                                     <div className="flex flex-col gap-3">
@@ -338,7 +366,7 @@ export default function ProviderDashboard() {
                                 plugins={[dayGridPlugin, timeGridPlugin, interactionPlugin]}
                                 initialView="dayGridMonth"
                                 headerToolbar={{ left: 'prev,next today', center: 'title', right: 'dayGridMonth,timeGridWeek' }}
-                                events={events}
+                                eventSources={[calendarSource, events]}
                                 height="auto"
                                 eventClick={(info) => {
                                     const dbId = info.event.extendedProps?.dbId
@@ -401,8 +429,8 @@ export default function ProviderDashboard() {
 
                         {/* Avatar upload */}
                         <div className="flex items-center gap-4 mb-6">
-                            {(editMode ? editForm.avatar_url : profile?.avatar_url)
-                                ? <img src={editMode ? editForm.avatar_url : profile.avatar_url} alt="avatar"
+                            {profile?.avatar_url
+                                ? <img src={mediaUrl(profile.avatar_url)} alt="avatar"
                                     className="w-16 h-16 rounded-2xl object-cover border-2 border-cyan-400/40" />
                                 : <div className="w-16 h-16 rounded-2xl bg-cyan-500/20 border border-cyan-400/30 flex items-center justify-center text-2xl font-black text-cyan-300">
                                     {profile?.name?.[0]?.toUpperCase()}
@@ -414,7 +442,7 @@ export default function ProviderDashboard() {
                                     <button type="button" onClick={() => fileRef.current.click()} className="btn-secondary text-xs flex items-center gap-1.5">
                                         <Camera className="w-3.5 h-3.5" /> Upload Photo
                                     </button>
-                                    <p className="text-[10px] text-slate-600 mt-1">Max 500KB · JPG, PNG</p>
+                                    <p className="text-[10px] text-slate-600 mt-1">Max 5MB · JPG, PNG</p>
                                 </div>
                             )}
                         </div>
@@ -1,6 +1,6 @@
 import { useState, useEffect, useRef, useCallback } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { usersAPI, servicesAPI, reviewsAPI, bookingsAPI } from '../api'
+import { usersAPI, servicesAPI, reviewsAPI, bookingsAPI, availabilityAPI, mediaUrl } from '../api'
 import { useAuth } from '../context/AuthContext'
 import { usePhotoZoom } from '../context/PhotoZoomContext'
 import { ServiceCard, StarRating, Modal } from '../components/ui'
@@ -252,9 +252,21 @@ export default function ProviderProfile() {
     const [selectedService, setSelectedService] = useState(null)
     const [bookForm, setBookForm] = useState({ booking_date: '', booking_time: '09:00', problem_description: '' })
     const [booking, setBooking] = useState(false)
+    const [slots, setSlots] = useState([])
 
     useEffect(() => { fetchAll() }, [id])
 
+    // Free slots for the chosen day, computed server-side
+    useEffect(() => {
+        const day = bookForm.booking_date
+        if (!bookingModal || !day) { setSlots([]); return }
+        let cancelled = false
+        availabilityAPI.slots(id, { from: day, to: day })
+            .then(({ data }) => { if (!cancelled) setSlots(data) })
+            .catch(() => { if (!cancelled) setSlots([]) })
+        return () => { cancelled = true }
+    }, [id, bookingModal, bookForm.booking_date])
+
     async function fetchAll() {
         setLoading(true)
         try {
@@ -312,7 +324,7 @@ export default function ProviderProfile() {
                     title="View profile photo"
                 >
                     {provider.avatar_url
-                        ? <img src={provider.avatar_url} alt={provider.name} className="w-full h-full object-cover group-hover:scale-105 transition-transform" />
+                        ? <img src={mediaUrl(provider.avatar_url)} alt={provider.name} className="w-full h-full object-cover group-hover:scale-105 transition-transform" />
                         : <div className="w-full h-full flex items-center justify-center text-3xl font-black text-primary-300 group-hover:scale-110 transition-transform">
                             {provider.name?.[0]?.toUpperCase()}
                         </div>
@@ -408,6 +420,17 @@ export default function ProviderProfile() {
                         <label className="label flex items-center gap-1.5">
                             <Clock className="w-3.5 h-3.5 text-primary-400" /> Appointment Time *
                         </label>
+                        {slots.length > 0 && (
+                            <div className="flex flex-wrap gap-1.5 mb-2">
+                                {slots.map(s => (
+                                    <button type="button" key={s.start_time}
+                                        onClick={() => setBookForm(f => ({ ...f, booking_time: s.start_time }))}
+                                        className={`px-2.5 py-1 rounded-lg text-xs border transition-colors ${bookForm.booking_time === s.start_time ? 'bg-primary-500/20 border-primary-500 text-primary-300' : 'border-dark-500 text-slate-400 hover:border-primary-500/50'}`}>
+                                        {formatDisplay12(s.start_time)}
+                                    </button>
+                                ))}
+                            </div>
+                        )}
                         <TimePicker12hr
                             value={bookForm.booking_time}
                             onChange={v => setBookForm(f => ({ ...f, booking_time: v }))}
@@ -3,7 +3,8 @@ import { useNavigate, useSearchParams } from 'react-router-dom'
 import { servicesAPI } from '../api'
 import { ServiceCard, ProviderInfoModal, PhotoZoomModal } from '../components/ui'
 import { CardSkeleton } from '../components/LoadingSpinner'
-import { Search as SearchIcon } from 'lucide-react'
+import { Search as SearchIcon, LocateFixed, Star } from 'lucide-react'
+import toast from 'react-hot-toast'
 
 const CATEGORIES = ['All', 'Plumbing', 'Electrical', 'Cleaning', 'Carpentry', 'Painting', 'AC Service', 'Pest Control', 'Appliance Repair']
 
@@ -15,12 +16,17 @@ export default function Search() {
     const [query, setQuery] = useState(searchParams.get('q') || '')
     const [category, setCategory] = useState(searchParams.get('category') || 'All')
     const [location, setLocation] = useState('')
+    const [near, setNear] = useState(null)  // "lat,lng" from the browser, nearest providers first
+    const [price, setPrice] = useState(null)  // a price facet bucket: { min, max }
+    const [minRating, setMinRating] = useState(null)
+    const [facets, setFacets] = useState(null)
+    const [total, setTotal] = useState(0)
 
     // Two modal states
     const [infoProvider, setInfoProvider] = useState(null)  // card click → info popup
     const [zoomProvider, setZoomProvider] = useState(null)  // avatar click → photo zoom
 
-    useEffect(() => { fetchServices() }, [category])
+    useEffect(() => { fetchServices() }, [category, near, price, minRating])
 
     async function fetchServices() {
         setLoading(true)
@@ -29,19 +35,33 @@ export default function Search() {
             if (query) params.search = query
             if (category && category !== 'All') params.category = category
             if (location) params.location = location
-            const { data } = await servicesAPI.list(params)
-            setServices(data)
-        } catch { setServices([]) }
+            if (near) { params.near = near; params.radius_km = 25 }
+            if (price) { params.price_min = price.min; if (price.max != null) params.price_below = price.max }
+            if (minRating) params.min_rating = minRating
+            const { data } = await servicesAPI.search(params)
+            setServices(data.items)
+            setFacets(data.facets)
+            setTotal(data.total)
+        } catch { setServices([]); setTotal(0) }
         finally { setLoading(false) }
     }
 
     function handleSearch(e) { e.preventDefault(); fetchServices() }
 
+    function toggleNearMe() {
+        if (near) { setNear(null); return }
+        if (!navigator.geolocation) { toast.error('Location is not available in this browser'); return }
+        navigator.geolocation.getCurrentPosition(
+            ({ coords }) => setNear(`${coords.latitude.toFixed(4)},${coords.longitude.toFixed(4)}`),
+            () => toast.error('Could not get your location'),
+        )
+    }
+
     return (
         <div className="max-w-7xl mx-auto px-4 sm:px-6 py-10 animate-fade-in">
             <div className="mb-8">
                 <h1 className="section-title text-2xl">Find Services</h1>
-                <p className="section-subtitle">Browse {services.length} services available near you</p>
+                <p className="section-subtitle">Browse {total} services available near you</p>
 
                 {/* Search bar */}
                 <form onSubmit={handleSearch} className="flex gap-3 mb-4">
@@ -52,24 +72,61 @@ export default function Search() {
                     </div>
                     <input className="input w-40 hidden sm:block" placeholder="Location"
                         value={location} onChange={e => setLocation(e.target.value)} />
+                    <button type="button" onClick={toggleNearMe} title="Providers within 25 km, nearest first"
+                        className={`btn-secondary flex items-center gap-2 ${near ? 'border-primary-500 text-primary-300' : ''}`}>
+                        <LocateFixed className="w-4 h-4" /> Near me
+                    </button>
                     <button type="submit" className="btn-primary flex items-center gap-2">
                         <SearchIcon className="w-4 h-4" /> Search
                     </button>
                 </form>
 
-                {/* Category filters */}
+                {/* Category filters, with how many services each would show */}
                 <div className="flex gap-2 flex-wrap">
-                    {CATEGORIES.map(cat => (
-                        <button key={cat} onClick={() => setCategory(cat)}
-                            className={`px-3 py-1.5 rounded-full text-sm font-medium transition-all border
+                    {CATEGORIES.map(cat => {
+                        const count = cat === 'All' ? null : facets?.category.find(f => f.value === cat)?.count ?? 0
+                        return (
+                            <button key={cat} onClick={() => setCategory(cat)}
+                                className={`px-3 py-1.5 rounded-full text-sm font-medium transition-all border
                 ${category === cat
-                                    ? 'bg-primary-600 text-white border-primary-500 shadow-glow'
-                                    : 'bg-dark-700 text-slate-400 border-dark-500 hover:border-primary-500/40 hover:text-slate-200'
-                                }`}>
-                            {cat}
-                        </button>
-                    ))}
+                                        ? 'bg-primary-600 text-white border-primary-500 shadow-glow'
+                                        : 'bg-dark-700 text-slate-400 border-dark-500 hover:border-primary-500/40 hover:text-slate-200'
+                                    }`}>
+                                {cat}{facets && count !== null && <span className="ml-1 opacity-60">{count}</span>}
+                            </button>
+                        )
+                    })}
                 </div>
+
+                {/* Price and rating facets */}
+                {facets && (
+                    <div className="flex gap-2 flex-wrap mt-3 text-sm">
+                        {facets.price.map(bucket => {
+                            const active = price?.min === bucket.min
+                            return (
+                                <button key={bucket.min} onClick={() => setPrice(active ? null : bucket)}
+                                    disabled={!bucket.count && !active}
+                                    className={`px-3 py-1 rounded-lg border transition-all disabled:opacity-40
+                    ${active ? 'border-primary-500 text-primary-300' : 'border-dark-500 text-slate-400 hover:text-slate-200'}`}>
+                                    {bucket.max == null ? `₹${bucket.min}+` : `₹${bucket.min}–${bucket.max}`}
+                                    <span className="ml-1 opacity-60">{bucket.count}</span>
+                                </button>
+                            )
+                        })}
+                        {facets.rating.map(({ min_rating, count }) => {
+                            const active = minRating === min_rating
+                            return (
+                                <button key={min_rating} onClick={() => setMinRating(active ? null : min_rating)}
+                                    disabled={!count && !active}
+                                    className={`px-3 py-1 rounded-lg border flex items-center gap-1 transition-all disabled:opacity-40
+                    ${active ? 'border-amber-500 text-amber-300' : 'border-dark-500 text-slate-400 hover:text-slate-200'}`}>
+                                    {min_rating}<Star className="w-3 h-3" />& up
+                                    <span className="ml-1 opacity-60">{count}</span>
+                                </button>
+                            )
+                        })}
+                    </div>
+                )}
             </div>
 
             {loading ? (
@@ -1,6 +1,6 @@
 import { useState, useEffect, useRef, useCallback } from 'react'
 import { useAuth } from '../context/AuthContext'
-import { bookingsAPI, reviewsAPI, usersAPI } from '../api'
+import { bookingsAPI, reviewsAPI, usersAPI, mediaUrl } from '../api'
 import { BookingStatusBadge, EmptyState, Modal } from '../components/ui'
 import { LoadingSpinner, CardSkeleton } from '../components/LoadingSpinner'
 import toast from 'react-hot-toast'
@@ -127,16 +127,19 @@ export default function UserDashboard() {
     }
 
     /* ── Profile picture ── */
-    function handleAvatarChange(e) {
+    async function handleAvatarChange(e) {
         const file = e.target.files[0]
+        e.target.value = ''
         if (!file) return
-        if (file.size > 500_000) { toast.error('Image too large (max 500KB)'); return }
-        const reader = new FileReader()
-        reader.onload = (ev) => {
-            const base64 = ev.target.result
-            setEditForm(f => ({ ...f, avatar_url: base64 }))
-        }
-        reader.readAsDataURL(file)
+        if (file.size > 5_000_000) { toast.error('Image too large (max 5MB)'); return }
+        try {
+            // Saved as soon as it is uploaded, not with the rest of the form
+            const { data } = await usersAPI.uploadAvatar(file)
+            setProfile(p => ({ ...p, avatar_url: data.avatar_url }))
+            const stored = JSON.parse(localStorage.getItem('sb_user') || '{}')
+            localStorage.setItem('sb_user', JSON.stringify({ ...stored, avatar_url: data.avatar_url }))
+            toast.success('Photo updated!')
+        } catch (err) { toast.error(err.response?.data?.detail || 'Upload failed') }
     }
 
     /* ── Save profile ── */
@@ -148,7 +151,7 @@ export default function UserDashboard() {
             setEditMode(false)
             // Update auth context so navbar avatar updates
             const stored = JSON.parse(localStorage.getItem('sb_user') || '{}')
-            const merged = { ...stored, avatar_url: editForm.avatar_url || stored.avatar_url, name: editForm.name || stored.name }
+            const merged = { ...stored, avatar_url: updated.data.avatar_url || stored.avatar_url, name: editForm.name || stored.name }
             localStorage.setItem('sb_user', JSON.stringify(merged))
             fetchAll()
         } catch { toast.error('Update failed') }
@@ -163,7 +166,7 @@ export default function UserDashboard() {
             {/* Header */}
             <div className="flex items-center gap-4 mb-8">
                 {profile?.avatar_url
-                    ? <img src={profile.avatar_url} alt="avatar" className="w-14 h-14 rounded-2xl object-cover border-2 border-primary-500/40" />
+                    ? <img src={mediaUrl(profile.avatar_url)} alt="avatar" className="w-14 h-14 rounded-2xl object-cover border-2 border-primary-500/40" />
                     : <div className="w-14 h-14 rounded-2xl bg-primary-600/30 border border-primary-500/40 flex items-center justify-center text-2xl font-black text-primary-300">
                         {user?.name?.[0]?.toUpperCase()}
                     </div>
@@ -271,8 +274,8 @@ export default function UserDashboard() {
 
                     {/* Avatar upload */}
                     <div className="flex items-center gap-4 mb-6">
-                        {(editMode ? editForm.avatar_url : profile?.avatar_url)
-                            ? <img src={editMode ? editForm.avatar_url : profile.avatar_url} alt="avatar"
+                        {profile?.avatar_url
+                            ? <img src={mediaUrl(profile.avatar_url)} alt="avatar"
                                 className="w-16 h-16 rounded-2xl object-cover border-2 border-primary-500/40" />
                             : <div className="w-16 h-16 rounded-2xl bg-primary-600/30 border border-primary-500/40 flex items-center justify-center text-2xl font-black text-primary-300">
                                 {profile?.name?.[0]?.toUpperCase()}
@@ -285,7 +288,7 @@ export default function UserDashboard() {
                                     className="btn-secondary text-xs flex items-center gap-1.5">
                                     <Camera className="w-3.5 h-3.5" /> Upload Photo
                                 </button>
-                                <p className="text-[10px] text-slate-600 mt-1">Max 500KB · JPG, PNG</p>
+                                <p className="text-[10px] text-slate-600 mt-1">Max 5MB · JPG, PNG</p>
                             </div>
                         )}
                     </div>